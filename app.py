@@ -1,57 +1,102 @@
 import streamlit as st
 import pandas as pd
-import psycopg2
 from psycopg2 import OperationalError
 
+from db import get_db_settings, pool_stats
+from instrumentation import page_done, track_page
+from query_cache import cache_stats
+from query_runner import CONNECTIVITY_TTL, connectivity_check
+
 st.set_page_config(
     page_title="Integrated Data Management System",
     page_icon="🚀",
     layout="wide"
 )
+track_page("app")
 
 st.title("🚀 Streamlit + Neon PostgreSQL Connection Test")
 
-# --- STEP 1: Ambil konfigurasi dari Streamlit Secrets ---
+# --- STEP 1: Ambil konfigurasi dari Streamlit Secrets (di-parse sekali per proses) ---
 try:
-    db = st.secrets["connections"]["neon"]
+    get_db_settings()
 except Exception as e:
     st.error("❌ Tidak menemukan konfigurasi database di secrets.")
     st.stop()
 
-# --- STEP 2: Coba koneksi ke Neon PostgreSQL ---
-def create_connection():
-    try:
-        conn = psycopg2.connect(
-            host=db["host"],
-            database=db["database"],
-            user=db["user"],
-            password=db["password"],
-            port=db["port"],
-            sslmode=db.get("sslmode", "require")
-        )
-        return conn
-    except OperationalError as e:
-        st.error(f"❌ Gagal konek ke database: {e}")
-        return None
+# --- STEP 2 & 3: Cek koneksi di background; hasilnya di-cache & dipakai bersama semua sesi ---
+check = connectivity_check()
+checking = not check.done()
 
-conn = create_connection()
 
-# --- STEP 3: Jika konek, jalankan query test ---
-if conn:
+@st.fragment(run_every=1 if checking else None)
+def show_connection():
+    if not check.done():
+        st.info("⏳ Mengecek koneksi ke Neon PostgreSQL ...")
+        return
+    if checking:
+        # Cek selesai: render ulang halaman penuh (tanpa polling lagi)
+        st.rerun()
+
+    connected = False
     try:
-        df = pd.read_sql("SELECT NOW() AS server_time;", conn)
-        st.success("✅ Koneksi ke Neon PostgreSQL berhasil!")
-        st.dataframe(df)
+        result = check.result()
+        connected = True
+        st.success(f"✅ Koneksi ke Neon PostgreSQL berhasil! ({result['seconds'] * 1000:,.0f} ms)")
+        st.dataframe(pd.DataFrame({"server_time": [result["server_time"]]}))
+        st.caption(f"Hasil cek dipakai ulang selama {CONNECTIVITY_TTL} detik.")
+    except OperationalError as e:
+        st.error(f"❌ Gagal konek ke database: {e}")
     except Exception as e:
         st.error(f"⚠️ Gagal menjalankan query: {e}")
-    finally:
-        conn.close()
-else:
-    st.warning("⚠️ Mode demo aktif - menampilkan data contoh.")
-    df_demo = pd.DataFrame({
-        "member_id": ["MEM001", "MEM002"],
-        "full_name": ["John Doe", "Jane Smith"],
-        "country": ["Indonesia", "Malaysia"],
-        "join_date": ["2024-01-01", "2024-01-02"]
-    })
-    st.dataframe(df_demo)
+    if not connected:
+        # Jangan simpan kegagalan: kunjungan berikutnya langsung mencoba lagi
+        connectivity_check.clear()
+
+    if st.button("🔄 Cek ulang koneksi"):
+        connectivity_check.clear()
+        st.rerun()
+
+    if connected:
+        with st.expander("🔌 Statistik Connection Pool"):
+            stats = pool_stats()
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Koneksi Terbuka", f"{stats['open_connections']} / {stats['max_connections']}")
+            with col2:
+                st.metric("Total Checkout", stats["checkouts"])
+            with col3:
+                st.metric("Rata-rata Tunggu", f"{stats['wait_time_avg'] * 1000:.1f} ms")
+            with col4:
+                st.metric("Reconnect", stats["reconnects"])
+            st.json(stats)
+
+        with st.expander("🗃️ Statistik Query Cache"):
+            cache_df = cache_stats()
+            if cache_df.empty:
+                st.info("Belum ada query yang di-cache.")
+            else:
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric(
+                        "Entri di Cache",
+                        f"{cache_df.attrs['entries']} ({cache_df.attrs['bytes'] / 1024 / 1024:,.1f} MB)",
+                    )
+                with col2:
+                    st.metric("Total Hit", int(cache_df["hits"].sum()))
+                with col3:
+                    st.metric("Total Miss", int(cache_df["misses"].sum()))
+                st.dataframe(cache_df, use_container_width=True, hide_index=True)
+    else:
+        st.warning("⚠️ Mode demo aktif - menampilkan data contoh.")
+        df_demo = pd.DataFrame({
+            "member_id": ["MEM001", "MEM002"],
+            "full_name": ["John Doe", "Jane Smith"],
+            "country": ["Indonesia", "Malaysia"],
+            "join_date": ["2024-01-01", "2024-01-02"]
+        })
+        st.dataframe(df_demo)
+
+
+show_connection()
+
+page_done()
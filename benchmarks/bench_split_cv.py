@@ -0,0 +1,102 @@
+"""
+Benchmark: legacy iterrows Split CV vs vectorized split_cv_engine.
+
+Run from the repository root:
+    python benchmarks/bench_split_cv.py
+    python benchmarks/bench_split_cv.py --sizes 10000 100000 --legacy-max 100000
+
+Every size is also checked for identical output between both implementations.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from split_cv_engine import calculate_split_cv  # noqa: E402
+
+
+def legacy_calculate_split_cv(df):
+    """Original row-by-row implementation, kept as the reference result."""
+    df = df.copy()
+
+    df['SPLIT PLAN A'] = 0.0
+    df['SPLIT RO'] = 0.0
+    df['BALANCE B/F'] = 0.0
+
+    for idx, row in df.iterrows():
+        country = str(row['COUNTRY']).upper().strip()
+        cv_plan_a = float(row['CV PLAN A'])
+        cv_ro = float(row['CV RO'])
+        balance_cf = float(row['BALANCE C/F'])
+
+        if country == 'ID':
+            df.at[idx, 'SPLIT PLAN A'] = cv_plan_a * 0.6
+            df.at[idx, 'SPLIT RO'] = cv_ro * 0.4
+        elif country == 'MY':
+            df.at[idx, 'SPLIT PLAN A'] = cv_plan_a * 0.5
+            df.at[idx, 'SPLIT RO'] = cv_ro * 0.5
+        else:
+            df.at[idx, 'SPLIT PLAN A'] = cv_plan_a * 0.6
+            df.at[idx, 'SPLIT RO'] = cv_ro * 0.4
+
+        df.at[idx, 'BALANCE B/F'] = balance_cf
+
+    return df
+
+
+def make_members(n, seed=42):
+    """Synthetic member file with the columns of the monthly upload."""
+    rng = np.random.default_rng(seed)
+    cv_plan_a = rng.integers(0, 50_000, n).astype("float64")
+    cv_ro = rng.integers(0, 20_000, n).astype("float64")
+    balance = rng.integers(0, 10_000, n).astype("float64")
+    return pd.DataFrame({
+        "MEMBER ID": [f"MEM{i:08d}" for i in range(n)],
+        "MEMBER NAME": [f"Member {i}" for i in range(n)],
+        "COUNTRY": rng.choice(["ID", "MY", "id ", "SG", None], n, p=[0.6, 0.3, 0.05, 0.04, 0.01]),
+        "CV PLAN A": cv_plan_a,
+        "CV RO": cv_ro,
+        "TOTAL CV C/F": cv_plan_a + cv_ro,
+        "BALANCE C/F": balance,
+        "GRAND TOTAL": cv_plan_a + cv_ro + balance,
+    })
+
+
+def timed(func, df, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=1_000_000,
+                        help="skip the (slow) legacy run above this many rows")
+    parser.add_argument("--repeat", type=int, default=3, help="vectorized runs per size (best is reported)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>10}  identical")
+    for n in args.sizes:
+        df = make_members(n)
+        fast_time, fast = timed(calculate_split_cv, df, args.repeat)
+
+        if n <= args.legacy_max:
+            slow_time, slow = timed(legacy_calculate_split_cv, df, 1)
+            pd.testing.assert_frame_equal(fast, slow)
+            print(f"{n:>10,} {slow_time:>12.3f} {fast_time:>15.4f} {slow_time / fast_time:>9.0f}x  yes")
+        else:
+            print(f"{n:>10,} {'skipped':>12} {fast_time:>15.4f} {'-':>10}  -")
+
+
+if __name__ == "__main__":
+    main()
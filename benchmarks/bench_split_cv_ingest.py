@@ -0,0 +1,57 @@
+"""
+Benchmark: reading Split CV input files.
+
+Compares the old pd.read_excel() path with split_cv_reader for .xlsx, .csv
+and .parquet copies of the same synthetic member file, and prints the
+per-phase profile of each reader.
+
+Run from the repository root:
+    python benchmarks/bench_split_cv_ingest.py
+    python benchmarks/bench_split_cv_ingest.py --rows 300000 --trace-memory
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_split_cv import make_members  # noqa: E402
+from exporter import export_dataframe  # noqa: E402
+from split_cv_reader import HAS_CALAMINE, read_split_cv_input  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--trace-memory", action="store_true", help="trace peak memory per phase (slower)")
+    args = parser.parse_args()
+
+    df = make_members(args.rows)
+    # Kolom tambahan yang tidak dipakai, seperti file bulanan asli
+    df.insert(3, "CATATAN", "catatan yang tidak dipakai perhitungan")
+
+    paths = {}
+    for fmt in ["xlsx", "csv", "parquet"]:
+        paths[fmt] = export_dataframe(df, fmt=fmt)["path"]
+
+    try:
+        start = time.perf_counter()
+        pd.read_excel(paths["xlsx"])
+        print(f"pd.read_excel (openpyxl, semua kolom): {time.perf_counter() - start:.2f} s\n")
+
+        for fmt, path in paths.items():
+            start = time.perf_counter()
+            _, profile = read_split_cv_input(path, trace_memory=args.trace_memory)
+            engine = (" (calamine)" if HAS_CALAMINE else " (openpyxl read-only)") if fmt == "xlsx" else ""
+            print(f"split_cv_reader .{fmt}{engine}: {time.perf_counter() - start:.2f} s")
+            print(profile.to_string(index=False), end="\n\n")
+    finally:
+        for path in paths.values():
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
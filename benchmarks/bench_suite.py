@@ -0,0 +1,390 @@
+"""
+Benchmark suite: the app's hot paths against a local PostgreSQL database.
+
+Loads synthetic sales_data through the same import path as the Import page
+(COPY with schema inference, daily rollup, dimension tables, recommended
+indexes). It then times the sales-by-location queries and their chart
+aggregations, the dashboard queries and calculate_split_cv. Cold start is
+measured in fresh interpreters: the top-level imports of every page and
+the first render of the landing page and report pages (AppTest against
+--dsn). Every case is
+run --repeat times; peak Python memory (tracemalloc) is measured in one
+extra traced run. Results go to a JSON file that can be compared to an
+earlier run with --compare.
+
+The target database is created if missing and its sales tables are
+REPLACED, so never point --dsn at production.
+
+Run from the repository root:
+    python benchmarks/bench_suite.py --rows 1000000
+    python benchmarks/bench_suite.py --dsn "host=/tmp/pg dbname=bench" --skip-import --compare benchmarks/results/old.json
+"""
+import argparse
+import ast
+import datetime
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import psycopg2
+from psycopg2 import sql as pg_sql
+from psycopg2.extensions import make_dsn, parse_dsn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datagen import SEED, member_frame, write_sales_csv  # noqa: E402
+from csv_import import sniff_csv, stream_csv_to_table  # noqa: E402
+from db_indexes import create_recommended_indexes, ensure_text_date_function  # noqa: E402
+from frame_fetch import fetch_frame  # noqa: E402
+from sales_cube import build_cube, chart_frames  # noqa: E402
+from sales_dimensions import rebuild_dimensions  # noqa: E402
+from sales_queries import (  # noqa: E402
+    dashboard_bounds_query, dashboard_queries, dashboard_source, sales_by_location_query
+)
+from sales_rollup import SOURCE_TABLE, rebuild_rollup, rollup_state  # noqa: E402
+from schema_infer import create_table_sql, infer_schema, schema_from_table  # noqa: E402
+from split_cv_engine import calculate_split_cv  # noqa: E402
+from split_cv_reader import PhaseProfiler  # noqa: E402
+from sql_filters import text_date_columns  # noqa: E402
+
+DEFAULT_DSN = os.environ.get("BENCH_DSN", "host=localhost dbname=streamlit_bench user=postgres")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RENDER_PAGES = ["app.py", "pages/5_dashboard.py", "pages/6_product_sales_by_loc.py"]
+
+# Dijalankan di interpreter baru: mengukur import modul aplikasi / run pertama halaman
+IMPORT_SCRIPT = """
+import sys, time
+import streamlit  # sudah dimuat server sebelum halaman pertama berjalan
+start = time.perf_counter()
+exec(compile(sys.argv[1], "<page imports>", "exec"))
+print(time.perf_counter() - start)
+"""
+RENDER_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.secrets["connections"] = json.loads(sys.argv[2])
+at.run()
+print(time.perf_counter() - start)
+if at.exception:
+    sys.exit(at.exception[0].value)
+"""
+
+
+def connect(dsn):
+    """Connect to dsn, creating its database first when it does not exist yet."""
+    try:
+        return psycopg2.connect(dsn)
+    except psycopg2.OperationalError as e:
+        if "does not exist" not in str(e):
+            raise
+    params = parse_dsn(dsn)
+    admin = psycopg2.connect(make_dsn(dsn, dbname="postgres"))
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(pg_sql.SQL("CREATE DATABASE {};").format(pg_sql.Identifier(params["dbname"])))
+    admin.close()
+    return psycopg2.connect(dsn)
+
+
+def read_sql(conn, sql, params=None):
+    # Jalur fetch yang sama dengan halaman (cached_query): frame dengan tipe kolom ringkas
+    df = fetch_frame(conn, sql, params=params)
+    conn.rollback()
+    return df
+
+
+def measure(name, func, repeat, trace_memory=True):
+    """
+    Run func() repeat times (plus one traced run) and summarize.
+
+    func returns the number of result rows. Returns a result dict with the
+    min/median/max seconds and peak_mb of the traced run.
+    """
+    timings = []
+    rows = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = func()
+        timings.append(time.perf_counter() - start)
+
+    peak_mb = None
+    if trace_memory:
+        profiler = PhaseProfiler(trace_memory=True)
+        with profiler.phase(name):
+            func()
+        peak_mb = profiler.phases[-1]["peak_mb"]
+    return summarize(name, timings, rows, peak_mb)
+
+
+def summarize(name, timings, rows=None, peak_mb=None):
+    """Result dict (and one printed line) for the timings of one case."""
+    result = {
+        "case": name,
+        "rows": rows,
+        "runs": len(timings),
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "max_s": max(timings),
+        "peak_mb": peak_mb,
+    }
+    print(
+        f"{name:<36} {result['median_s'] * 1000:>10.1f} ms  (min {result['min_s'] * 1000:.1f}, "
+        f"max {result['max_s'] * 1000:.1f})  "
+        + (f"peak {peak_mb:,.1f} MB  " if peak_mb is not None else "")
+        + (f"{rows:,} baris" if rows is not None else "")
+    )
+    return result
+
+
+def page_imports(path):
+    """Top-level import statements of a page script as source code."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def measure_cold(name, script, script_args, repeat):
+    """Run script in repeat fresh interpreters; each prints the seconds it measured."""
+    timings = []
+    for _ in range(repeat):
+        done = subprocess.run(
+            [sys.executable, "-c", script, *script_args], capture_output=True, text=True, cwd=ROOT_DIR,
+        )
+        if done.returncode != 0:
+            raise RuntimeError(f"{name} gagal: {done.stderr.strip()[-500:]}")
+        timings.append(float(done.stdout.strip().splitlines()[0]))
+    return summarize(name, timings)
+
+
+def dsn_secrets(dsn):
+    """[connections.neon] secrets for the app pointing at dsn."""
+    params = parse_dsn(dsn)
+    return {"neon": {
+        "host": params.get("host", "localhost"),
+        "database": params["dbname"],
+        "user": params.get("user", "postgres"),
+        "password": params.get("password", ""),
+        "port": int(params.get("port", 5432)),
+        "sslmode": params.get("sslmode", "disable"),
+    }}
+
+
+def startup_cases(args):
+    """Cold import time of every page and time to first render of RENDER_PAGES."""
+    results = []
+    pages = ["app.py"] + sorted(os.path.join("pages", p) for p in os.listdir(os.path.join(ROOT_DIR, "pages"))
+                                if p.endswith(".py"))
+    for page in pages:
+        imports = page_imports(os.path.join(ROOT_DIR, page))
+        name = os.path.splitext(os.path.basename(page))[0]
+        results.append(measure_cold(f"startup.import.{name}", IMPORT_SCRIPT, [imports], args.repeat))
+    secrets = json.dumps(dsn_secrets(args.dsn))
+    for page in RENDER_PAGES:
+        name = os.path.splitext(os.path.basename(page))[0]
+        results.append(measure_cold(f"startup.first_render.{name}", RENDER_SCRIPT, [page, secrets], args.repeat))
+    return results
+
+
+def import_sales(conn, csv_path):
+    """Import csv_path into sales_data the way the Import page does with 'replace'."""
+    with open(csv_path, "rb") as raw:
+        info = sniff_csv(raw)
+        schema = infer_schema(info["preview"])
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {SOURCE_TABLE};")
+            cur.execute(create_table_sql(SOURCE_TABLE, schema))
+        table_schema = schema_from_table(conn, SOURCE_TABLE)
+        for col, spec in table_schema.items():
+            if col in schema and schema[col]["type"] == spec["type"]:
+                spec["format"] = schema[col]["format"]
+        stats = stream_csv_to_table(
+            conn, raw, SOURCE_TABLE, info["columns"],
+            encoding=info["encoding"], delimiter=info["delimiter"], schema=table_schema,
+        )
+    return stats["rows"]
+
+
+def column_types(conn):
+    df = read_sql(conn, """
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s
+    """, (SOURCE_TABLE,))
+    return dict(zip(df["column_name"], df["data_type"]))
+
+
+def top_values(conn, columns, n):
+    cols = ", ".join(f'"{c}"' for c in columns)
+    df = read_sql(conn, f"SELECT {cols} FROM {SOURCE_TABLE} GROUP BY {cols} ORDER BY COUNT(*) DESC LIMIT %s;", (n,))
+    return list(df.itertuples(index=False, name=None))
+
+
+def run_suite(conn, args, csv_path):
+    results = []
+
+    def add(name, func, repeat=args.repeat):
+        results.append(measure(name, func, repeat, trace_memory=not args.no_memory))
+
+    if not args.skip_import:
+        # Import berat: cukup satu kali, tanpa run ber-trace tambahan
+        results.append(measure("import.copy_csv", lambda: import_sales(conn, csv_path), 1, trace_memory=False))
+        add("import.rebuild_rollup", lambda: rebuild_rollup(conn), 1)
+        add("import.rebuild_dimensions", lambda: sum(rebuild_dimensions(conn).values()), 1)
+        create_recommended_indexes(conn, SOURCE_TABLE)
+        with conn.cursor() as cur:
+            cur.execute(f"ANALYZE {SOURCE_TABLE};")
+        conn.commit()
+
+    types = column_types(conn)
+    if text_date_columns(types):
+        ensure_text_date_function(conn)
+    state = rollup_state(conn)
+    conn.rollback()
+
+    # 🎯 Filter tipikal: 90 hari terakhir, 5 produk terlaris, 3 lokasi terbesar
+    bounds = read_sql(conn, f'SELECT MIN("createdt") AS min_dt, MAX("createdt") AS max_dt FROM {SOURCE_TABLE};')
+    max_dt = pd.Timestamp(bounds["max_dt"].iloc[0]).date()
+    min_dt = pd.Timestamp(bounds["min_dt"].iloc[0]).date()
+    last_90 = max_dt - datetime.timedelta(days=90)
+    products = top_values(conn, ["kodeProduk", "namaProduk"], 5)
+    locations = [loc for (loc,) in top_values(conn, ["loccd"], 3)]
+
+    report_cases = {
+        "sales_by_location.filtered_raw": dict(products=products, locations=locations, rollup_state=None),
+        "sales_by_location.filtered_rollup": dict(products=products, locations=locations, rollup_state=state),
+        "sales_by_location.all_rollup": dict(rollup_state=state),
+    }
+    frames = {}
+    for name, kwargs in report_cases.items():
+        q = sales_by_location_query(types, "createdt", last_90, max_dt, **kwargs)
+
+        def run_report(q=q, name=name):
+            frames[name] = read_sql(conn, q["query"], q["params"])
+            return len(frames[name])
+        add(name, run_report)
+
+    # 📊 Agregasi chart (build_cube + reduksi data grafik) dari hasil laporan terbesar
+    report_df = frames["sales_by_location.all_rollup"]
+    add("sales_by_location.build_cube", lambda: len(build_cube(report_df, "createdt")["product_location"]))
+    report_cube = build_cube(report_df, "createdt")
+    add("sales_by_location.chart_frames", lambda: len(chart_frames(report_cube)["trend_product"]))
+
+    count_table, count_expr, _ = dashboard_source(state)
+    add("dashboard.bounds", lambda: len(read_sql(conn, dashboard_bounds_query(types, count_table))))
+    for name, spec in dashboard_queries(types, count_table, count_expr, last_90, max_dt, 10).items():
+        add(f"dashboard.{name}", lambda spec=spec: len(read_sql(conn, spec["sql"], spec["params"])))
+
+    # Rentang penuh: kasus terburuk untuk dashboard
+    for name, spec in dashboard_queries(types, count_table, count_expr, min_dt, max_dt, 10).items():
+        add(f"dashboard.{name}_full_range", lambda spec=spec: len(read_sql(conn, spec["sql"], spec["params"])))
+
+    members = member_frame(args.members, seed=args.seed)
+    add("split_cv.calculate", lambda: len(calculate_split_cv(members)))
+
+    if not args.skip_startup:
+        results += startup_cases(args)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["case"]: r for r in json.load(f)["results"]}
+    print(f"\nPerbandingan dengan {baseline_path}:")
+    print(f"{'case':<36} {'lama (ms)':>12} {'baru (ms)':>12} {'perubahan':>10}")
+    for r in results:
+        old = baseline.get(r["case"])
+        if not old:
+            print(f"{r['case']:<36} {'-':>12} {r['median_s'] * 1000:>12.1f} {'baru':>10}")
+            continue
+        change = r["median_s"] / max(old["median_s"], 1e-9) - 1
+        print(f"{r['case']:<36} {old['median_s'] * 1000:>12.1f} {r['median_s'] * 1000:>12.1f} {change:>+10.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=DEFAULT_DSN, help="libpq DSN of a local benchmark database (or BENCH_DSN)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="sales_data rows to generate and import")
+    parser.add_argument("--members", type=int, default=1_000_000, help="Split CV member rows")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--skip-import", action="store_true", help="reuse sales_data already in the database")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced run per case")
+    parser.add_argument("--skip-startup", action="store_true", help="skip the cold import / first render cases")
+    parser.add_argument("--output", help="result JSON (default: benchmarks/results/bench_<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier result JSON to compare median timings with")
+    args = parser.parse_args()
+
+    started = datetime.datetime.now()
+    conn = connect(args.dsn)
+    with conn.cursor() as cur:
+        cur.execute("SHOW server_version;")
+        server_version = cur.fetchone()[0]
+    conn.rollback()
+
+    csv_path = None
+    try:
+        if not args.skip_import:
+            fd, csv_path = tempfile.mkstemp(suffix=".csv", prefix="bench_sales_")
+            os.close(fd)
+            start = time.perf_counter()
+            size = write_sales_csv(csv_path, args.rows, seed=args.seed)
+            print(f"📦 {args.rows:,} baris sales ({size / 1024 / 1024:,.1f} MB) dibuat dalam "
+                  f"{time.perf_counter() - start:.1f} detik\n")
+        results = run_suite(conn, args, csv_path)
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT COUNT(*) FROM {SOURCE_TABLE};")
+            sales_rows = cur.fetchone()[0]
+    finally:
+        conn.close()
+        if csv_path:
+            os.remove(csv_path)
+
+    report = {
+        "meta": {
+            "started_at": started.isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "sales_rows": sales_rows,
+            "member_rows": args.members,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "postgres": server_version,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{started:%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\n💾 Hasil disimpan ke {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Synthetic data for benchmarks: sales_data CSV files and Split CV member workbooks.
+
+Sales rows follow the schema of the real sales_data export (trcd, createdt,
+batchdt, bnsperiod, loccd, kodeProduk, namaProduk, totalQty_contrib, tdp).
+Products and locations are Zipf-skewed, so a few best sellers and big
+locations dominate like in production. Output is generated in chunks and is
+reproducible for a given seed; tens of millions of rows never have to be in
+memory at once.
+
+Run from the repository root:
+    python benchmarks/datagen.py sales --rows 1000000 --out /tmp/sales_1m.csv
+    python benchmarks/datagen.py members --rows 100000 --out /tmp/members.xlsx --id-share 0.7
+"""
+import argparse
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SALES_COLUMNS = [
+    "trcd", "createdt", "batchdt", "bnsperiod", "loccd", "kodeProduk", "namaProduk", "totalQty_contrib", "tdp"
+]
+PRODUCT_COUNT = 200
+LOCATION_COUNT = 40
+PRODUCT_SKEW = 1.1         # eksponen Zipf: makin besar makin timpang
+LOCATION_SKEW = 0.8
+START_DATE = "2024-01-01"
+DAYS = 730
+CHUNK_ROWS = 500_000
+SEED = 42
+
+_WEEKDAY_WEIGHTS = np.array([1.0, 1.0, 1.0, 1.05, 1.2, 1.4, 0.7])   # Senin .. Minggu
+
+
+def zipf_weights(n, skew):
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+
+def product_catalog(n=PRODUCT_COUNT):
+    """[(kodeProduk, namaProduk)], e.g. ("P0001", "Produk 0001")."""
+    return [(f"P{i:04d}", f"Produk {i:04d}") for i in range(1, n + 1)]
+
+
+def location_codes(n=LOCATION_COUNT):
+    cities = ["JKT", "BDG", "SBY", "MDN", "MKS", "DPS", "KUL", "PEN", "JHB", "SMG"]
+    return [f"{cities[i % len(cities)]}{i // len(cities) + 1:02d}" for i in range(n)]
+
+
+def _date_weights(start, days):
+    dates = pd.date_range(start, periods=days, freq="D")
+    weights = _WEEKDAY_WEIGHTS[dates.dayofweek]
+    # Lonjakan akhir bulan (tutup periode bonus)
+    weights = weights * np.where(dates.day >= 25, 1.5, 1.0)
+    # Pertumbuhan pelan sepanjang periode
+    weights = weights * np.linspace(0.8, 1.2, days)
+    return dates, weights / weights.sum()
+
+
+def sales_chunks(rows, chunk_rows=CHUNK_ROWS, seed=SEED, products=PRODUCT_COUNT, locations=LOCATION_COUNT,
+                 start=START_DATE, days=DAYS):
+    """Yield DataFrames with SALES_COLUMNS, chunk_rows at a time, until rows rows are generated."""
+    catalog = product_catalog(products)
+    codes = np.array([p[0] for p in catalog])
+    names = np.array([p[1] for p in catalog])
+    locs = np.array(location_codes(locations))
+    product_p = zipf_weights(products, PRODUCT_SKEW)
+    location_p = zipf_weights(locations, LOCATION_SKEW)
+    dates, date_p = _date_weights(start, days)
+    # String tanggal dihitung sekali per hari, bukan per baris (+2 hari untuk batchdt)
+    day_text = np.array(pd.date_range(start, periods=days + 2, freq="D").strftime("%Y-%m-%d"), dtype=object)
+    period_text = np.array(dates.strftime("%Y-%m-01"), dtype=object)
+
+    for offset in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - offset)
+        rng = np.random.default_rng([seed, offset])
+        created = rng.choice(days, n, p=date_p)
+        product = rng.choice(products, n, p=product_p)
+        qty = 1 + rng.poisson(1.5, n)
+        yield pd.DataFrame({
+            "trcd": np.char.add("TR", (np.arange(offset, offset + n) + 1).astype(str)),
+            "createdt": day_text[created],
+            "batchdt": day_text[created + rng.integers(0, 3, n)],
+            "bnsperiod": period_text[created],
+            "loccd": locs[rng.choice(locations, n, p=location_p)],
+            "kodeProduk": codes[product],
+            "namaProduk": names[product],
+            "totalQty_contrib": qty,
+            "tdp": (qty * rng.uniform(50, 500, n)).round(2),
+        })
+
+
+def write_sales_csv(path, rows, sep=";", **kwargs):
+    """Write rows synthetic sales rows to a CSV file. Returns the file size in bytes."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for i, chunk in enumerate(sales_chunks(rows, **kwargs)):
+            chunk.to_csv(f, sep=sep, index=False, header=i == 0)
+    return os.path.getsize(path)
+
+
+def member_frame(rows, id_share=0.65, my_share=0.3, seed=SEED):
+    """
+    Split CV member data with an ID/MY country mix.
+
+    The remaining share is split between dirty spellings of ID/MY (lower
+    case, padded), other countries and empty cells, which all exercise
+    the normalization and default-country rules.
+    """
+    other = max(1.0 - id_share - my_share, 0.0)
+    countries = ["ID", "MY", "id ", " My", "SG", None]
+    p = np.array([id_share, my_share, other * 0.4, other * 0.3, other * 0.2, other * 0.1])
+    rng = np.random.default_rng(seed)
+    cv_plan_a = rng.gamma(2.0, 5_000, rows).round(0)
+    cv_ro = rng.gamma(1.5, 3_000, rows).round(0)
+    balance = rng.integers(0, 10_000, rows).astype("float64")
+    return pd.DataFrame({
+        "MEMBER ID": np.char.add("MEM", np.char.zfill(np.arange(rows).astype(str), 8)),
+        "MEMBER NAME": np.char.add("Member ", np.arange(rows).astype(str)),
+        "COUNTRY": rng.choice(np.array(countries, dtype=object), rows, p=p / p.sum()),
+        "CV PLAN A": cv_plan_a,
+        "CV RO": cv_ro,
+        "TOTAL CV C/F": cv_plan_a + cv_ro,
+        "BALANCE C/F": balance,
+        "GRAND TOTAL": cv_plan_a + cv_ro + balance,
+    })
+
+
+def write_member_workbook(path, rows, **kwargs):
+    """Write a member workbook (.xlsx, .csv or .parquet by extension). Returns the file size in bytes."""
+    from exporter import export_dataframe
+
+    fmt = os.path.splitext(path)[1].lower().lstrip(".")
+    export = export_dataframe(member_frame(rows, **kwargs), fmt=fmt, sheet_name="Members")
+    shutil.move(export["path"], path)
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="kind", required=True)
+
+    sales = sub.add_parser("sales", help="sales_data CSV")
+    sales.add_argument("--rows", type=int, default=1_000_000)
+    sales.add_argument("--out", required=True)
+    sales.add_argument("--products", type=int, default=PRODUCT_COUNT)
+    sales.add_argument("--locations", type=int, default=LOCATION_COUNT)
+    sales.add_argument("--days", type=int, default=DAYS)
+    sales.add_argument("--seed", type=int, default=SEED)
+
+    members = sub.add_parser("members", help="Split CV member workbook (.xlsx/.csv/.parquet)")
+    members.add_argument("--rows", type=int, default=100_000)
+    members.add_argument("--out", required=True)
+    members.add_argument("--id-share", type=float, default=0.65)
+    members.add_argument("--my-share", type=float, default=0.3)
+    members.add_argument("--seed", type=int, default=SEED)
+
+    args = parser.parse_args()
+    if args.kind == "sales":
+        size = write_sales_csv(
+            args.out, args.rows, products=args.products, locations=args.locations, days=args.days, seed=args.seed
+        )
+    else:
+        size = write_member_workbook(
+            args.out, args.rows, id_share=args.id_share, my_share=args.my_share, seed=args.seed
+        )
+    print(f"{args.rows:,} baris ditulis ke {args.out} ({size / 1024 / 1024:,.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Data reduction for Plotly charts.
+
+A figure carries every point it is given to the browser as JSON, so a wide
+report filter can produce megabytes per chart. Two reductions keep the
+payload bounded regardless of the result size:
+
+- time series are downsampled with LTTB (Largest-Triangle-Three-Buckets),
+  which keeps peaks, dips and the overall shape with a fixed point count;
+- categorical charts keep the top N categories and sum the rest into one
+  "Lainnya" bucket.
+
+Plotly itself is imported lazily through plotly_express(), so pages only pay
+for it when they actually draw a chart.
+"""
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+HAS_PLOTLY = importlib.util.find_spec("plotly") is not None
+
+MAX_POINTS = 300
+TOP_N = 15
+OTHERS_LABEL = "Lainnya"
+
+
+def _numeric_axis(x):
+    """x as float64 for the triangle areas: dates as epoch ns, unparseable values as position."""
+    if pd.api.types.is_numeric_dtype(x):
+        return x.to_numpy(dtype="float64")
+    parsed = pd.to_datetime(x, errors="coerce")
+    if parsed.notna().all():
+        return parsed.to_numpy(dtype="datetime64[ns]").astype("int64").astype("float64")
+    return np.arange(len(x), dtype="float64")
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Positions of the points kept by LTTB when reducing (x, y) to threshold points.
+
+    x and y are float arrays sorted by x. The first and last point are
+    always kept; every bucket in between keeps the point that forms the
+    largest triangle with the previous kept point and the next bucket's mean.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    # Titik di antara titik pertama & terakhir dibagi rata ke threshold - 2 bucket
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+def downsample(df, x, y, max_points=MAX_POINTS, group=None):
+    """
+    Reduce df to at most max_points rows per series with LTTB.
+
+    The series is df sorted by x, or one series per value of group. Rows
+    with an empty x or y are dropped. Returns a new frame with the kept rows.
+    """
+    if group is None:
+        series = [df]
+    else:
+        series = [part for _, part in df.groupby(group, sort=False, observed=True)]
+
+    kept = []
+    for part in series:
+        part = part.dropna(subset=[x, y]).sort_values(x)
+        if len(part) > max_points:
+            idx = lttb_indices(_numeric_axis(part[x]), part[y].to_numpy(dtype="float64"), max_points)
+            part = part.iloc[idx]
+        kept.append(part)
+    if not kept:
+        return df.iloc[0:0]
+    return pd.concat(kept, ignore_index=True)
+
+
+def top_categories(df, column, value, n=TOP_N):
+    """The n values of column with the largest total value, largest first."""
+    totals = df.groupby(column, observed=True)[value].sum()
+    return totals.nlargest(n).index.tolist()
+
+
+def bucket_others(df, column, value, n=TOP_N, others_label=OTHERS_LABEL, keys=()):
+    """
+    Keep the top n values of column and sum every other value into others_label.
+
+    keys are additional grouping columns (e.g. the date of a trend or the
+    location of a product × location matrix); the result has one row per
+    keys × bucketed column with value summed. Frames that already fit are
+    returned unchanged.
+    """
+    if df[column].nunique(dropna=False) <= n:
+        return df
+    top = top_categories(df, column, value, n)
+    bucketed = df[[*keys, column, value]].copy()
+    bucketed[column] = bucketed[column].astype(object).where(bucketed[column].isin(top), others_label)
+    result = bucketed.groupby([*keys, column], sort=False, observed=True)[value].sum().reset_index()
+    # Urutan: kategori teratas dulu, "Lainnya" paling akhir
+    order = {name: i for i, name in enumerate(top + [others_label])}
+    result = result.sort_values(list(keys) + [column], key=lambda s: s.map(order) if s.name == column else s)
+    return result.reset_index(drop=True)
+
+
+def plotly_express():
+    """plotly.express, imported on first use (the import alone takes a noticeable part of a cold page load)."""
+    import plotly.express as px
+    return px
+
+
+def figure_bytes(fig):
+    """Size of the JSON Plotly sends to the browser for fig."""
+    return len(fig.to_json().encode("utf-8"))
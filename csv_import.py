@@ -0,0 +1,152 @@
+"""
+Streaming CSV → PostgreSQL import.
+
+The file is never decoded or parsed as a whole: the encoding and delimiter
+are sniffed from a small sample, pandas' C engine parses fixed-size chunks,
+and every chunk is sent straight to COPY ... FROM STDIN. Memory use stays at
+roughly one chunk regardless of the file size.
+"""
+import codecs
+import csv
+import io
+import time
+
+import pandas as pd
+
+from db import quote_ident
+from schema_infer import coerce_chunk, write_rejects
+
+SAMPLE_BYTES = 256 * 1024
+CHUNK_ROWS = 50_000
+CANDIDATE_DELIMITERS = ",;\t|"
+
+
+def _file_size(raw):
+    pos = raw.tell()
+    raw.seek(0, io.SEEK_END)
+    size = raw.tell()
+    raw.seek(pos)
+    return size
+
+
+def detect_encoding(sample):
+    """Best-effort encoding detection on a byte sample."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # Sample bisa terpotong di tengah karakter multibyte → buang baris terakhir
+        sample[: sample.rfind(b"\n") + 1 or len(sample)].decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def detect_delimiter(text):
+    try:
+        return csv.Sniffer().sniff(text, delimiters=CANDIDATE_DELIMITERS).delimiter
+    except csv.Error:
+        return ","
+
+
+def sniff_csv(raw, sample_bytes=SAMPLE_BYTES):
+    """
+    Inspect the head of a binary file-like object.
+
+    Returns a dict with encoding, delimiter, columns, a small preview frame and
+    the total size in bytes. The file position is reset to the start.
+    """
+    raw.seek(0)
+    sample = raw.read(sample_bytes)
+    raw.seek(0)
+
+    encoding = detect_encoding(sample)
+    text = sample.decode(encoding, errors="replace")
+    # Hanya baris utuh yang dipakai untuk sniffing dan preview
+    if len(sample) == sample_bytes and "\n" in text:
+        text = text[: text.rfind("\n") + 1]
+    delimiter = detect_delimiter(text)
+
+    preview = pd.read_csv(io.StringIO(text), sep=delimiter, engine="c", dtype=str, nrows=1000)
+    return {
+        "encoding": encoding,
+        "delimiter": delimiter,
+        "columns": list(preview.columns),
+        "preview": preview,
+        "size_bytes": _file_size(raw),
+    }
+
+
+def read_csv_chunks(raw, encoding, delimiter, chunksize=CHUNK_ROWS):
+    """Iterate over the file as DataFrames of at most chunksize rows (all str)."""
+    raw.seek(0)
+    return pd.read_csv(
+        raw,
+        sep=delimiter,
+        engine="c",
+        dtype=str,
+        encoding=encoding,
+        encoding_errors="replace",
+        chunksize=chunksize,
+    )
+
+
+def copy_chunk(cur, table_name, columns, chunk):
+    """COPY one DataFrame chunk into table_name using CSV format."""
+    buffer = io.StringIO()
+    chunk.to_csv(buffer, header=False, index=False)
+    buffer.seek(0)
+    column_list = ", ".join(quote_ident(c) for c in columns)
+    cur.copy_expert(
+        f"COPY {quote_ident(table_name)} ({column_list}) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def stream_csv_to_table(conn, raw, table_name, columns, encoding, delimiter,
+                        chunksize=CHUNK_ROWS, progress=None, schema=None, on_chunk=None, rejects_for=None,
+                        before_copy=None):
+    """
+    Stream a CSV file into an existing table in one transaction.
+
+    With a schema (see schema_infer), every chunk is coerced to the column
+    types first and rows that fail are written to <table>_rejects, where
+    <table> is rejects_for (e.g. the target of a staging load) or table_name.
+
+    progress(stats) is called after every chunk with a dict containing rows,
+    bytes, total_bytes, seconds, rows_per_sec and mb_per_sec. on_chunk(chunk)
+    receives every loaded chunk, e.g. to collect the dates that were touched;
+    before_copy(chunk) runs before a chunk is copied (e.g. to create the
+    partitions it needs). Returns the final stats dict.
+    """
+    total_bytes = _file_size(raw)
+    start = time.perf_counter()
+    stats = {"rows": 0, "rejected": 0, "bytes": 0, "total_bytes": total_bytes, "chunks": 0}
+
+    with conn.cursor() as cur:
+        for chunk in read_csv_chunks(raw, encoding, delimiter, chunksize):
+            chunk.columns = columns
+            if schema:
+                chunk, rejects = coerce_chunk(chunk, schema)
+                if rejects is not None:
+                    write_rejects(cur, rejects_for or table_name, rejects)
+                    stats["rejected"] += len(rejects)
+            if before_copy:
+                before_copy(chunk)
+            copy_chunk(cur, table_name, columns, chunk)
+            if on_chunk:
+                on_chunk(chunk)
+
+            elapsed = max(time.perf_counter() - start, 1e-9)
+            stats["rows"] += len(chunk)
+            stats["chunks"] += 1
+            stats["bytes"] = min(raw.tell(), total_bytes)
+            stats["seconds"] = elapsed
+            stats["rows_per_sec"] = stats["rows"] / elapsed
+            stats["mb_per_sec"] = stats["bytes"] / elapsed / 1024 / 1024
+            if progress:
+                progress(stats)
+    conn.commit()
+
+    stats["bytes"] = total_bytes
+    stats["seconds"] = time.perf_counter() - start
+    return stats
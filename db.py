@@ -0,0 +1,229 @@
+"""
+Shared database layer for all pages.
+
+Every page gets its Neon PostgreSQL connections from one process-wide
+ThreadedConnectionPool instead of calling psycopg2.connect() on every rerun,
+so the TLS handshake is paid once per pooled connection.
+
+Usage:
+    from db import get_connection
+
+    with get_connection() as conn:
+        df = pd.read_sql("SELECT 1", conn)
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import streamlit as st
+from psycopg2 import pool as pg_pool
+
+from instrumentation import span
+
+# Default pool settings, can be overridden in secrets (connections.neon)
+POOL_MIN_CONN = 1
+POOL_MAX_CONN = 10
+CHECKOUT_TIMEOUT = 30      # detik menunggu slot kosong sebelum error
+HEALTH_CHECK_IDLE = 60     # ping koneksi yang sudah idle lebih dari N detik
+CHECKOUT_RETRIES = 3       # maks. koneksi basi yang dibuang per checkout
+
+
+@st.cache_resource(show_spinner=False)
+def get_db_settings():
+    """connections.neon from Streamlit secrets as a plain dict, parsed once per process."""
+    return dict(st.secrets["connections"]["neon"])
+
+
+def get_db_config():
+    """Connection kwargs for psycopg2 taken from Streamlit secrets."""
+    db = get_db_settings()
+    return {
+        "host": db["host"],
+        "database": db["database"],
+        "user": db["user"],
+        "password": db["password"],
+        "port": db["port"],
+        "sslmode": db.get("sslmode", "require"),
+    }
+
+
+class DatabasePool:
+    """
+    Thin wrapper around ThreadedConnectionPool that adds:
+    - blocking checkout (ThreadedConnectionPool raises when exhausted)
+    - health check + reconnect of stale sockets
+    - usage statistics (checkouts, wait time, open connections)
+    """
+
+    def __init__(self, config, minconn=POOL_MIN_CONN, maxconn=POOL_MAX_CONN,
+                 checkout_timeout=CHECKOUT_TIMEOUT, health_check_idle=HEALTH_CHECK_IDLE):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.checkout_timeout = checkout_timeout
+        self.health_check_idle = health_check_idle
+
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self._open = 0
+        self._pool = pg_pool.ThreadedConnectionPool(minconn, maxconn, connection_factory=self._connect, **config)
+
+        self._stats = {
+            "checkouts": 0,
+            "in_use": 0,
+            "max_in_use": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "health_checks": 0,
+            "reconnects": 0,
+            "errors": 0,
+        }
+
+    def _connect(self, *args, **kwargs):
+        """connection_factory for the pool: a new connection counts as just used, so it is not pinged."""
+        conn = psycopg2.extensions.connection(*args, **kwargs)
+        with self._lock:
+            self._last_used[id(conn)] = time.monotonic()
+            self._open += 1
+        return conn
+
+    def _discarded(self, conn):
+        with self._lock:
+            self._last_used.pop(id(conn), None)
+            self._open -= 1
+
+    # 🩺 Health check
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+
+        with self._lock:
+            idle = time.monotonic() - self._last_used.get(id(conn), 0.0)
+        if idle < self.health_check_idle:
+            return True
+
+        with self._lock:
+            self._stats["health_checks"] += 1
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise pg_pool.PoolError(
+                f"Tidak ada koneksi tersedia setelah {self.checkout_timeout} detik "
+                f"(max {self.maxconn} koneksi)."
+            )
+        waited = time.monotonic() - start
+
+        try:
+            for _ in range(CHECKOUT_RETRIES):
+                conn = self._pool.getconn()
+                if self._is_healthy(conn):
+                    break
+                # 🔁 Socket basi (mis. Neon auto-suspend) → buang dan coba koneksi berikutnya
+                self._pool.putconn(conn, close=True)
+                self._discarded(conn)
+                with self._lock:
+                    self._stats["reconnects"] += 1
+            else:
+                raise pg_pool.PoolError(
+                    f"Tidak ada koneksi sehat setelah {CHECKOUT_RETRIES} percobaan."
+                )
+        except Exception:
+            self._slots.release()
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._stats["max_in_use"] = max(self._stats["max_in_use"], self._stats["in_use"])
+            self._stats["wait_time_total"] += waited
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+        return conn
+
+    def putconn(self, conn, close=False):
+        try:
+            self._pool.putconn(conn, close=close or bool(conn.closed))
+            # Pool juga menutup koneksi sendiri bila sudah ada minconn koneksi idle
+            if conn.closed:
+                self._discarded(conn)
+            else:
+                with self._lock:
+                    self._last_used[id(conn)] = time.monotonic()
+        finally:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+
+    def stats(self):
+        """Snapshot of pool statistics as a plain dict."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["open_connections"] = self._open
+        checkouts = stats["checkouts"] or 1
+        stats["wait_time_avg"] = stats["wait_time_total"] / checkouts
+        stats["idle_connections"] = max(stats["open_connections"] - stats["in_use"], 0)
+        stats["min_connections"] = self.minconn
+        stats["max_connections"] = self.maxconn
+        return stats
+
+    def closeall(self):
+        self._pool.closeall()
+        with self._lock:
+            self._last_used.clear()
+            self._open = 0
+
+
+@st.cache_resource(show_spinner=False)
+def get_pool():
+    """Process-wide pool, created once and shared by every session and page."""
+    db = get_db_settings()
+    return DatabasePool(
+        get_db_config(),
+        minconn=int(db.get("pool_min", POOL_MIN_CONN)),
+        maxconn=int(db.get("pool_max", POOL_MAX_CONN)),
+    )
+
+
+@contextmanager
+def get_connection():
+    """
+    Borrow a pooled connection.
+
+    The connection goes back to the pool when the block exits. Uncommitted
+    work is rolled back; connections broken mid-query are discarded.
+    """
+    db_pool = get_pool()
+    with span("checkout", "db"):
+        conn = db_pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except Exception:
+        try:
+            if not conn.closed:
+                conn.rollback()
+        except psycopg2.Error:
+            broken = True
+        raise
+    finally:
+        db_pool.putconn(conn, close=broken or bool(conn.closed))
+
+
+def pool_stats():
+    """Current statistics of the shared pool."""
+    return get_pool().stats()
+
+
+def quote_ident(name):
+    """Quote a table/column name for use in SQL, e.g. kodeProduk -> "kodeProduk"."""
+    return '"' + str(name).replace('"', '""') + '"'
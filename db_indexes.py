@@ -0,0 +1,215 @@
+"""
+Recommended indexes for the reporting tables and helpers to inspect them.
+
+Indexes are built with CREATE INDEX CONCURRENTLY so imports and reports keep
+running while an index is being created. PostgreSQL cannot build an index on
+a partitioned table concurrently; there a plain CREATE INDEX is used, which
+creates the index on every partition.
+
+Date columns that are still TEXT are filtered through
+sql_filters.TEXT_DATE_FUNCTION; the "text_date" expression indexes match
+those filters and are only recommended for TEXT columns.
+"""
+import pandas as pd
+
+from db import get_connection, quote_ident
+from query_cache import cached_call
+from sql_filters import NATIVE_DATE_TYPES, TEXT_DATE_FUNCTION, TEXT_DATE_FUNCTION_SQL, text_date_expr
+
+# 📚 Index yang direkomendasikan per tabel laporan
+RECOMMENDED_INDEXES = {
+    "sales_data": [
+        # B-tree untuk filter di laporan Sales by Location
+        {"name": "idx_sales_data_createdt", "method": "btree", "columns": ["createdt"]},
+        {"name": "idx_sales_data_batchdt", "method": "btree", "columns": ["batchdt"]},
+        {"name": "idx_sales_data_bnsperiod", "method": "btree", "columns": ["bnsperiod"]},
+        {"name": "idx_sales_data_loccd", "method": "btree", "columns": ["loccd"]},
+        {"name": "idx_sales_data_produk", "method": "btree", "columns": ["kodeProduk", "namaProduk"]},
+        # BRIN: sangat kecil, cocok untuk kolom tanggal yang naik seiring waktu import
+        {"name": "brin_sales_data_createdt", "method": "brin", "columns": ["createdt"]},
+        {"name": "brin_sales_data_batchdt", "method": "brin", "columns": ["batchdt"]},
+        # Kolom tanggal TEXT: expression index yang sama persis dengan filter laporan
+        {"name": "idx_sales_data_createdt_text_date", "method": "btree", "columns": ["createdt"],
+         "expression": "text_date"},
+        {"name": "idx_sales_data_batchdt_text_date", "method": "btree", "columns": ["batchdt"],
+         "expression": "text_date"},
+        {"name": "idx_sales_data_bnsperiod_text_date", "method": "btree", "columns": ["bnsperiod"],
+         "expression": "text_date"},
+        # Composite yang menutup GROUP BY laporan (index-only scan)
+        {
+            "name": "idx_sales_data_report_grain",
+            "method": "btree",
+            "columns": ["bnsperiod", "createdt", "loccd", "kodeProduk", "namaProduk"],
+            "include": ["totalQty_contrib"],
+        },
+    ],
+}
+
+
+def _index_columns(spec):
+    if spec.get("expression") == "text_date":
+        return [f"({text_date_expr(c)})" for c in spec["columns"]]
+    return [quote_ident(c) for c in spec["columns"]]
+
+
+def index_sql(table_name, spec, concurrently=True):
+    columns = ", ".join(_index_columns(spec))
+    sql = (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {quote_ident(spec['name'])} "
+        f"ON {quote_ident(table_name)} USING {spec['method']} ({columns})"
+    )
+    if spec.get("include"):
+        sql += f" INCLUDE ({', '.join(quote_ident(c) for c in spec['include'])})"
+    return sql + ";"
+
+
+def table_columns(conn, table_name):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT column_name, data_type FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = %s
+        """, (table_name,))
+        return dict(cur.fetchall())
+
+
+def ensure_text_date_function(conn):
+    """Create sql_filters.TEXT_DATE_FUNCTION if it does not exist yet (commits)."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regproc(%s) IS NOT NULL;", (TEXT_DATE_FUNCTION,))
+        if not cur.fetchone()[0]:
+            cur.execute(TEXT_DATE_FUNCTION_SQL)
+    conn.commit()
+
+
+def cached_text_date_function(table_name):
+    """ensure_text_date_function() once per version of table_name, for pages that filter TEXT dates."""
+    def load():
+        with get_connection() as conn:
+            ensure_text_date_function(conn)
+        return True
+    return cached_call("text_date_function", load, tables=[table_name])
+
+
+def list_indexes(conn, table_name=None):
+    """
+    Existing indexes with size, validity and usage (pg_stat_user_indexes).
+
+    Indexes of partitioned tables are listed once, with size and usage
+    summed over the per-partition indexes.
+    """
+    query = """
+        SELECT t.relname AS table_name,
+               c.relname AS index_name,
+               pg_size_pretty(tree.size_bytes) AS size,
+               tree.size_bytes,
+               tree.idx_scan,
+               tree.idx_tup_read,
+               tree.idx_tup_fetch,
+               i.indisvalid AS is_valid,
+               pg_get_indexdef(i.indexrelid) AS definition
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        CROSS JOIN LATERAL (
+            -- Index biasa: dirinya sendiri; index terpartisi: semua index partisinya
+            SELECT COALESCE(SUM(pg_relation_size(s.indexrelid)), 0)::bigint AS size_bytes,
+                   SUM(s.idx_scan)::bigint AS idx_scan,
+                   SUM(s.idx_tup_read)::bigint AS idx_tup_read,
+                   SUM(s.idx_tup_fetch)::bigint AS idx_tup_fetch
+            FROM pg_stat_user_indexes s
+            WHERE s.indexrelid = i.indexrelid
+               OR s.indexrelid IN (SELECT relid FROM pg_partition_tree(i.indexrelid))
+        ) tree
+        WHERE n.nspname = 'public' AND NOT c.relispartition
+    """
+    params = []
+    if table_name:
+        query += " AND t.relname = %s"
+        params.append(table_name)
+    query += " ORDER BY t.relname, c.relname;"
+    return pd.read_sql(query, conn, params=params)
+
+
+def recommendation_status(conn, table_name):
+    """
+    Recommended indexes for table_name with their current state:
+    'exists', 'missing', 'invalid' (failed concurrent build), 'missing columns'
+    or 'not needed' (text_date index on a DATE/TIMESTAMP column).
+    """
+    columns = table_columns(conn, table_name)
+    existing = list_indexes(conn, table_name).set_index("index_name")
+
+    rows = []
+    for spec in RECOMMENDED_INDEXES.get(table_name, []):
+        needed = spec["columns"] + spec.get("include", [])
+        text_date = spec.get("expression") == "text_date"
+        if not all(c in columns for c in needed):
+            status = "missing columns"
+        elif text_date and all(columns[c] in NATIVE_DATE_TYPES for c in spec["columns"]):
+            # Kolom DATE/TIMESTAMP sudah di-filter langsung lewat index biasa
+            status = "not needed"
+        elif spec["name"] not in existing.index:
+            status = "missing"
+        elif not existing.at[spec["name"], "is_valid"]:
+            status = "invalid"
+        else:
+            status = "exists"
+        text_columns = [c for c in spec["columns"] if columns.get(c) == "text" and not text_date]
+        rows.append({
+            "index_name": spec["name"],
+            "method": spec["method"],
+            "columns": ", ".join(
+                f"{TEXT_DATE_FUNCTION}({c})" if text_date else c for c in spec["columns"]
+            ),
+            "status": status,
+            "note": f"TEXT columns: {', '.join(text_columns)}" if text_columns else "",
+        })
+    return pd.DataFrame(rows)
+
+
+def create_index(conn, table_name, spec):
+    """
+    Create one index concurrently; an invalid leftover is dropped first.
+
+    On a partitioned table the index is built with a plain CREATE INDEX.
+    """
+    previous = conn.autocommit
+    conn.commit()
+    # CONCURRENTLY tidak boleh berjalan di dalam transaksi
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT NOT i.indisvalid
+                FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+                WHERE c.relname = %s
+            """, (spec["name"],))
+            row = cur.fetchone()
+            cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s);", (quote_ident(table_name),))
+            partitioned = cur.fetchone() == ("p",)
+            if row and row[0]:
+                cur.execute(
+                    f"DROP INDEX {'' if partitioned else 'CONCURRENTLY '}IF EXISTS {quote_ident(spec['name'])};"
+                )
+            if spec.get("expression") == "text_date":
+                ensure_text_date_function(conn)
+            cur.execute(index_sql(table_name, spec, concurrently=not partitioned))
+    finally:
+        conn.autocommit = previous
+
+
+def create_recommended_indexes(conn, table_name, names=None, progress=None):
+    """Create the recommended indexes (optionally only `names`) that are missing."""
+    status = recommendation_status(conn, table_name).set_index("index_name")["status"]
+    created = []
+    for spec in RECOMMENDED_INDEXES.get(table_name, []):
+        if names is not None and spec["name"] not in names:
+            continue
+        if status.get(spec["name"]) not in ("missing", "invalid"):
+            continue
+        if progress:
+            progress(spec)
+        create_index(conn, table_name, spec)
+        created.append(spec["name"])
+    return created
@@ -0,0 +1,251 @@
+"""
+File exports that never hold the whole result in memory.
+
+Query results are streamed from PostgreSQL with COPY (...) TO STDOUT into a
+temp file (plain or gzip CSV); Parquet is converted from that CSV block by
+block with pyarrow. In-memory DataFrames (e.g. Split CV results) are written
+in chunks, and .xlsx uses openpyxl's write-only mode. Pages serve the
+download straight from the file and show size and throughput.
+"""
+import gzip
+import os
+import tempfile
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "streamlit_exports")
+EXPORT_MAX_AGE = 3600           # detik; file export lebih tua dari ini dihapus
+COPY_BUFFER = 1024 * 1024       # ukuran blok COPY TO STDOUT
+CHUNK_ROWS = 50_000             # baris per chunk saat menulis DataFrame
+GZIP_LEVEL = 5                  # level 9 (default gzip) ~5x lebih lambat untuk selisih ukuran kecil
+
+FORMATS = {
+    "csv": {"label": "CSV", "ext": ".csv", "mime": "text/csv"},
+    "csv.gz": {"label": "CSV (gzip)", "ext": ".csv.gz", "mime": "application/gzip"},
+    "parquet": {"label": "Parquet", "ext": ".parquet", "mime": "application/vnd.apache.parquet"},
+    "xlsx": {
+        "label": "Excel (.xlsx)", "ext": ".xlsx",
+        "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    },
+}
+
+# OID tipe PostgreSQL → tipe Arrow; tipe lain diekspor sebagai string
+_PG_ARROW_TYPES = {
+    16: "bool_", 20: "int64", 21: "int64", 23: "int64",
+    700: "float64", 701: "float64", 1082: "date32", 1114: "timestamp",
+}
+_NUMERIC_OID = 1700
+
+
+def available_formats(include_xlsx=False):
+    """Format keys usable in this environment (Parquet needs pyarrow)."""
+    formats = ["csv", "csv.gz"]
+    if HAS_PYARROW:
+        formats.append("parquet")
+    if include_xlsx:
+        formats.insert(0, "xlsx")
+    return formats
+
+
+def cleanup_exports(max_age=EXPORT_MAX_AGE):
+    """Delete export files older than max_age seconds."""
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def new_export_path(ext):
+    """Empty temp file in EXPORT_DIR (removed by cleanup_exports once it is old)."""
+    cleanup_exports()
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=ext, dir=EXPORT_DIR)
+    os.close(fd)
+    return path
+
+
+def _open_output(path, mode, gzipped=False, **kwargs):
+    if gzipped:
+        return gzip.open(path, mode, compresslevel=GZIP_LEVEL, **kwargs)
+    return open(path, mode, **kwargs)
+
+
+class _CountingWriter:
+    """File wrapper that counts bytes written and reports them to progress."""
+
+    def __init__(self, f, progress=None):
+        self._f = f
+        self._progress = progress
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+        if self._progress:
+            self._progress(self.bytes)
+        return self._f.write(data)
+
+
+def _stats(path, fmt, rows, start, data_bytes=None):
+    # Throughput dihitung dari data CSV yang diproses, bukan ukuran file terkompresi
+    seconds = time.perf_counter() - start
+    size = os.path.getsize(path)
+    return {
+        "path": path,
+        "format": fmt,
+        "rows": rows,
+        "bytes": size,
+        "seconds": seconds,
+        "rows_per_sec": rows / max(seconds, 1e-9),
+        "mb_per_sec": (data_bytes or size) / max(seconds, 1e-9) / 1024 / 1024,
+        "ext": FORMATS[fmt]["ext"],
+        "mime": FORMATS[fmt]["mime"],
+    }
+
+
+def _arrow_types(cur, sql, params):
+    """Arrow column types of the query result, from a zero-row execution."""
+    cur.execute(f"SELECT * FROM ({sql}) AS export_query LIMIT 0", params)
+    types = {}
+    for column in cur.description:
+        if column.type_code == _NUMERIC_OID:
+            # NUMERIC(p, s) tetap presisi; NUMERIC tanpa batas menjadi float64
+            bounded = column.precision is not None and 1 <= column.precision <= 38
+            types[column.name] = pa.decimal128(column.precision, column.scale) if bounded else pa.float64()
+        elif column.type_code in _PG_ARROW_TYPES:
+            name = _PG_ARROW_TYPES[column.type_code]
+            types[column.name] = pa.timestamp("us") if name == "timestamp" else getattr(pa, name)()
+        else:
+            types[column.name] = pa.string()
+    return types
+
+
+def _csv_to_parquet(csv_path, parquet_path, column_types):
+    """Convert a COPY CSV file to Parquet one block at a time."""
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(block_size=COPY_BUFFER * 8),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=column_types,
+            true_values=["t"],
+            false_values=["f"],
+            strings_can_be_null=True,
+            # COPY menulis NULL sebagai kosong tanpa kutip, string kosong sebagai ""
+            quoted_strings_can_be_null=False,
+        ),
+    )
+    with pq.ParquetWriter(parquet_path, reader.schema, compression="snappy") as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+
+
+def export_query(conn, sql, params=None, fmt="csv", progress=None):
+    """
+    Stream the result of sql into an export file.
+
+    progress(bytes) is called as CSV data arrives from the server. Returns a
+    dict with path, format, rows, bytes (file size), seconds, rows_per_sec,
+    mb_per_sec, ext and mime.
+    """
+    if fmt not in ("csv", "csv.gz", "parquet"):
+        raise ValueError(f"Format export tidak didukung: {fmt}")
+    if fmt == "parquet" and not HAS_PYARROW:
+        raise RuntimeError("Export Parquet membutuhkan paket pyarrow.")
+
+    sql = sql.strip().rstrip(";")
+    start = time.perf_counter()
+    path = new_export_path(FORMATS[fmt]["ext"])
+
+    with conn.cursor() as cur:
+        copy_sql = cur.mogrify(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", params).decode()
+        column_types = _arrow_types(cur, sql, params) if fmt == "parquet" else None
+        csv_path = new_export_path(".csv") if fmt == "parquet" else path
+
+        with _open_output(csv_path, "wb", gzipped=fmt == "csv.gz") as f:
+            writer = _CountingWriter(f, progress)
+            cur.copy_expert(copy_sql, writer, size=COPY_BUFFER)
+        rows = cur.rowcount
+    conn.rollback()
+
+    if fmt == "parquet":
+        try:
+            _csv_to_parquet(csv_path, path, column_types)
+        finally:
+            os.remove(csv_path)
+    return _stats(path, fmt, rows, start, data_bytes=writer.bytes)
+
+
+def _write_xlsx(df, path, sheet_name, progress=None):
+    from openpyxl import Workbook
+
+    # Mode write-only menulis baris langsung ke file tanpa menyimpan semua sel
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    ws.append([str(c) for c in df.columns])
+    for start in range(0, len(df), CHUNK_ROWS):
+        chunk = df.iloc[start:start + CHUNK_ROWS].astype(object)
+        for row in chunk.where(chunk.notna(), None).itertuples(index=False, name=None):
+            ws.append(row)
+        if progress:
+            progress(min(start + CHUNK_ROWS, len(df)))
+    wb.save(path)
+
+
+def export_dataframe(df, fmt="csv", sheet_name="Sheet1", progress=None):
+    """
+    Write an in-memory DataFrame to an export file in chunks.
+
+    progress(rows_written) is called after each chunk. Returns the same dict
+    as export_query().
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format export tidak didukung: {fmt}")
+    if fmt == "parquet" and not HAS_PYARROW:
+        raise RuntimeError("Export Parquet membutuhkan paket pyarrow.")
+
+    start = time.perf_counter()
+    path = new_export_path(FORMATS[fmt]["ext"])
+
+    if fmt == "xlsx":
+        _write_xlsx(df, path, sheet_name, progress)
+    elif fmt == "parquet":
+        df.to_parquet(path, index=False, engine="pyarrow")
+    else:
+        with _open_output(path, "wt", gzipped=fmt == "csv.gz", encoding="utf-8", newline="") as f:
+            for chunk_start in range(0, len(df), CHUNK_ROWS) or [0]:
+                df.iloc[chunk_start:chunk_start + CHUNK_ROWS].to_csv(f, index=False, header=chunk_start == 0)
+                if progress:
+                    progress(min(chunk_start + CHUNK_ROWS, len(df)))
+    return _stats(path, fmt, len(df), start)
+
+
+def describe_export(stats):
+    """One-line summary such as '1,234 baris · 2.1 MB · 0.4 detik (5.2 MB/detik)'."""
+    return (
+        f"{stats['rows']:,} baris · {stats['bytes'] / 1024 / 1024:,.1f} MB · "
+        f"{stats['seconds']:.1f} detik ({stats['mb_per_sec']:,.1f} MB/detik, "
+        f"{stats['rows_per_sec']:,.0f} baris/detik)"
+    )
+
+
+def deferred_file(path):
+    """
+    data= callable for st.download_button: the file is only opened when the
+    button is clicked, not on every rerun that renders the button, and is
+    handed to Streamlit as an open binary file instead of a bytes copy.
+    """
+    def open_file():
+        return open(path, "rb")
+    return open_file
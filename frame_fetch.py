@@ -0,0 +1,160 @@
+"""
+Compact DataFrames for query results.
+
+pd.read_sql first builds every row as a Python tuple and then infers object
+columns, so a report of a few hundred thousand rows repeats the same
+location, product and date strings as separate Python objects. fetch_frame
+reads the result through a server-side cursor in batches and converts every
+batch right away; after the last batch the columns are compacted:
+
+- DATE/TIMESTAMP values and ISO date text (TEXT tables) → datetime64,
+- NUMERIC (Decimal) → float64 when every value survives the round trip
+  (then an integer when every value is whole); otherwise the Decimal
+  values are kept,
+- integers → int32 when the range fits,
+- strings → Arrow-backed strings, and low-cardinality keys (loccd,
+  kodeProduk, bnsperiod, ...) → category.
+
+Consumers group with observed=True so categorical keys only produce the
+combinations that exist. Callers that need the values exactly as the
+database returned them (e.g. keyset cursors) pass compact=False.
+"""
+import datetime
+import decimal
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from sql_executor import clean_sql, uses_server_cursor
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+FETCH_BATCH_ROWS = 50_000
+CATEGORY_MIN_ROWS = 1_000
+CATEGORY_MAX_RATIO = 0.5      # kategori bila nilai unik ≤ 50% jumlah baris
+ISO_DATE_PATTERN = r"\d{4}-\d{2}-\d{2}"
+
+_INT32 = np.iinfo(np.int32)
+
+
+def _first_value(values):
+    present = values.dropna()
+    return present.iloc[0] if len(present) else None
+
+
+def _float_is_exact(value):
+    # repr() = representasi desimal terpendek dari float; sama → tidak ada presisi yang hilang
+    return decimal.Decimal(repr(float(value))) == value
+
+
+def _convert_batch_column(values):
+    """Per-batch conversion of Python objects psycopg2 returns (dates, str)."""
+    if values.dtype != object:
+        return values
+    first = _first_value(values)
+    if isinstance(first, (datetime.date, datetime.datetime)):
+        try:
+            return pd.to_datetime(values)
+        except (TypeError, ValueError):
+            # mis. timestamptz dengan offset berbeda-beda: biarkan sebagai objek
+            return values
+    # Decimal dibiarkan mentah: konversi ke float64 diputuskan sekali untuk seluruh kolom
+    # di compact_column, agar batch tidak bercampur float & Decimal
+    if isinstance(first, str) and HAS_PYARROW:
+        return values.astype("string[pyarrow]")
+    return values
+
+
+def _is_string(values):
+    return pd.api.types.is_string_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype)
+
+
+def _decimal_to_float(values):
+    """float64 copy of a Decimal column when every value survives the round trip, else values."""
+    present = values.dropna()
+    if all(isinstance(v, decimal.Decimal) and v.is_finite() and _float_is_exact(v) for v in present.unique()):
+        return pd.to_numeric(values, errors="coerce").astype("float64")
+    return values
+
+
+def compact_column(values):
+    """Smallest dtype that keeps every value of a fetched column."""
+    if values.dtype == object and isinstance(_first_value(values), decimal.Decimal):
+        values = _decimal_to_float(values)
+    if pd.api.types.is_float_dtype(values):
+        present = values.dropna()
+        if len(present) == len(values) and len(values) and (present == present.round()).all():
+            values = values.astype("int64")
+    if pd.api.types.is_integer_dtype(values) and len(values):
+        # int32 cukup untuk qty/ID; tidak turun ke int8/int16 agar SUM/cumsum tidak overflow
+        if _INT32.min <= values.min() and values.max() <= _INT32.max:
+            return values.astype("int32")
+        return values
+
+    if not _is_string(values) or not len(values):
+        return values
+    present = values.dropna()
+    if len(present) and present.str.fullmatch(ISO_DATE_PATTERN).all():
+        parsed = pd.to_datetime(values, format="%Y-%m-%d", errors="coerce")
+        if parsed.notna().sum() == len(present):
+            return parsed
+    if len(values) >= CATEGORY_MIN_ROWS and values.nunique() <= CATEGORY_MAX_RATIO * len(values):
+        return values.astype("category")
+    return values
+
+
+def compact_frame(df):
+    """Copy of df with every column passed through compact_column()."""
+    return pd.DataFrame({col: compact_column(df[col]) for col in df.columns}, index=df.index)
+
+
+def fetch_frame(conn, sql, params=None, batch_rows=FETCH_BATCH_ROWS, compact=True):
+    """
+    Run sql and return its result as a compact DataFrame.
+
+    SELECT-like statements are read through a named cursor, batch_rows rows
+    at a time. df.attrs["memory"] holds raw_bytes (the batches as fetched)
+    and bytes (the final frame).
+    """
+    sql = clean_sql(sql)
+    cursor_name = f"fetch_{uuid.uuid4().hex}" if uses_server_cursor(sql) else None
+    batches = []
+    raw_bytes = 0
+    columns = []
+    with conn.cursor(name=cursor_name) if cursor_name else conn.cursor() as cur:
+        if cursor_name:
+            cur.itersize = batch_rows
+            # DECLARE merencanakan untuk 10% baris pertama (fast-start plan);
+            # semua baris akan diambil, jadi rencanakan untuk seluruh hasil
+            with conn.cursor() as setter:
+                setter.execute("SET LOCAL cursor_tuple_fraction = 1.0;")
+        cur.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(batch_rows) if (cursor_name or cur.description) else []
+            if cur.description:
+                columns = [d[0] for d in cur.description]
+            if not rows:
+                break
+            batch = pd.DataFrame.from_records(rows, columns=columns)
+            del rows
+            if compact:
+                raw_bytes += int(batch.memory_usage(index=False, deep=True).sum())
+                batch = pd.DataFrame({col: _convert_batch_column(batch[col]) for col in batch.columns})
+            batches.append(batch)
+
+    if batches:
+        df = pd.concat(batches, ignore_index=True) if len(batches) > 1 else batches[0]
+    else:
+        df = pd.DataFrame(columns=columns)
+    if compact:
+        df = compact_frame(df)
+        df.attrs["memory"] = {
+            "raw_bytes": raw_bytes,
+            "bytes": int(df.memory_usage(index=False, deep=True).sum()),
+        }
+    return df
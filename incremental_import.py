@@ -0,0 +1,199 @@
+"""
+Incremental (upsert) import through an unlogged staging table.
+
+The file is COPYed into an UNLOGGED copy of the target table, then merged
+on a natural key chosen by the user (e.g. trcd + kodeProduk):
+
+- rows whose key does not exist in the target are inserted,
+- rows whose key exists with different values update the target,
+- identical rows are skipped.
+
+The merge joins through a B-tree index on the key columns, so a daily load
+costs work proportional to the new file rather than to the whole history.
+Within one load the last row per key wins, by file order and then row
+order (recorded in the staging table, since parallel COPY gives the rows no
+defined physical order); rows with an empty key are skipped.
+"""
+import hashlib
+import uuid
+
+import pandas as pd
+
+from db import quote_ident
+from db_indexes import create_index
+
+STAGING_SUFFIX = "__staging"
+# Urutan baris di staging: nomor file (diisi saat COPY paralel) lalu nomor baris
+FILE_SEQ_COLUMN = "__import_file"
+ROW_SEQ_COLUMN = "__import_row"
+KEY_CANDIDATES = [["trcd", "kodeProduk"], ["trcd"], ["MEMBER ID"]]
+
+
+def suggest_key_columns(columns):
+    """First KEY_CANDIDATES entry fully present in columns, or []."""
+    for candidate in KEY_CANDIDATES:
+        if all(c in columns for c in candidate):
+            return candidate
+    return []
+
+
+def key_index_spec(table_name, key_columns):
+    """Index spec (see db_indexes) for the natural key of table_name."""
+    name = f"idx_{table_name}_key_{'_'.join(key_columns)}"
+    if len(name) > 63:      # batas panjang identifier PostgreSQL
+        digest = hashlib.md5(name.encode()).hexdigest()[:8]
+        name = f"idx_{table_name[:40]}_key_{digest}"
+    return {"name": name, "method": "btree", "columns": list(key_columns)}
+
+
+def ensure_key_index(conn, table_name, key_columns):
+    """Create the key index concurrently if it is missing (built once, on the first incremental load)."""
+    create_index(conn, table_name, key_index_spec(table_name, key_columns))
+
+
+def create_staging_table(conn, table_name):
+    """
+    Empty UNLOGGED copy of table_name (columns and defaults, no indexes) plus
+    FILE_SEQ_COLUMN and ROW_SEQ_COLUMN. Returns its name.
+    """
+    staging = f"{table_name}{STAGING_SUFFIX}_{uuid.uuid4().hex[:8]}"
+    with conn.cursor() as cur:
+        cur.execute(
+            f"CREATE UNLOGGED TABLE {quote_ident(staging)} ("
+            f"LIKE {quote_ident(table_name)} INCLUDING DEFAULTS, "
+            f"{quote_ident(FILE_SEQ_COLUMN)} INTEGER NOT NULL DEFAULT 0, "
+            f"{quote_ident(ROW_SEQ_COLUMN)} BIGINT GENERATED ALWAYS AS IDENTITY);"
+        )
+    conn.commit()
+    return staging
+
+
+def drop_staging_table(conn, staging):
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {quote_ident(staging)};")
+    conn.commit()
+
+
+def _key_match(key_columns, left="t", right="s"):
+    return " AND ".join(f"{left}.{quote_ident(c)} = {right}.{quote_ident(c)}" for c in key_columns)
+
+
+def merge_staging(conn, staging, table_name, columns, key_columns, returning=None, track_previous=None):
+    """
+    Merge staging into table_name on key_columns, in one transaction.
+
+    columns are the loaded (file) columns; only those are inserted/updated.
+    returning optionally names columns of the inserted and updated rows to
+    summarize (e.g. for the dimension tables): their distinct values with a
+    row_count, grouped in SQL so the rows themselves never leave the server.
+    For updated rows the values they had before the update are summarized
+    too (replaced_counts), so counts keyed on them can be moved over.
+    track_previous names a value column (e.g. createdt) whose old values are
+    collected from the rows an update changes, so aggregates keyed on it
+    can be refreshed for the value a row moved away from. Returns a dict
+    with staged, inserted, updated, skipped, duplicates (earlier rows of a
+    key repeated in the file), null_keys, inserted_counts, updated_counts,
+    replaced_counts and previous_values.
+    """
+    missing = [c for c in key_columns if c not in columns]
+    if not key_columns or missing:
+        raise ValueError(f"Kolom key tidak ada di file: {missing or '(kosong)'}")
+
+    stg = quote_ident(staging)
+    target = quote_ident(table_name)
+    keys = ", ".join(quote_ident(c) for c in key_columns)
+    column_list = ", ".join(quote_ident(c) for c in columns)
+    value_columns = [c for c in columns if c not in key_columns]
+
+    stats = {"inserted_counts": None, "updated_counts": None, "replaced_counts": None, "previous_values": []}
+    returned = ", ".join(quote_ident(c) for c in returning or [])
+
+    def fetch_counts(cur):
+        return pd.DataFrame(cur.fetchall(), columns=returning + ["row_count"])
+
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COUNT(*) FROM {stg};")
+        stats["staged"] = cur.fetchone()[0]
+
+        null_check = " OR ".join(f"{quote_ident(c)} IS NULL" for c in key_columns)
+        cur.execute(f"DELETE FROM {stg} WHERE {null_check};")
+        stats["null_keys"] = cur.rowcount
+
+        # Key yang muncul berulang: baris terakhir (file terakhir, lalu baris terakhir) yang dipakai
+        sequence = f"{quote_ident(FILE_SEQ_COLUMN)} DESC, {quote_ident(ROW_SEQ_COLUMN)} DESC"
+        cur.execute(f"""
+            DELETE FROM {stg} WHERE ctid IN (
+                SELECT ctid FROM (
+                    SELECT ctid, row_number() OVER (PARTITION BY {keys} ORDER BY {sequence}) AS rn
+                    FROM {stg}
+                ) ranked WHERE rn > 1
+            );
+        """)
+        stats["duplicates"] = cur.rowcount
+
+        # Statistik staging yang kecil → planner memilih nested loop lewat index key
+        cur.execute(f"ANALYZE {stg};")
+
+        stats["updated"] = 0
+        if value_columns:
+            assignments = ", ".join(f"{quote_ident(c)} = s.{quote_ident(c)}" for c in value_columns)
+            target_values = ", ".join(f"t.{quote_ident(c)}" for c in value_columns)
+            staged_values = ", ".join(f"s.{quote_ident(c)}" for c in value_columns)
+            if track_previous in value_columns:
+                # Nilai lama sebelum di-update (RETURNING hanya memberi nilai baru)
+                tracked = quote_ident(track_previous)
+                cur.execute(f"""
+                    SELECT DISTINCT t.{tracked}
+                    FROM {target} AS t JOIN {stg} AS s ON {_key_match(key_columns)}
+                    WHERE t.{tracked} IS DISTINCT FROM s.{tracked};
+                """)
+                stats["previous_values"] = [row[0] for row in cur.fetchall()]
+            changed = f"ROW({target_values}) IS DISTINCT FROM ROW({staged_values})"
+            update_sql = f"""
+                UPDATE {target} AS t SET {assignments}
+                FROM {stg} AS s
+                WHERE {_key_match(key_columns)} AND {changed}
+            """
+            if returning:
+                # Nilai lama & baru dari baris yang di-update, agar dimensi ikut pindah ke nilai baru
+                target_returned = ", ".join(f"t.{quote_ident(c)}" for c in returning)
+                cur.execute(f"""
+                    SELECT {target_returned}, COUNT(*) AS row_count
+                    FROM {target} AS t JOIN {stg} AS s ON {_key_match(key_columns)}
+                    WHERE {changed}
+                    GROUP BY {target_returned};
+                """)
+                stats["replaced_counts"] = fetch_counts(cur)
+                cur.execute(f"""
+                    WITH updated AS ({update_sql} RETURNING {target_returned})
+                    SELECT {returned}, COUNT(*) AS row_count FROM updated GROUP BY {returned};
+                """)
+                stats["updated_counts"] = fetch_counts(cur)
+                stats["updated"] = int(stats["updated_counts"]["row_count"].sum())
+            else:
+                cur.execute(update_sql + ";")
+                stats["updated"] = cur.rowcount
+
+        insert_sql = f"""
+            INSERT INTO {target} ({column_list})
+            SELECT {column_list} FROM {stg} AS s
+            WHERE NOT EXISTS (SELECT 1 FROM {target} AS t WHERE {_key_match(key_columns)})
+        """
+        if returning:
+            # Ringkasan dihitung di server: yang dikirim hanya kombinasi unik + jumlahnya
+            cur.execute(f"""
+                WITH inserted AS ({insert_sql} RETURNING {returned})
+                SELECT {returned}, COUNT(*) AS row_count FROM inserted GROUP BY {returned};
+            """)
+            stats["inserted_counts"] = fetch_counts(cur)
+            stats["inserted"] = int(stats["inserted_counts"]["row_count"].sum())
+        else:
+            cur.execute(insert_sql + ";")
+            stats["inserted"] = cur.rowcount
+    conn.commit()
+
+    valid = stats["staged"] - stats["null_keys"] - stats["duplicates"]
+    # Bila target sudah berisi key ganda, satu baris file bisa meng-update beberapa baris
+    stats["skipped"] = max(valid - stats["inserted"] - stats["updated"], 0)
+    return stats
@@ -0,0 +1,322 @@
+"""
+Lightweight performance instrumentation shared by all pages.
+
+Spans (timed blocks) and counters are kept in an in-process ring buffer and,
+when enabled, flushed to the perf_metrics table. Each record carries the page
+and script run it belongs to, so the Diagnostics page can show latency
+percentiles per page and per query.
+
+Usage:
+    from instrumentation import page_done, span, track_page
+
+    track_page("5_dashboard")
+    with span("top_products", "query") as s:
+        df = ...
+        s["rows"] = len(df)
+    page_done()
+
+Cold start is recorded once per process under the "startup" category:
+"imports" is the time from this module's first import until the first page
+calls track_page(), and "first_render" until its page_done(). Pages import
+streamlit and pandas before this module, so "imports" covers the app's own
+modules and what they pull in (psycopg2, plotly, ...), not streamlit,
+pandas, the interpreter or the Streamlit server startup; the full import
+cost of a page is measured by benchmarks/bench_suite.py in a fresh
+interpreter.
+"""
+import contextvars
+import threading
+import time
+import uuid
+from collections import deque
+
+import pandas as pd
+import streamlit as st
+
+RING_SIZE = 5_000
+METRICS_TABLE = "perf_metrics"
+CATEGORIES = ["page", "startup", "db", "query", "cache_hit", "transform", "figure", "render", "io"]
+RECORD_COLUMNS = ["ts", "page", "run_id", "category", "name", "seconds", "rows", "bytes", "detail", "error"]
+
+# Awal pengukuran startup: import pertama modul ini (streamlit & pandas sudah ter-import)
+_PROCESS_START = time.perf_counter()
+_PROCESS_START_TS = time.time()
+
+_current_run = contextvars.ContextVar("perf_current_run", default=None)
+_startup = {"imports": None, "first_render": None}
+_startup_lock = threading.Lock()
+
+
+class MetricsStore:
+    """Thread-safe ring buffer of metric records plus a queue for persistence."""
+
+    def __init__(self, size=RING_SIZE):
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=size)
+        self._pending = []
+        self.persist = False
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+            if self.persist:
+                self._pending.append(record)
+
+    def take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return pending
+
+    def to_frame(self):
+        with self._lock:
+            records = list(self._records)
+        return pd.DataFrame(records, columns=RECORD_COLUMNS)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._pending.clear()
+
+
+@st.cache_resource(show_spinner=False)
+def get_metrics_store():
+    store = MetricsStore()
+    try:
+        store.persist = bool(st.secrets.get("metrics", {}).get("persist", False))
+    except Exception:
+        pass
+    return store
+
+
+def _emit(category, name, seconds=None, rows=None, nbytes=None, detail=None, error=None, ts=None,
+          attributed=True):
+    run = _current_run.get() if attributed else None
+    get_metrics_store().add({
+        "ts": ts or time.time(),
+        "page": run["page"] if run else None,
+        "run_id": run["run_id"] if run else None,
+        "category": category,
+        "name": name,
+        "seconds": seconds,
+        "rows": rows,
+        "bytes": nbytes,
+        "detail": detail,
+        "error": error,
+    })
+
+
+class span:
+    """
+    Time a block. The yielded dict accepts rows, bytes and detail.
+
+    with span("build_cube", "transform") as s:
+        cube = build_cube(df)
+        s["rows"] = len(df)
+    """
+
+    def __init__(self, name, category="transform", detail=None):
+        self.name = name
+        self.category = category
+        self.attrs = {"rows": None, "bytes": None, "detail": detail}
+
+    def __enter__(self):
+        self._ts = time.time()
+        self._start = time.perf_counter()
+        return self.attrs
+
+    def __exit__(self, exc_type, exc, tb):
+        _emit(
+            self.category, self.name,
+            seconds=time.perf_counter() - self._start,
+            rows=self.attrs["rows"], nbytes=self.attrs["bytes"], detail=self.attrs["detail"],
+            error=exc_type.__name__ if exc_type else None,
+            ts=self._ts,
+        )
+        return False
+
+
+def count(name, category="cache_hit", rows=None, nbytes=None, detail=None):
+    """Record an event without duration (e.g. a cache hit)."""
+    _emit(category, name, rows=rows, nbytes=nbytes, detail=detail)
+
+
+def frame_bytes(df):
+    """Approximate in-memory size of a DataFrame result."""
+    return int(df.memory_usage(index=False, deep=True).sum()) if isinstance(df, pd.DataFrame) else None
+
+
+def _record_startup(name, page):
+    """Emit startup record name once per process (see module docstring)."""
+    with _startup_lock:
+        if _startup[name] is not None:
+            return
+        _startup[name] = time.perf_counter() - _PROCESS_START
+    # Tanpa run_id: startup bukan bagian dari durasi run halaman
+    _emit("startup", name, seconds=_startup[name], detail=page, ts=_PROCESS_START_TS, attributed=False)
+
+
+def track_page(page):
+    """Mark the start of a page run; later spans in this run are attributed to page."""
+    _record_startup("imports", page)
+    run = {"page": page, "run_id": uuid.uuid4().hex[:12], "start": time.perf_counter()}
+    _current_run.set(run)
+    _emit("page", "start")
+
+
+def page_done():
+    """Record the total run time of the current page and flush to the metrics table if enabled."""
+    run = _current_run.get()
+    if run is None:
+        return
+    _emit("page", "total", seconds=time.perf_counter() - run["start"])
+    _record_startup("first_render", run["page"])
+    if get_metrics_store().persist:
+        try:
+            flush_metrics()
+        except Exception:
+            pass    # metrics tidak boleh menggagalkan halaman
+
+
+def copy_context():
+    """Context to run worker-thread tasks in, so their spans keep the page attribution."""
+    return contextvars.copy_context()
+
+
+def flush_metrics():
+    """Write pending records to METRICS_TABLE. Returns the number of rows written."""
+    from psycopg2.extras import execute_values
+
+    from db import get_connection
+
+    pending = get_metrics_store().take_pending()
+    if not pending:
+        return 0
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {METRICS_TABLE} (
+                    ts TIMESTAMPTZ NOT NULL,
+                    page TEXT,
+                    run_id TEXT,
+                    category TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    seconds DOUBLE PRECISION,
+                    rows BIGINT,
+                    bytes BIGINT,
+                    detail TEXT,
+                    error TEXT
+                );
+            """)
+            execute_values(
+                cur,
+                f"INSERT INTO {METRICS_TABLE} ({', '.join(RECORD_COLUMNS)}) VALUES %s",
+                [tuple(r[c] for c in RECORD_COLUMNS) for r in pending],
+                template="(to_timestamp(%s), %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            )
+        conn.commit()
+    return len(pending)
+
+
+def load_metrics(source="buffer", since_hours=24):
+    """Records as a DataFrame from the ring buffer or from METRICS_TABLE."""
+    if source == "buffer":
+        df = get_metrics_store().to_frame()
+        df["ts"] = pd.to_datetime(df["ts"], unit="s", utc=True)
+        return df
+
+    from db import get_connection
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (METRICS_TABLE,))
+            if not cur.fetchone()[0]:
+                return pd.DataFrame(columns=RECORD_COLUMNS)
+            cur.execute(
+                f"SELECT {', '.join(RECORD_COLUMNS)} FROM {METRICS_TABLE} "
+                "WHERE ts >= now() - make_interval(hours => %s) ORDER BY ts;",
+                (int(since_hours),),
+            )
+            return pd.DataFrame(cur.fetchall(), columns=RECORD_COLUMNS)
+
+
+def _percentiles(df, by):
+    grouped = df.groupby(by, dropna=False)["seconds"]
+    result = pd.DataFrame({
+        "runs": grouped.size(),
+        "p50_ms": grouped.quantile(0.5) * 1000,
+        "p95_ms": grouped.quantile(0.95) * 1000,
+        "max_ms": grouped.max() * 1000,
+    })
+    return result.sort_values("p95_ms", ascending=False).reset_index()
+
+
+def page_runs(df):
+    """
+    One row per page run with its duration.
+
+    Uses the explicit 'total' record when the page reached page_done(),
+    otherwise the end of the last span of the run (e.g. after st.stop()).
+    """
+    runs = df[df["run_id"].notna()].copy()
+    if runs.empty:
+        return pd.DataFrame(columns=["page", "run_id", "ts", "seconds"])
+    runs["end"] = runs["ts"] + pd.to_timedelta(runs["seconds"].fillna(0), unit="s")
+    grouped = runs.groupby(["page", "run_id"])
+    result = grouped.agg(ts=("ts", "min"), end=("end", "max"))
+    result["seconds"] = (result["end"] - result["ts"]).dt.total_seconds()
+    totals = runs[(runs["category"] == "page") & (runs["name"] == "total")].set_index(["page", "run_id"])["seconds"]
+    result.loc[totals.index, "seconds"] = totals
+    return result.drop(columns="end").reset_index()
+
+
+def page_latencies(df):
+    """p50/p95/max run time per page."""
+    runs = page_runs(df)
+    if runs.empty:
+        return pd.DataFrame(columns=["page", "runs", "p50_ms", "p95_ms", "max_ms"])
+    return _percentiles(runs, "page")
+
+
+def cache_hit_rate(df):
+    """Share of cached_query/cached_call lookups answered from the query cache."""
+    hits = int((df["category"] == "cache_hit").sum())
+    misses = int(((df["category"] == "query") & (df["name"] == "query")).sum())
+    return hits / max(hits + misses, 1)
+
+
+def span_latencies(df, categories=("query",)):
+    """p50/p95/max per span name (or query text) within the given categories, with volumes."""
+    spans = df[df["category"].isin(categories) & df["seconds"].notna()].copy()
+    if spans.empty:
+        return pd.DataFrame(columns=["category", "name", "runs", "p50_ms", "p95_ms", "max_ms", "rows", "bytes"])
+    spans["name"] = spans["detail"].fillna(spans["name"])
+    result = _percentiles(spans, ["category", "name"])
+    volumes = spans.groupby(["category", "name"], dropna=False)[["rows", "bytes"]].sum(min_count=1).reset_index()
+    return result.merge(volumes, on=["category", "name"], how="left")
+
+
+def slowest(df, n=20):
+    """The n slowest spans (page totals excluded)."""
+    spans = df[df["seconds"].notna() & ~df["category"].isin(["page", "startup"])]
+    return spans.sort_values("seconds", ascending=False).head(n).reset_index(drop=True)
+
+
+def volumes(df):
+    """Rows and bytes moved per page and category."""
+    moved = df[df["rows"].notna() | df["bytes"].notna()]
+    return (
+        moved.groupby(["page", "category"], dropna=False)[["rows", "bytes"]].sum(min_count=1)
+        .reset_index().sort_values("bytes", ascending=False, ignore_index=True)
+    )
+
+
+def startup_records(df):
+    """One row per process start: page of the first run, imports_ms and first_render_ms, newest first."""
+    startup = df[df["category"] == "startup"]
+    if startup.empty:
+        return pd.DataFrame(columns=["ts", "page", "imports_ms", "first_render_ms"])
+    grouped = startup.groupby("ts")
+    result = pd.DataFrame({"page": grouped["detail"].first()})
+    for name in ["imports", "first_render"]:
+        result[f"{name}_ms"] = startup[startup["name"] == name].set_index("ts")["seconds"] * 1000
+    return result.reset_index().sort_values("ts", ascending=False, ignore_index=True)
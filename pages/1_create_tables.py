@@ -1,19 +1,32 @@
 import streamlit as st
-import psycopg2
 
+from db import get_connection
+from instrumentation import page_done, track_page
+from db_indexes import (
+    RECOMMENDED_INDEXES, create_recommended_indexes, list_indexes, recommendation_status
+)
+from query_cache import bump_table_version
+from sales_dimensions import LOCATION_TABLE, PRODUCT_TABLE, rebuild_dimensions
+from sales_partitions import (
+    ARCHIVE_SCHEMA, DEFAULT_SUFFIX, PARTITION_COLUMNS, detach_partition, list_partitions, migrate_to_partitioned,
+    partition_dates, partition_key
+)
+from sales_rollup import ROLLUP_TABLE, SOURCE_TABLE, STATE_TABLE, refresh_rollup, source_supports_rollup
+
+track_page("1_create_tables")
 st.title("🧱 Create Tables in Neon Database")
 
-db = st.secrets["connections"]["neon"]
 
-conn = psycopg2.connect(
-    host=db["host"],
-    database=db["database"],
-    user=db["user"],
-    password=db["password"],
-    port=db["port"],
-    sslmode=db.get("sslmode", "require")
-)
-cur = conn.cursor()
+def flash(section, message):
+    """Keep a success message for the next run (st.rerun() discards what this run rendered)."""
+    st.session_state[f"flash_{section}"] = message
+
+
+def show_flash(section):
+    message = st.session_state.pop(f"flash_{section}", None)
+    if message:
+        st.success(message)
+
 
 create_members = """
 CREATE TABLE IF NOT EXISTS members (
@@ -36,12 +49,151 @@ CREATE TABLE IF NOT EXISTS sales (
 """
 
 try:
-    cur.execute(create_members)
-    cur.execute(create_sales)
-    conn.commit()
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(create_members)
+            cur.execute(create_sales)
+        conn.commit()
     st.success("✅ Tables 'members' and 'sales' created successfully!")
 except Exception as e:
     st.error(f"⚠️ Error: {e}")
-finally:
-    cur.close()
-    conn.close()
+
+# ⚡ Index management untuk tabel laporan
+st.markdown("---")
+st.subheader("⚡ Index Management")
+show_flash("indexes")
+
+try:
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT table_name FROM information_schema.tables
+                WHERE table_schema = 'public' AND table_name = ANY(%s)
+                ORDER BY table_name;
+            """, (list(RECOMMENDED_INDEXES),))
+            known_tables = [t[0] for t in cur.fetchall()]
+
+        if not known_tables:
+            st.info(f"ℹ️ No reporting tables found yet ({', '.join(RECOMMENDED_INDEXES)}). Import data first.")
+        else:
+            table_name = st.selectbox("Reporting table:", known_tables)
+
+            st.markdown("#### 📚 Recommended indexes")
+            status_df = recommendation_status(conn, table_name)
+            st.dataframe(status_df, use_container_width=True, hide_index=True)
+            if (status_df["note"] != "").any():
+                st.warning(
+                    "⚠️ Some filter columns are still TEXT. Date filters on them only use the "
+                    "text_to_date() indexes; the other indexes can't serve them. Re-import with typed "
+                    "columns to benefit fully."
+                )
+
+            missing = status_df.loc[status_df["status"].isin(["missing", "invalid"]), "index_name"].tolist()
+            if missing:
+                selected = st.multiselect("Indexes to create:", missing, default=missing)
+                if st.button("🚀 Create selected indexes (CONCURRENTLY)"):
+                    progress = st.empty()
+                    created = create_recommended_indexes(
+                        conn, table_name, names=selected,
+                        progress=lambda spec: progress.info(f"⏳ Building {spec['name']} ..."),
+                    )
+                    progress.empty()
+                    flash("indexes", f"✅ Created {len(created)} index(es): {', '.join(created) or '-'}")
+                    st.rerun()
+            else:
+                st.success("✅ All recommended indexes are in place.")
+
+        st.markdown("#### 🔎 Existing indexes (pg_stat_user_indexes)")
+        indexes_df = list_indexes(conn)
+        if indexes_df.empty:
+            st.info("No indexes yet.")
+        else:
+            st.dataframe(
+                indexes_df.drop(columns=["size_bytes"]),
+                use_container_width=True,
+                hide_index=True,
+            )
+            unused = indexes_df[(indexes_df["idx_scan"] == 0) & ~indexes_df["index_name"].str.endswith("_pkey")]
+            if not unused.empty:
+                st.caption(f"💤 {len(unused)} index(es) never used since the last stats reset: {', '.join(unused['index_name'])}")
+except Exception as e:
+    st.error(f"⚠️ Error: {e}")
+
+# 🧩 Partisi bulanan sales_data
+st.markdown("---")
+st.subheader(f"🧩 {SOURCE_TABLE} partitioning")
+show_flash("partitions")
+st.caption(
+    "One partition per month of the partition column. Reports only scan the partitions that match "
+    "their date filter when they filter on that column; old months can be detached, archived or "
+    "dropped without a bulk DELETE. New months get their partition automatically during import."
+)
+
+PARTITION_ACTIONS = {
+    "detach": "Detach (keep as standalone table)",
+    "archive": f"Archive (detach and move to schema '{ARCHIVE_SCHEMA}')",
+    "drop": "Drop (delete the partition's rows)",
+}
+
+try:
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (SOURCE_TABLE,))
+            exists = cur.fetchone()[0]
+        key = partition_key(conn, SOURCE_TABLE) if exists else None
+
+        if not exists:
+            # Kolom & tipe mengikuti file yang di-import, jadi tabel dibuat di halaman Import Data
+            st.info(
+                f"ℹ️ '{SOURCE_TABLE}' does not exist yet. Import the first file on the Import Data page and "
+                f"pick a monthly partition column ({', '.join(PARTITION_COLUMNS)}) there; the table is created "
+                "partitioned, with the column types inferred from the file."
+            )
+        elif not key:
+            st.info(f"ℹ️ '{SOURCE_TABLE}' exists and is not partitioned.")
+            column = st.selectbox("Partition column:", PARTITION_COLUMNS, key="partition_column_migrate")
+            st.caption(
+                "Migration copies all rows into a new partitioned table and swaps it in within one "
+                "transaction; reports keep reading the old table until it commits. Needs free space "
+                "for a second copy of the table."
+            )
+            if st.button(f"🔄 Migrate '{SOURCE_TABLE}' to partitions"):
+                progress = st.empty()
+                result = migrate_to_partitioned(conn, SOURCE_TABLE, column, progress=lambda m: progress.info(f"⏳ {m}"))
+                progress.empty()
+                bump_table_version(SOURCE_TABLE)
+                st.success(
+                    f"✅ {result['rows']:,} rows moved into {len(result['partitions']):,} monthly partitions; "
+                    f"{len(result['indexes'])} index(es) recreated."
+                )
+                if result["skipped_indexes"]:
+                    st.warning(f"⚠️ Indexes not recreated: {', '.join(result['skipped_indexes'])}")
+        else:
+            st.success(f"✅ '{SOURCE_TABLE}' is partitioned by month of '{key[0]}' ({key[1]}).")
+            st.caption(f"Report filters on '{key[0]}' are pruned to the matching partitions.")
+            partitions_df = list_partitions(conn, SOURCE_TABLE)
+            st.dataframe(partitions_df.drop(columns=["size_bytes"]), use_container_width=True, hide_index=True)
+
+            selected = st.multiselect(
+                "Partitions to remove from the table:",
+                [p for p in partitions_df["partition"] if p != SOURCE_TABLE + DEFAULT_SUFFIX],
+            )
+            action = st.radio("Action:", list(PARTITION_ACTIONS), format_func=PARTITION_ACTIONS.get)
+            if st.button("🗄️ Apply", disabled=not selected):
+                has_rollup = source_supports_rollup(conn)
+                touched = set()
+                for partition in selected:
+                    if has_rollup:
+                        touched.update(partition_dates(conn, partition))
+                    detach_partition(conn, SOURCE_TABLE, partition, action)
+                # 📊 Rollup & dimensi mengikuti data yang tersisa
+                if has_rollup:
+                    refresh_rollup(conn, touched)
+                rebuild_dimensions(conn)
+                bump_table_version(SOURCE_TABLE, ROLLUP_TABLE, STATE_TABLE, PRODUCT_TABLE, LOCATION_TABLE)
+                flash("partitions", f"✅ {PARTITION_ACTIONS[action].split(' (')[0]}: {', '.join(selected)}")
+                st.rerun()
+except Exception as e:
+    st.error(f"⚠️ Error: {e}")
+
+page_done()
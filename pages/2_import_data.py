@@ -1,64 +1,407 @@
-import streamlit as st
 import pandas as pd
-import psycopg2
-from io import StringIO
+import streamlit as st
 
+from csv_import import CHUNK_ROWS, sniff_csv, stream_csv_to_table
+from db import get_connection, quote_ident
+from incremental_import import (
+    FILE_SEQ_COLUMN, create_staging_table, drop_staging_table, ensure_key_index, merge_staging,
+    suggest_key_columns
+)
+from instrumentation import page_done, span, track_page
+from parallel_import import (
+    default_workers, import_dir, import_files, list_sources, read_sample, resolve_server_path
+)
+from query_cache import bump_table_version
+from sales_rollup import (
+    ROLLUP_TABLE, SOURCE_TABLE, STATE_TABLE, rebuild_rollup, refresh_rollup, source_supports_rollup
+)
+from sales_dimensions import (
+    LOCATION_TABLE, PRODUCT_TABLE, SUMMARY_COLUMNS, dimensions_exist, merge_summaries, rebuild_dimensions,
+    summarize_chunk, upsert_dimensions
+)
+from sales_partitions import (
+    ISO_DATE_PATTERN, PARTITION_COLUMNS, create_partitioned_table, ensure_partitions, ensure_partitions_from_table,
+    is_text_key, partition_key
+)
+from schema_infer import (
+    TYPE_OPTIONS, create_table_sql, infer_schema, rejects_table_name, schema_from_table, sql_type
+)
+
+track_page("2_import_data")
 st.title("📤 Import CSV Data ke Neon Database")
 
-db = st.secrets["connections"]["neon"]
+IMPORT_MODES = {
+    "append": "➕ Tambah (append)",
+    "replace": "♻️ Ganti tabel (DROP sebelum import)",
+    "incremental": "🔁 Incremental (upsert berdasarkan key)",
+}
+
+# 📁 Sumber file: upload biasa, atau path file besar yang sudah ada di server
+# 📚 Banyak file (mis. satu per lokasi/hari) atau ZIP: parsing & COPY paralel
+MULTI_SOURCE = "Banyak file / ZIP (paralel)"
+source = st.radio("Sumber file:", ["Upload CSV", "Path file di server", MULTI_SOURCE], horizontal=True)
 
-uploaded_file = st.file_uploader("📁 Upload CSV file", type=["csv"])
+# 🔒 File di server hanya boleh dibaca dari folder import ([imports] dir di secrets)
+base_dir = import_dir()
 
-if uploaded_file is not None:
+raw = None
+entries = []
+if source == "Upload CSV":
+    uploaded_file = st.file_uploader("📁 Upload CSV file", type=["csv"])
+    if uploaded_file is not None:
+        raw = uploaded_file
+elif source == "Path file di server":
+    if not base_dir:
+        st.info("ℹ️ Import dari path server belum diaktifkan. Atur `[imports] dir` di secrets.")
+    server_path = st.text_input(
+        "📂 Path file CSV di server:", "", disabled=not base_dir,
+        help=f"Relatif terhadap {base_dir}" if base_dir else None,
+    )
+    if server_path:
+        try:
+            raw = open(resolve_server_path(server_path, base_dir), "rb")
+        except (OSError, ValueError) as e:
+            st.error(f"⚠️ File tidak dapat dibuka: {e}")
+else:
+    uploaded_files = st.file_uploader("📁 Upload file CSV / ZIP", type=["csv", "zip"], accept_multiple_files=True)
+    server_pattern = st.text_input(
+        "📂 Atau folder / pola glob di server (mis. sales/*.csv):", "", disabled=not base_dir,
+        help=f"Relatif terhadap {base_dir}" if base_dir else "Atur [imports] dir di secrets untuk mengaktifkan.",
+    )
     try:
-        # 🧹 Bersihkan karakter newline di dalam file
-        content = uploaded_file.read().decode("utf-8", errors="ignore")
-        cleaned = content.replace("\r", " ").replace("\n\n", "\n")
-        uploaded_file = StringIO(cleaned)
+        entries = list_sources(uploaded_files or [], server_pattern.strip() or None, base_dir)
+    except Exception as e:
+        st.error(f"⚠️ File tidak dapat dibaca: {e}")
+    if entries:
+        # Semua file diasumsikan berformat sama dengan file pertama
+        raw = read_sample(entries[0])
+    elif uploaded_files or server_pattern:
+        st.warning("⚠️ Tidak ada file CSV yang ditemukan.")
 
-        # 📄 Baca file CSV
-        df = pd.read_csv(uploaded_file, sep=None, engine="python")
+if raw is not None:
+    try:
+        # 🔎 Deteksi encoding & delimiter dari sampel kecil saja
+        info = sniff_csv(raw)
+        df_preview = info["preview"]
+        delimiter_label = {"\t": "TAB"}.get(info["delimiter"], info["delimiter"])
 
-        st.success(f"✅ File terbaca dengan {len(df)} baris dan {len(df.columns)} kolom.")
-        st.dataframe(df.head())
+        if entries:
+            st.success(
+                f"✅ {len(entries):,} file terbaca: {len(info['columns'])} kolom, "
+                f"total {sum(e['size'] for e in entries) / 1024 / 1024:,.1f} MB "
+                f"(encoding: {info['encoding']}, delimiter: '{delimiter_label}' dari '{entries[0]['name']}')."
+            )
+        else:
+            st.success(
+                f"✅ File terbaca: {len(info['columns'])} kolom, "
+                f"{info['size_bytes'] / 1024 / 1024:,.1f} MB "
+                f"(encoding: {info['encoding']}, delimiter: '{delimiter_label}')."
+            )
+        st.dataframe(df_preview.head())
 
         table_name = st.text_input("🆕 Nama tabel tujuan di Neon:", "sales_data")
+        import_mode = st.radio("Mode import:", list(IMPORT_MODES), format_func=IMPORT_MODES.get, horizontal=True)
+        replace = import_mode == "replace"
+        incremental = import_mode == "incremental"
+        key_columns = []
+        if incremental:
+            key_columns = st.multiselect(
+                "🔑 Kolom natural key (unik per baris):",
+                info["columns"],
+                default=suggest_key_columns(info["columns"]),
+            )
+            st.caption(
+                "File di-COPY ke tabel staging UNLOGGED lalu digabung ke tabel tujuan: key baru di-insert, "
+                "key yang nilainya berubah di-update, baris yang sama dilewati."
+            )
+        # 🧩 Tabel baru bisa langsung dibuat terpartisi per bulan, dengan tipe kolom dari inferensi di bawah
+        partition_options = [c for c in PARTITION_COLUMNS if c in info["columns"]]
+        new_partition_column = None
+        if partition_options:
+            new_partition_column = st.selectbox(
+                "🧩 Partisi bulanan (hanya untuk tabel baru):",
+                [None] + partition_options,
+                format_func=lambda c: c or "Tanpa partisi",
+                help="Dipakai bila tabel dibuat oleh import ini; tabel yang sudah ada tidak diubah.",
+            )
+        chunksize = st.number_input("📦 Baris per chunk:", min_value=1_000, value=CHUNK_ROWS, step=10_000)
+        if entries:
+            default_processes, default_connections = default_workers(len(entries))
+            col1, col2 = st.columns(2)
+            with col1:
+                processes = st.number_input("⚙️ Proses parsing:", min_value=1, value=default_processes)
+            with col2:
+                connections = st.number_input(
+                    "🔌 Koneksi COPY paralel:", min_value=1, max_value=default_connections, value=default_connections
+                )
+
+        # 🧬 Tipe kolom: hasil inferensi dari sampel, bisa diubah user
+        typed = st.checkbox("🧬 Deteksi tipe kolom otomatis (DATE, INTEGER, NUMERIC, ...)", value=True)
+        schema = None
+        if typed:
+            inferred = infer_schema(df_preview)
+            schema_df = pd.DataFrame({
+                "kolom": list(inferred),
+                "tipe": [spec["type"] for spec in inferred.values()],
+                "panjang": [spec["length"] for spec in inferred.values()],
+                "format": [spec["format"] for spec in inferred.values()],
+                "contoh": [
+                    str(df_preview[c].dropna().iloc[0]) if df_preview[c].notna().any() else ""
+                    for c in inferred
+                ],
+            })
+            edited = st.data_editor(
+                schema_df,
+                column_config={
+                    "kolom": st.column_config.TextColumn(disabled=True),
+                    "tipe": st.column_config.SelectboxColumn(options=TYPE_OPTIONS, required=True),
+                    "panjang": st.column_config.NumberColumn(help="Hanya untuk VARCHAR", min_value=1, max_value=10_000),
+                    "format": st.column_config.TextColumn(help="Format strptime untuk DATE/TIMESTAMP, kosong = otomatis"),
+                    "contoh": st.column_config.TextColumn(disabled=True),
+                },
+                hide_index=True,
+                use_container_width=True,
+                key="schema_editor",
+            )
+            schema = {
+                row.kolom: {
+                    "type": row.tipe,
+                    "length": int(row.panjang) if pd.notna(row.panjang) else None,
+                    "format": row.format or None,
+                }
+                for row in edited.itertuples(index=False)
+            }
+            st.caption(f"Baris yang gagal dikonversi disimpan ke tabel '{rejects_table_name(table_name)}'.")
+
+        if st.button("🚀 Import ke Database", disabled=incremental and not key_columns):
+            columns = info["columns"]
+            column_defs = ", ".join([f"{quote_ident(c)} TEXT" for c in columns])
+
+            progress_bar = st.progress(0.0)
+            status = st.empty()
+
+            def show_progress(stats):
+                progress_bar.progress(min(stats["bytes"] / max(stats["total_bytes"], 1), 1.0))
+                status.info(
+                    f"⏳ {stats['rows']:,} baris | "
+                    f"{stats['rows_per_sec']:,.0f} baris/detik | "
+                    f"{stats['mb_per_sec']:,.1f} MB/detik"
+                )
 
-        if st.button("🚀 Import ke Database"):
-            conn = psycopg2.connect(
-                host=db["host"],
-                database=db["database"],
-                user=db["user"],
-                password=db["password"],
-                port=db["port"],
-                sslmode=db.get("sslmode", "require")
+            with get_connection() as conn:
+                with conn.cursor() as cur:
+                    # 🧹 Hapus tabel lama (opsional replace); tabel terpartisi dibuat ulang terpartisi
+                    replaced_key = None
+                    if replace:
+                        replaced_key = partition_key(conn, table_name)
+                        cur.execute(f"DROP TABLE IF EXISTS {quote_ident(table_name)};")
+                    cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (quote_ident(table_name),))
+                    exists = cur.fetchone()[0]
+
+                    # 🧱 Buat tabel otomatis jika belum ada
+                    if replaced_key and replaced_key[0] in columns:
+                        new_partition_column = replaced_key[0]
+                    if not exists and new_partition_column:
+                        create_partitioned_table(
+                            conn, table_name,
+                            {c: sql_type(spec) for c, spec in schema.items()} if schema
+                            else {c: "TEXT" for c in columns},
+                            new_partition_column,
+                        )
+                    elif schema:
+                        cur.execute(create_table_sql(table_name, schema))
+                    else:
+                        cur.execute(f"CREATE TABLE IF NOT EXISTS {quote_ident(table_name)} ({column_defs});")
+
+                # 🧩 Tabel terpartisi: partisi bulan baru dibuat sebelum datanya di-COPY
+                key = partition_key(conn, table_name)
+                partition_column = key[0] if key and key[0] in columns else None
+
+                if schema:
+                    # Tabel lama dipakai apa adanya → konversi mengikuti tipe yang sudah ada
+                    table_schema = schema_from_table(conn, table_name)
+                    for col, spec in table_schema.items():
+                        if col in schema and schema[col]["type"] == spec["type"]:
+                            spec["format"] = schema[col]["format"]
+                    schema = table_schema
+                    if partition_column and is_text_key(key[1]):
+                        # Kolom partisi TEXT hanya menerima tanggal ISO; baris lain masuk rejects
+                        schema[partition_column]["pattern"] = ISO_DATE_PATTERN
+
+                if entries:
+                    # Koneksi COPY lain harus sudah melihat tabel tujuan
+                    conn.commit()
+
+                # 📅 Catat createdt yang tersentuh untuk refresh rollup harian,
+                # sekaligus ringkasan produk/lokasi untuk tabel dimensi
+                touched_dates = set()
+                dimension_summaries = []
+
+                def collect_chunk(chunk):
+                    if "createdt" in chunk.columns:
+                        touched_dates.update(chunk["createdt"].unique().tolist())
+                    # Mode incremental: dimensi dari baris yang benar-benar di-insert/update (lihat merge)
+                    if not incremental:
+                        dimension_summaries.append(summarize_chunk(chunk))
+
+                # 🔁 Mode incremental: COPY ke staging UNLOGGED dulu, lalu merge berdasarkan key
+                load_table = table_name
+                if incremental:
+                    status.info("⏳ Menyiapkan index key & tabel staging ...")
+                    ensure_key_index(conn, table_name, key_columns)
+                    load_table = create_staging_table(conn, table_name)
+
+                merge = None
+                try:
+                    if entries:
+                        # 📚 Tiap file di-parse di proses terpisah lalu di-COPY lewat koneksinya sendiri
+                        file_table = st.empty()
+
+                        def show_files(files, totals):
+                            done = (files["status"] == "✅ selesai").sum() + totals["failed"]
+                            progress_bar.progress(done / max(totals["files"], 1))
+                            status.info(
+                                f"⏳ {done:,}/{totals['files']:,} file | {totals['rows']:,} baris | "
+                                f"{totals['rows_per_sec']:,.0f} baris/detik | "
+                                f"{totals['mb_per_sec']:,.1f} MB/detik"
+                            )
+                            file_table.dataframe(files, hide_index=True, use_container_width=True)
+
+                        with span("copy_files", "io", detail=table_name) as s:
+                            files, totals = import_files(
+                                entries, load_table, columns,
+                                schema=schema,
+                                chunksize=int(chunksize),
+                                processes=int(processes),
+                                connections=int(connections),
+                                summarize=table_name == SOURCE_TABLE,
+                                rejects_for=table_name,
+                                progress=show_files,
+                                # Staging (incremental) tidak terpartisi; partisi dibuat saat merge
+                                partition_column=None if incremental else partition_column,
+                                # Staging mencatat urutan file agar baris terakhir per key tetap pasti
+                                file_column=FILE_SEQ_COLUMN if incremental else None,
+                            )
+                            s["rows"], s["bytes"] = totals["rows"], totals["bytes"]
+                        touched_dates |= totals["dates"]
+                        if not incremental:
+                            dimension_summaries += totals["summaries"]
+                        stats = {
+                            "rows": totals["rows"],
+                            "rejected": totals["rejected"],
+                            "seconds": totals["seconds"],
+                            "total_bytes": totals["bytes"],
+                        }
+                        if totals["failed"]:
+                            st.warning(
+                                f"⚠️ {totals['failed']:,} dari {totals['files']:,} file gagal di-import "
+                                "(lihat kolom error); file lain tetap masuk."
+                            )
+                    else:
+                        # 🚚 Import data per chunk langsung ke COPY FROM STDIN
+                        with span("copy_csv", "io", detail=table_name) as s:
+                            stats = stream_csv_to_table(
+                                conn, raw, load_table, columns,
+                                encoding=info["encoding"],
+                                delimiter=info["delimiter"],
+                                chunksize=int(chunksize),
+                                progress=show_progress,
+                                schema=schema,
+                                on_chunk=collect_chunk if table_name == SOURCE_TABLE else None,
+                                rejects_for=table_name,
+                                before_copy=(
+                                    lambda chunk: ensure_partitions(conn, table_name, chunk[partition_column].unique())
+                                ) if partition_column and not incremental else None,
+                            )
+                            s["rows"], s["bytes"] = stats["rows"], stats["total_bytes"]
+
+                    if incremental:
+                        status.info(f"⏳ Menggabungkan staging ke '{table_name}' ...")
+                        with span("merge_staging", "db", detail=table_name) as s:
+                            if partition_column:
+                                ensure_partitions_from_table(conn, table_name, load_table)
+                            merge = merge_staging(
+                                conn, load_table, table_name, columns, key_columns,
+                                returning=[c for c in SUMMARY_COLUMNS if c in columns]
+                                if table_name == SOURCE_TABLE else None,
+                                track_previous="createdt" if table_name == SOURCE_TABLE else None,
+                            )
+                            s["rows"] = merge["inserted"] + merge["updated"]
+                        # Baris yang createdt-nya berubah: tanggal lamanya juga perlu refresh rollup
+                        touched_dates.update(merge["previous_values"])
+                        dimension_summaries += merge_summaries(merge)
+                finally:
+                    if incremental:
+                        drop_staging_table(conn, load_table)
+
+                # ♻️ Hasil query yang di-cache untuk tabel ini langsung basi
+                bump_table_version(table_name, rejects_table_name(table_name))
+
+                # 📊 Perbarui rollup harian hanya untuk tanggal yang ter-import
+                rollup_rows = None
+                if table_name == SOURCE_TABLE and source_supports_rollup(conn):
+                    status.info(f"⏳ Memperbarui rollup '{ROLLUP_TABLE}' ...")
+                    with span("refresh_rollup", "transform", detail=ROLLUP_TABLE) as s:
+                        if replace:
+                            rollup_rows = rebuild_rollup(conn)
+                        else:
+                            rollup_rows = refresh_rollup(conn, touched_dates)
+                        s["rows"] = rollup_rows
+                    bump_table_version(ROLLUP_TABLE, STATE_TABLE)
+
+                # 🏷️ Upsert tabel dimensi produk & lokasi untuk dropdown filter
+                dimension_rows = None
+                if table_name == SOURCE_TABLE:
+                    with span("refresh_dimensions", "transform") as s:
+                        if replace or not dimensions_exist(conn):
+                            dimension_rows = rebuild_dimensions(conn)
+                        else:
+                            dimension_rows = upsert_dimensions(conn, dimension_summaries)
+                        s["rows"] = sum(dimension_rows.values())
+                    bump_table_version(PRODUCT_TABLE, LOCATION_TABLE)
+
+            progress_bar.progress(1.0)
+            status.empty()
+            st.success(
+                f"✅ {stats['rows']:,} baris berhasil "
+                f"{'diproses (staging + merge)' if incremental else 'di-import'} ke tabel '{table_name}' "
+                f"dalam {stats['seconds']:.1f} detik "
+                f"({stats['rows'] / max(stats['seconds'], 1e-9):,.0f} baris/detik, "
+                f"{stats['total_bytes'] / max(stats['seconds'], 1e-9) / 1024 / 1024:,.1f} MB/detik)."
             )
-            cur = conn.cursor()
-
-            # 🧱 Buat tabel otomatis jika belum ada
-            columns = ", ".join([f'"{c}" TEXT' for c in df.columns])
-            create_query = f'CREATE TABLE IF NOT EXISTS "{table_name}" ({columns});'
-            cur.execute(create_query)
-            conn.commit()
-
-            # 🧹 Hapus tabel lama (opsional replace)
-            replace = st.checkbox("♻️ Ganti tabel lama (DROP sebelum import)?", value=False)
-            if replace:
-                cur.execute(f'DROP TABLE IF EXISTS "{table_name}";')
-                conn.commit()
-                cur.execute(f'CREATE TABLE "{table_name}" ({columns});')
-                conn.commit()
-
-            # 🚚 Import data
-            output = StringIO()
-            df.to_csv(output, sep='\t', header=False, index=False)
-            output.seek(0)
-            cur.copy_from(output, table_name, null="")
-            conn.commit()
-
-            st.success(f"✅ {len(df)} baris berhasil di-import ke tabel '{table_name}'!")
-            cur.close()
-            conn.close()
+            if merge:
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("🆕 Di-insert", f"{merge['inserted']:,}")
+                with col2:
+                    st.metric("✏️ Di-update", f"{merge['updated']:,}")
+                with col3:
+                    st.metric("⏭️ Dilewati (sama)", f"{merge['skipped']:,}")
+                if merge["duplicates"] or merge["null_keys"]:
+                    st.warning(
+                        f"⚠️ {merge['duplicates']:,} baris dengan key berulang di file (baris terakhir dipakai), "
+                        f"{merge['null_keys']:,} baris dengan key kosong dilewati."
+                    )
+            if rollup_rows is not None:
+                st.info(
+                    f"📊 Rollup '{ROLLUP_TABLE}' diperbarui untuk {len(touched_dates):,} tanggal "
+                    f"({rollup_rows:,} baris agregat)."
+                )
+            if dimension_rows:
+                st.info(
+                    "🏷️ Tabel dimensi diperbarui: "
+                    + ", ".join(f"'{t}' {n:,} anggota" for t, n in dimension_rows.items()) + "."
+                )
+            if stats["rejected"]:
+                st.warning(
+                    f"⚠️ {stats['rejected']:,} baris gagal dikonversi dan disimpan ke tabel "
+                    f"'{rejects_table_name(table_name)}'."
+                )
 
     except Exception as e:
         st.error(f"⚠️ Terjadi error saat import: {e}")
+    finally:
+        if source == "Path file di server":
+            raw.close()
+
+page_done()
@@ -1,26 +1,70 @@
 import streamlit as st
-import pandas as pd
-import psycopg2
 
+from instrumentation import page_done, track_page
+from table_browser import (
+    approx_row_count, fetch_page, key_columns, last_key, list_tables,
+    primary_key_columns, table_columns
+)
+
+track_page("3_view_data")
 st.title("📋 View Data from Database")
-db = st.secrets["connections"]["neon"]
 
-conn = psycopg2.connect(**db)
-cur = conn.cursor()
-cur.execute("""
-    SELECT table_name FROM information_schema.tables
-    WHERE table_schema='public';
-""")
-tables = [t[0] for t in cur.fetchall()]
-cur.close()
+tables = list_tables()
 
 if tables:
     table_choice = st.selectbox("Pilih tabel:", tables)
-    limit = st.slider("Jumlah baris:", 5, 200, 50)
+    columns = table_columns(table_choice)
+    pk = primary_key_columns(table_choice)
+
+    # ⚡ Estimasi jumlah baris dari statistik planner (tanpa COUNT(*))
+    estimate = approx_row_count(table_choice)
+    st.caption(
+        f"≈ {estimate:,} baris (estimasi pg_class.reltuples)" if estimate is not None
+        else "Jumlah baris belum diketahui (tabel belum di-ANALYZE)"
+    )
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        shown_columns = st.multiselect("Kolom ditampilkan:", columns, default=columns)
+    with col2:
+        page_size = st.selectbox("Baris per halaman:", [50, 100, 200, 500, 1000], index=1)
+
+    pk_label = f"Primary key ({', '.join(pk)})" if pk else "Urutan fisik (ctid)"
+    order_choice = st.selectbox("Urutkan berdasarkan:", [pk_label] + [c for c in columns if c not in pk])
+    order_column = None if order_choice == pk_label else order_choice
+    keys = key_columns(table_choice, order_column)
+
+    # 📄 Posisi halaman: stack key baris terakhir tiap halaman sebelumnya
+    browse_key = (table_choice, tuple(keys), page_size)
+    if st.session_state.get("view_data_browse") != browse_key:
+        st.session_state["view_data_browse"] = browse_key
+        st.session_state["view_data_cursors"] = [None]
+    cursors = st.session_state["view_data_cursors"]
 
-    query = f'SELECT * FROM "{table_choice}" LIMIT {limit};'
-    df = pd.read_sql(query, conn)
-    st.dataframe(df)
+    df = fetch_page(table_choice, shown_columns, keys, after=cursors[-1], page_size=page_size)
+
+    col1, col2, col3, col4 = st.columns([1, 1, 1, 3])
+    with col1:
+        if st.button("⏮️ Awal", disabled=len(cursors) == 1):
+            del cursors[1:]
+            st.rerun()
+    with col2:
+        if st.button("⬅️ Sebelumnya", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col3:
+        if st.button("Berikutnya ➡️", disabled=len(df) < page_size):
+            cursors.append(last_key(df, keys))
+            st.rerun()
+    with col4:
+        first_row = (len(cursors) - 1) * page_size + 1
+        st.caption(f"Halaman {len(cursors)} · baris {first_row:,}–{first_row + len(df) - 1:,}")
+
+    if order_column:
+        st.caption(f"Baris dengan '{order_column}' kosong (NULL) tidak ditampilkan.")
+
+    st.dataframe(df[[c for c in shown_columns if c in df.columns]], hide_index=True)
 else:
     st.warning("Belum ada tabel di database.")
-conn.close()
+
+page_done()
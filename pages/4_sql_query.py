@@ -1,17 +1,151 @@
+import os
+
 import streamlit as st
-import pandas as pd
-import psycopg2
 
+from db import get_connection
+from exporter import deferred_file, new_export_path
+from instrumentation import frame_bytes, page_done, span, track_page
+from sql_executor import (
+    DEFAULT_MAX_MB, DEFAULT_MAX_ROWS, DEFAULT_PAGE_SIZE, DEFAULT_TIMEOUT_S,
+    fetch_page, run_cancellable, stream_to_csv
+)
+
+track_page("4_sql_query")
 st.title("🧮 SQL Query Executor")
-db = st.secrets["connections"]["neon"]
 
 query = st.text_area("Tulis query SQL:", "SELECT NOW();")
 
-if st.button("▶️ Jalankan Query"):
+# ⚙️ Batasan eksekusi (query selalu read-only)
+with st.expander("⚙️ Batasan Eksekusi"):
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        timeout_s = st.number_input("Timeout (detik)", min_value=1, max_value=600, value=DEFAULT_TIMEOUT_S)
+    with col2:
+        max_rows = st.number_input("Maks. baris", min_value=1, value=DEFAULT_MAX_ROWS, step=10_000)
+    with col3:
+        max_mb = st.number_input("Maks. MB", min_value=1, value=DEFAULT_MAX_MB)
+    with col4:
+        page_size = st.number_input("Baris per halaman", min_value=10, max_value=10_000, value=DEFAULT_PAGE_SIZE, step=100)
+
+limits = {
+    "timeout_s": int(timeout_s),
+    "max_rows": int(max_rows),
+    "max_bytes": int(max_mb) * 1024 * 1024,
+}
+
+col1, col2 = st.columns([1, 5])
+with col1:
+    run_clicked = st.button("▶️ Jalankan Query")
+with col2:
+    # Klik Cancel memicu rerun → query yang sedang berjalan dibatalkan di server
+    cancel_clicked = st.button("⏹️ Cancel")
+
+
+def discard_exec():
+    """Lupakan eksekusi sebelumnya beserta file CSV sementaranya."""
+    old_exec = st.session_state.pop("sql_exec", None)
+    if old_exec and old_exec.get("csv_export"):
+        remove_export(old_exec["csv_export"])
+    return old_exec
+
+
+def remove_export(export):
+    if os.path.exists(export["path"]):
+        os.remove(export["path"])
+
+
+if run_clicked:
+    discard_exec()
+    st.session_state["sql_exec"] = {"query": query, "page": 0}
+elif cancel_clicked and discard_exec():
+    # Query yang dibatalkan tidak dijalankan ulang pada rerun ini
+    st.info("⏹️ Query dibatalkan.")
+
+sql_exec = st.session_state.get("sql_exec")
+
+if sql_exec:
+    status = st.empty()
+
+    def show_wait(elapsed):
+        status.caption(f"⏳ Query berjalan {elapsed:.1f} detik ... (klik ⏹️ Cancel untuk membatalkan)")
+
+    # Total baris dihitung sekali per eksekusi (dan per batas maks. baris)
+    known_total = sql_exec.get("total_rows") if sql_exec.get("count_limit") == limits["max_rows"] else None
+
     try:
-        conn = psycopg2.connect(**db)
-        df = pd.read_sql(query, conn)
-        st.dataframe(df)
-        conn.close()
+        with span("sql_executor", "query", detail=" ".join(sql_exec["query"].split())) as s:
+            with get_connection() as conn:
+                result = run_cancellable(
+                    conn,
+                    lambda: fetch_page(conn, sql_exec["query"], page=sql_exec["page"], page_size=int(page_size),
+                                       total_rows=known_total, **limits),
+                    show_wait,
+                )
+            s["rows"], s["bytes"] = len(result["df"]), frame_bytes(result["df"])
+        status.empty()
+        sql_exec["total_rows"], sql_exec["count_limit"] = result["total_rows"], limits["max_rows"]
+
+        total_rows = result["total_rows"]
+        total_label = f"≥ {total_rows:,}" if result["capped"] else f"{total_rows:,}"
+        n_pages = max((min(total_rows, limits["max_rows"]) - 1) // int(page_size) + 1, 1)
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Waktu Eksekusi", f"{result['seconds'] * 1000:,.0f} ms")
+        with col2:
+            st.metric("Total Baris", total_label)
+        with col3:
+            st.metric("Halaman", f"{sql_exec['page'] + 1} / {n_pages}")
+
+        if result["capped"]:
+            st.warning(f"⚠️ Hasil dibatasi {limits['max_rows']:,} baris. Naikkan 'Maks. baris' bila perlu.")
+        if result["truncated"]:
+            st.warning(f"⚠️ Halaman dipotong karena melebihi batas {int(max_mb)} MB.")
+
+        st.dataframe(result["df"])
+
+        # 📄 Navigasi halaman (setiap halaman diambil ulang dari server-side cursor)
+        col1, col2, _ = st.columns([1, 1, 4])
+        with col1:
+            if st.button("⬅️ Sebelumnya", disabled=sql_exec["page"] == 0):
+                sql_exec["page"] -= 1
+                st.rerun()
+        with col2:
+            if st.button("Berikutnya ➡️", disabled=sql_exec["page"] + 1 >= n_pages):
+                sql_exec["page"] += 1
+                st.rerun()
+
+        # 💾 Download: hasil di-stream ke file sementara, bukan ditampung di memori
+        if st.button("📥 Siapkan Download CSV"):
+            # Satu file per eksekusi di folder export (cleanup_exports menghapus sisa sesi yang ditinggal);
+            # file lama dihapus saat disiapkan ulang, saat query baru dijalankan atau dibatalkan
+            if sql_exec.get("csv_export"):
+                remove_export(sql_exec.pop("csv_export"))
+            path = new_export_path(".csv")
+            progress = st.empty()
+            with span("download_csv", "io") as s, get_connection() as conn:
+                export = run_cancellable(
+                    conn,
+                    lambda: stream_to_csv(conn, sql_exec["query"], path, **limits),
+                    lambda elapsed: progress.caption(f"⏳ Menulis CSV ... {elapsed:.1f} detik"),
+                )
+                s["rows"], s["bytes"] = export["rows"], export["bytes"]
+            progress.empty()
+            sql_exec["csv_export"] = {**export, "path": path}
+
+        # Tombol download dirender dari session state, jadi tetap ada di rerun berikutnya
+        export = sql_exec.get("csv_export")
+        if export and os.path.exists(export["path"]):
+            st.caption(
+                f"{export['rows']:,} baris, {export['bytes'] / 1024 / 1024:,.1f} MB "
+                f"dalam {export['seconds']:.1f} detik"
+                + (" (dibatasi budget baris/MB)" if export["capped"] else "")
+            )
+            st.download_button(
+                "⬇️ Download CSV", data=deferred_file(export["path"]), file_name="query_result.csv", mime="text/csv"
+            )
     except Exception as e:
+        status.empty()
         st.error(f"⚠️ Error: {e}")
+
+page_done()
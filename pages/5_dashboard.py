@@ -1,75 +1,129 @@
 # pages/5_dashboard.py
+import datetime
+
 import streamlit as st
 import pandas as pd
-import psycopg2
 
-st.title("📈 Sales Dashboard")
-db = st.secrets["connections"]["neon"]
+from chart_reduce import HAS_PLOTLY, plotly_express
+from db_indexes import cached_text_date_function
+from instrumentation import page_done, span, track_page
+from query_cache import cached_query, get_column_types
+from query_runner import run_queries
+from sales_queries import dashboard_bounds_query, dashboard_queries, dashboard_source
+from sales_rollup import ROLLUP_TABLE, SOURCE_TABLE, cached_rollup_state
+from sql_filters import text_date_columns
 
-# Try import plotly, but fallback gracefully if not installed
-try:
-    import plotly.express as px
-    HAS_PLOTLY = True
-except Exception:
-    HAS_PLOTLY = False
+track_page("5_dashboard")
+st.title("📈 Sales Dashboard")
 
-def get_sales_sample(limit=5000):
+def read_sql(query, params=None):
     try:
-        conn = psycopg2.connect(**db)
-        df = pd.read_sql('SELECT * FROM "sales_data" LIMIT %s;', conn, params=(limit,))
-        conn.close()
-        return df
+        return cached_query(query, params=params)
     except Exception as e:
         st.error(f"⚠️ Tidak dapat memuat data dari DB: {e}")
         return pd.DataFrame()
 
-df = get_sales_sample(5000)
 
-if df.empty:
+column_types = get_column_types(SOURCE_TABLE)
+
+if not column_types:
     st.warning("Belum ada data untuk ditampilkan.")
+    st.stop()
+
+# 🧬 Filter tanggal pada kolom TEXT memakai fungsi text_to_date (bisa di-index)
+if text_date_columns(column_types):
+    cached_text_date_function(SOURCE_TABLE)
+
+has_createdt = "createdt" in column_types
+has_produk = "namaProduk" in column_types
+
+# ⚡ Hitungan transaksi bisa diambil dari rollup harian (SUM(row_count))
+count_table, count_expr, use_rollup = dashboard_source(cached_rollup_state())
+
+# 🎯 Kontrol rentang tanggal & limit
+start_date = end_date = None
+if has_createdt:
+    bounds = read_sql(dashboard_bounds_query(column_types, count_table))
+    max_dt = bounds["max_dt"].iloc[0] if not bounds.empty else None
+    min_dt = bounds["min_dt"].iloc[0] if not bounds.empty else None
+    if pd.isna(max_dt):
+        max_dt = min_dt = datetime.date.today()
+    else:
+        # Hasil query berupa Timestamp (kolom tanggal di-parse), date_input butuh date
+        max_dt, min_dt = pd.Timestamp(max_dt).date(), pd.Timestamp(min_dt).date()
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        start_date = st.date_input("Tanggal Mulai", max(min_dt, max_dt - datetime.timedelta(days=90)))
+    with col2:
+        end_date = st.date_input("Tanggal Akhir", max_dt)
+    with col3:
+        top_n = st.slider("Jumlah produk teratas:", 5, 50, 10)
 else:
-    st.write("📊 Data Sampel:")
-    st.dataframe(df.head())
+    top_n = st.slider("Jumlah produk teratas:", 5, 50, 10)
+
+# 📌 Total numerik, transaksi harian & top produk: query independen, dijalankan bersamaan.
+# Semua agregasi dihitung di server; hanya hasil kecil yang dikirim ke pandas
+queries = dashboard_queries(column_types, count_table, count_expr, start_date, end_date, top_n)
 
+results = {}
+for name, result in run_queries(queries).items():
+    if result["error"]:
+        st.error(f"⚠️ Tidak dapat memuat data dari DB: {result['error']}")
+    results[name] = result["df"] if result["df"] is not None else pd.DataFrame()
+totals = results["totals"]
+
+if totals.empty or totals["total_rows"].iloc[0] == 0:
+    st.warning("Belum ada data untuk ditampilkan pada rentang ini.")
+else:
     # Plot transaksi per tanggal (gunakan kolom 'createdt' bila ada)
-    if "createdt" in df.columns:
-        df["createdt_parsed"] = pd.to_datetime(df["createdt"], errors="coerce")
-        daily = df.dropna(subset=["createdt_parsed"]).groupby(df["createdt_parsed"].dt.date).size().reset_index(name="transactions")
-        daily = daily.sort_values("createdt_parsed")
+    if has_createdt:
+        daily = results["daily"]
 
         if not daily.empty:
             if HAS_PLOTLY:
-                fig = px.line(daily, x="createdt_parsed", y="transactions", title="Transaksi per Tanggal")
-                st.plotly_chart(fig, use_container_width=True)
+                with span("fig_daily", "figure"):
+                    # Plotly baru di-import saat grafik pertama dibuat, bukan saat halaman dimuat
+                    fig = plotly_express().line(daily, x="createdt_parsed", y="transactions", title="Transaksi per Tanggal")
+                with span("render_daily", "render"):
+                    st.plotly_chart(fig, use_container_width=True)
             else:
                 # fallback: Streamlit native chart
                 daily_indexed = daily.set_index("createdt_parsed")
                 st.line_chart(daily_indexed["transactions"])
 
     # Top produk terjual (kolom 'namaProduk')
-    if "namaProduk" in df.columns:
-        top = df["namaProduk"].value_counts().head(10).reset_index()
-        top.columns = ["namaProduk", "jumlah"]
+    if has_produk:
+        top = results["top"]
 
         if not top.empty:
-            st.markdown("#### 🔝 Top 10 Produk Terjual")
+            st.markdown(f"#### 🔝 Top {top_n} Produk Terjual")
             if HAS_PLOTLY:
-                fig2 = px.bar(top, x="namaProduk", y="jumlah", title="Top 10 Produk Terjual")
-                st.plotly_chart(fig2, use_container_width=True)
+                with span("fig_top", "figure"):
+                    fig2 = plotly_express().bar(top, x="namaProduk", y="jumlah", title=f"Top {top_n} Produk Terjual")
+                with span("render_top", "render"):
+                    st.plotly_chart(fig2, use_container_width=True)
             else:
                 st.bar_chart(top.set_index("namaProduk")["jumlah"])
 
     # Additional quick stats
     st.markdown("### 📌 Quick Stats")
-    st.metric("Total baris sampel", len(df))
-    if "tdp" in df.columns:
-        try:
-            df["tdp_num"] = pd.to_numeric(df["tdp"], errors="coerce")
-            st.metric("Total TDP (sum sample)", int(df["tdp_num"].sum()))
-        except:
-            pass
-
-    # Show raw SQL sample option
-    with st.expander("🔎 SQL Sample (lihat 50 baris)"):
-        st.code('SELECT * FROM "sales_data" LIMIT 100000;')
-        st.dataframe(df.head(50))
+    stats_cols = st.columns(len(totals.columns))
+    with stats_cols[0]:
+        st.metric("Total baris", f"{int(totals['total_rows'].iloc[0]):,}")
+    for col, stat_col in zip(totals.columns[1:], stats_cols[1:]):
+        value = totals[col].iloc[0]
+        with stat_col:
+            st.metric(f"Total {col.upper() if col == 'tdp' else col}", f"{float(value or 0):,.0f}")
+
+    if use_rollup:
+        st.caption(f"⚡ Hitungan transaksi dari rollup harian '{ROLLUP_TABLE}'")
+
+# Show raw SQL sample option (hanya diambil bila diminta)
+with st.expander("🔎 SQL Sample (lihat 50 baris)"):
+    sample_query = f'SELECT * FROM "{SOURCE_TABLE}" LIMIT 50;'
+    st.code(sample_query)
+    if st.toggle("Tampilkan sampel data"):
+        st.dataframe(read_sql(sample_query))
+
+page_done()
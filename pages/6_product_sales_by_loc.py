@@ -1,47 +1,48 @@
+import os
+
 import streamlit as st
-import pandas as pd
-import psycopg2
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import warnings
 warnings.filterwarnings('ignore')
 
+from db import get_connection
+from db_indexes import cached_text_date_function
+from exporter import FORMATS, available_formats, deferred_file, describe_export, export_query
+from instrumentation import frame_bytes, page_done, span, track_page
+from query_cache import bump_table_version, cached_call, cached_query, get_column_types, get_query_cache
+from query_runner import run_queries
+from chart_reduce import MAX_POINTS, TOP_N, figure_bytes, plotly_express
+from sales_cube import build_cube, chart_frames
+from sales_queries import sales_by_location_query, split_product_display
+from sales_rollup import ROLLUP_TABLE, SOURCE_TABLE, STATE_TABLE, cached_rollup_state, rebuild_rollup
+from sales_dimensions import (
+    LOCATION_TABLE, PRODUCT_TABLE, dimension_counts, location_options_query, product_options_query, rebuild_dimensions
+)
+from sql_executor import explain, render_sql
+from sql_filters import text_date_columns
+
 st.set_page_config(page_title="📊 Sales by Location", layout="wide")
+track_page("6_product_sales_by_loc")
 st.title("📊 Laporan Penjualan per Produk & Lokasi")
 
-db = st.secrets["connections"]["neon"]
+# 🔌 Koneksi database (hasil di-cache, otomatis basi setelah import ke tabel terkait)
+def get_data(query, params=None, tables=None):
+    return cached_query(query, params=params, tables=tables)
 
-# 🔌 Koneksi database
-@st.cache_data
-def get_data(query):
-    conn = psycopg2.connect(
-        host=db["host"],
-        database=db["database"],
-        user=db["user"],
-        password=db["password"],
-        port=db["port"],
-        sslmode=db.get("sslmode", "require")
-    )
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
+# 🧬 Tipe kolom sales_data: tabel hasil import bertipe native tidak perlu cast
+column_types = get_column_types("sales_data")
+# Filter tanggal pada kolom TEXT memakai fungsi text_to_date (bisa di-index)
+if text_date_columns(column_types):
+    cached_text_date_function(SOURCE_TABLE)
 
-# 🔍 Ambil master dropdown untuk produk (gabungan kode + nama)
-produk_df = get_data("""
-    SELECT DISTINCT "kodeProduk", "namaProduk",
-           CONCAT("kodeProduk", ' - ', "namaProduk") as produk_display
-    FROM sales_data 
-    WHERE "kodeProduk" IS NOT NULL AND "namaProduk" IS NOT NULL
-    ORDER BY "kodeProduk"
-""")
-
-loc_df = get_data("""
-    SELECT DISTINCT loccd 
-    FROM sales_data 
-    WHERE loccd IS NOT NULL 
-    ORDER BY loccd
-""")
+# 🔍 Master dropdown produk & lokasi dari tabel dimensi (kecil, diperbarui saat import),
+# diambil bersamaan agar latensi = query terlama, bukan jumlah semuanya
+masters = run_queries({"produk": product_options_query(), "lokasi": location_options_query()})
+for name, result in masters.items():
+    if result["error"]:
+        st.error(f"⚠️ Gagal memuat master {name}: {result['error']}")
+        st.stop()
+produk_df = masters["produk"]["df"]
+loc_df = masters["lokasi"]["df"]
 
 # 📋 Form Filter
 st.subheader("🎯 Filter Data Penjualan")
@@ -78,61 +79,46 @@ with st.form("filter_form"):
 # 📊 Jalankan query hanya setelah submit
 if submitted:
     try:
-        conn = psycopg2.connect(
-            host=db["host"],
-            database=db["database"],
-            user=db["user"],
-            password=db["password"],
-            port=db["port"],
-            sslmode=db.get("sslmode", "require")
+        # Simpan query di session agar pindah tab (rerun) tidak menghilangkan hasil
+        st.session_state["sales_query"] = sales_by_location_query(
+            column_types, date_type, start_date, end_date,
+            products=[split_product_display(produk) for produk in selected_produk],
+            locations=selected_locations,
+            rollup_state=cached_rollup_state(),
         )
+    except Exception as e:
+        st.error(f"❌ Error saat menjalankan query: {e}")
 
-        # Query dasar dengan createdt
-        query = f"""
-            SELECT 
-                bnsperiod,
-                createdt,
-                loccd,
-                "kodeProduk",
-                "namaProduk",
-                SUM("totalQty_contrib"::numeric) AS total_qty
-            FROM sales_data
-            WHERE ("{date_type}"::date) BETWEEN %s AND %s
-        """
-        params = [start_date, end_date]
-
-        # Filter untuk produk (bisa multiple)
-        if selected_produk:
-            produk_conditions = []
-            for produk in selected_produk:
-                kode_produk_selected = produk.split(" - ")[0]
-                nama_produk_selected = produk.split(" - ")[1]
-                produk_conditions.append(f'("kodeProduk" = %s AND "namaProduk" = %s)')
-                params.extend([kode_produk_selected, nama_produk_selected])
-            
-            if produk_conditions:
-                query += " AND (" + " OR ".join(produk_conditions) + ")"
+sales_query = st.session_state.get("sales_query")
 
-        # Filter untuk lokasi (bisa multiple)
-        if selected_locations:
-            loc_conditions = []
-            for loc in selected_locations:
-                loc_conditions.append("loccd = %s")
-                params.append(loc)
-            
-            if loc_conditions:
-                query += " AND (" + " OR ".join(loc_conditions) + ")"
+if sales_query:
+    try:
+        df = get_data(sales_query["query"], params=sales_query["params"], tables=[sales_query["source_table"]])
+        date_type = sales_query["date_type"]
 
-        query += """
-            GROUP BY bnsperiod, createdt, loccd, "kodeProduk", "namaProduk"
-            ORDER BY bnsperiod DESC, createdt DESC, loccd, total_qty DESC
-        """
+        if sales_query["use_rollup"]:
+            st.caption(f"⚡ Sumber data: rollup harian '{ROLLUP_TABLE}'")
+        else:
+            st.caption(f"🐢 Sumber data: tabel raw '{SOURCE_TABLE}'")
 
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
+        # 🔎 Untuk debugging: SQL final (parameter sudah terisi) & rencana eksekusinya
+        with st.expander("🔎 SQL & EXPLAIN"):
+            with get_connection() as conn:
+                st.code(render_sql(conn, sales_query["query"], sales_query["params"]), language="sql")
+            explain_analyze = st.checkbox("EXPLAIN ANALYZE (query dijalankan ulang)")
+            if st.button("📋 Tampilkan Rencana Query"):
+                with span("explain", "db"), get_connection() as conn:
+                    plan = explain(conn, sales_query["query"], sales_query["params"], analyze=explain_analyze)
+                st.code(plan)
 
         if not df.empty:
             st.success(f"✅ {len(df)} baris ditemukan.")
+            memory = df.attrs.get("memory")
+            if memory:
+                st.caption(
+                    f"💾 Memori hasil: {memory['bytes'] / 1024 / 1024:,.1f} MB "
+                    f"(sebelum kompaksi tipe kolom {memory['raw_bytes'] / 1024 / 1024:,.1f} MB)"
+                )
             
             # Tampilkan summary metrics
             col1, col2, col3, col4 = st.columns(4)
@@ -148,237 +134,261 @@ if submitted:
             # Tampilkan dataframe dengan createdt
             st.dataframe(df, use_container_width=True)
 
-            # 💾 Download tombol
-            csv = df.to_csv(index=False).encode("utf-8")
-            st.download_button(
-                label="📥 Download CSV",
-                data=csv,
-                file_name="sales_by_location.csv",
-                mime="text/csv",
+            # 💾 Export: hasil query di-stream dengan COPY ke file sementara, lalu diunduh dari file
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                export_format = st.selectbox(
+                    "Format export:", available_formats(), format_func=lambda f: FORMATS[f]["label"]
+                )
+            export_key = (sales_query["query"], repr(sales_query["params"]), export_format)
+            with col2:
+                st.write("")
+                if st.button("📦 Siapkan File Export"):
+                    with st.spinner("Mengekspor data ..."), span("export", "io", detail=export_format) as s:
+                        with get_connection() as conn:
+                            export = export_query(
+                                conn, sales_query["query"], sales_query["params"], fmt=export_format
+                            )
+                        s["rows"], s["bytes"] = export["rows"], export["bytes"]
+                    st.session_state["sales_export"] = (export_key, export)
+
+            saved_export = st.session_state.get("sales_export")
+            if saved_export and saved_export[0] == export_key and os.path.exists(saved_export[1]["path"]):
+                export = saved_export[1]
+                st.caption(f"📦 {describe_export(export)}")
+                st.download_button(
+                    label=f"📥 Download {FORMATS[export_format]['label']}",
+                    data=deferred_file(export["path"]),
+                    file_name=f"sales_by_location{export['ext']}",
+                    mime=export["mime"],
+                )
+
+            # 🧊 Agregasi sekali untuk semua tab (dipakai ulang saat pindah tab)
+            cube_key = (
+                sales_query["query"],
+                repr(sales_query["params"]),
+                get_query_cache().version(sales_query["source_table"]),
+            )
+            cached_cube = st.session_state.get("sales_cube")
+            if cached_cube is None or cached_cube[0] != cube_key:
+                with span("build_cube", "transform") as s:
+                    cached_cube = (cube_key, build_cube(df, date_type))
+                    s["rows"], s["bytes"] = len(df), frame_bytes(df)
+                st.session_state["sales_cube"] = cached_cube
+            cube = cached_cube[1]
+
+            # 🪶 Batasi data yang dikirim ke browser: top N kategori + "Lainnya", tren di-downsample (LTTB)
+            with st.expander("⚙️ Batas data grafik"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    top_n = st.number_input("Kategori teratas per grafik:", min_value=3, max_value=100, value=TOP_N)
+                with col2:
+                    max_points = st.number_input(
+                        "Titik maksimum per garis tren:", min_value=50, max_value=5_000, value=MAX_POINTS, step=50
+                    )
+            with span("chart_frames", "transform"):
+                charts = chart_frames(cube, int(top_n), int(max_points))
+            st.caption(
+                f"Grafik menampilkan {int(top_n)} produk/lokasi teratas (sisanya digabung sebagai 'Lainnya') "
+                f"dan maksimal {int(max_points):,} titik per garis tren."
             )
+
+            # Plotly baru di-import di sini: halaman tanpa hasil laporan tidak membayar import-nya
+            px = plotly_express()
+
+            def show_chart(fig, s):
+                # Ukuran JSON figure = payload yang dikirim ke browser
+                size = figure_bytes(fig)
+                s["bytes"] = (s["bytes"] or 0) + size
+                st.plotly_chart(fig, use_container_width=True)
+                st.caption(f"📦 Payload grafik: {size / 1024:,.0f} KB")
             
             # 📊 VISUALISASI YANG BAGUS DAN INFORMATIF
             st.markdown("---")
             st.subheader("📈 Dashboard Visualisasi Penjualan")
             
-            # Tab untuk berbagai jenis visualisasi
+            # Tab untuk berbagai jenis visualisasi; hanya tab yang dibuka yang dirender
             tab1, tab2, tab3, tab4, tab5 = st.tabs([
                 "🏆 Top Performers", 
                 "📊 Tren Berdasarkan Tanggal", 
                 "🗺️ Distribusi Geografis", 
                 "📦 Performance Produk", 
                 "📈 Analisis Komparatif"
-            ])
+            ], key="sales_viz_tab", on_change="rerun")
             
             with tab1:
-                # TOP PERFORMERS
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Top 10 Products
-                    top_products = df.groupby('namaProduk')['total_qty'].sum().nlargest(10).reset_index()
-                    fig_products = px.bar(
-                        top_products, 
-                        x='total_qty', 
-                        y='namaProduk',
-                        orientation='h',
-                        title='🏆 10 Produk Terlaris',
-                        color='total_qty',
-                        color_continuous_scale='viridis'
-                    )
-                    fig_products.update_layout(showlegend=False, height=400)
-                    st.plotly_chart(fig_products, use_container_width=True)
-                
-                with col2:
-                    # Top 10 Locations
-                    top_locations = df.groupby('loccd')['total_qty'].sum().nlargest(10).reset_index()
-                    fig_locations = px.bar(
-                        top_locations,
-                        x='total_qty',
-                        y='loccd',
-                        orientation='h',
-                        title='📍 10 Lokasi Terbaik',
-                        color='total_qty',
-                        color_continuous_scale='plasma'
-                    )
-                    fig_locations.update_layout(showlegend=False, height=400)
-                    st.plotly_chart(fig_locations, use_container_width=True)
+                if tab1.open:
+                    with span("tab_top_performers", "figure") as s:
+                        # TOP PERFORMERS
+                        col1, col2 = st.columns(2)
+                        
+                        with col1:
+                            # Top 10 Products
+                            top_products = cube["product"].nlargest(10, "total_qty")[["namaProduk", "total_qty"]]
+                            fig_products = px.bar(
+                                top_products, 
+                                x='total_qty', 
+                                y='namaProduk',
+                                orientation='h',
+                                title='🏆 10 Produk Terlaris',
+                                color='total_qty',
+                                color_continuous_scale='viridis'
+                            )
+                            fig_products.update_layout(showlegend=False, height=400)
+                            show_chart(fig_products, s)
+                        
+                        with col2:
+                            # Top 10 Locations
+                            top_locations = cube["location"].nlargest(10, "total_qty")
+                            fig_locations = px.bar(
+                                top_locations,
+                                x='total_qty',
+                                y='loccd',
+                                orientation='h',
+                                title='📍 10 Lokasi Terbaik',
+                                color='total_qty',
+                                color_continuous_scale='plasma'
+                            )
+                            fig_locations.update_layout(showlegend=False, height=400)
+                            show_chart(fig_locations, s)
             
             with tab2:
-                # TREN BERDASARKAN TANGGAL YANG DIPILIH
-                st.subheader(f"📈 Tren Berdasarkan {date_type}")
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Tren berdasarkan date_type yang dipilih
-                    if date_type == 'createdt':
-                        trend_data = df.groupby('createdt')['total_qty'].sum().reset_index()
-                        x_col = 'createdt'
-                    elif date_type == 'batchdt':
-                        # Jika perlu menambahkan batchdt ke query
-                        trend_data = df.groupby('bnsperiod')['total_qty'].sum().reset_index()
-                        x_col = 'bnsperiod'
-                    else:  # bnsperiod
-                        trend_data = df.groupby('bnsperiod')['total_qty'].sum().reset_index()
-                        x_col = 'bnsperiod'
-                    
-                    fig_trend = px.line(
-                        trend_data,
-                        x=x_col,
-                        y='total_qty',
-                        title=f'📈 Tren Penjualan Berdasarkan {date_type}',
-                        markers=True
-                    )
-                    fig_trend.update_traces(line=dict(width=3))
-                    fig_trend.update_layout(height=400)
-                    st.plotly_chart(fig_trend, use_container_width=True)
-                
-                with col2:
-                    # Tren dengan breakdown produk
-                    if date_type == 'createdt':
-                        trend_by_product = df.groupby(['createdt', 'namaProduk'])['total_qty'].sum().reset_index()
-                        x_col_product = 'createdt'
-                    elif date_type == 'batchdt':
-                        trend_by_product = df.groupby(['bnsperiod', 'namaProduk'])['total_qty'].sum().reset_index()
-                        x_col_product = 'bnsperiod'
-                    else:
-                        trend_by_product = df.groupby(['bnsperiod', 'namaProduk'])['total_qty'].sum().reset_index()
-                        x_col_product = 'bnsperiod'
-                    
-                    fig_trend_product = px.line(
-                        trend_by_product,
-                        x=x_col_product,
-                        y='total_qty',
-                        color='namaProduk',
-                        title=f'📊 Tren Penjualan per Produk ({date_type})',
-                        markers=True
-                    )
-                    fig_trend_product.update_layout(height=400, legend=dict(
-                        orientation="h",
-                        yanchor="bottom",
-                        y=1.02,
-                        xanchor="right",
-                        x=1
-                    ))
-                    st.plotly_chart(fig_trend_product, use_container_width=True)
+                if tab2.open:
+                    with span("tab_tren_tanggal", "figure") as s:
+                        # TREN BERDASARKAN TANGGAL YANG DIPILIH
+                        st.subheader(f"📈 Tren Berdasarkan {date_type}")
+                        
+                        col1, col2 = st.columns(2)
+                        
+                        with col1:
+                            # Tren berdasarkan date_type yang dipilih
+                            fig_trend = px.line(
+                                charts["trend"],
+                                x=cube["x_col"],
+                                y='total_qty',
+                                title=f'📈 Tren Penjualan Berdasarkan {date_type}',
+                                markers=True
+                            )
+                            fig_trend.update_traces(line=dict(width=3))
+                            fig_trend.update_layout(height=400)
+                            show_chart(fig_trend, s)
+                        
+                        with col2:
+                            # Tren dengan breakdown produk
+                            fig_trend_product = px.line(
+                                charts["trend_product"],
+                                x=cube["x_col"],
+                                y='total_qty',
+                                color='namaProduk',
+                                title=f'📊 Tren Penjualan per Produk ({date_type})',
+                                markers=True
+                            )
+                            fig_trend_product.update_layout(height=400, legend=dict(
+                                orientation="h",
+                                yanchor="bottom",
+                                y=1.02,
+                                xanchor="right",
+                                x=1
+                            ))
+                            show_chart(fig_trend_product, s)
             
             with tab3:
-                # DISTRIBUSI GEOGRAFIS
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Pie chart distribusi lokasi
-                    loc_distribution = df.groupby('loccd')['total_qty'].sum().reset_index()
-                    fig_pie = px.pie(
-                        loc_distribution,
-                        values='total_qty',
-                        names='loccd',
-                        title='🥧 Distribusi Penjualan per Lokasi',
-                        hole=0.4
-                    )
-                    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-                    fig_pie.update_layout(height=500)
-                    st.plotly_chart(fig_pie, use_container_width=True)
-                
-                with col2:
-                    # Treemap untuk visualisasi hierarkis
-                    treemap_data = df.groupby(['loccd', 'namaProduk'])['total_qty'].sum().reset_index()
-                    fig_treemap = px.treemap(
-                        treemap_data,
-                        path=['loccd', 'namaProduk'],
-                        values='total_qty',
-                        title='🌳 Struktur Penjualan (Lokasi → Produk)',
-                        color='total_qty',
-                        color_continuous_scale='RdYlGn'
-                    )
-                    fig_treemap.update_layout(height=500)
-                    st.plotly_chart(fig_treemap, use_container_width=True)
+                if tab3.open:
+                    with span("tab_distribusi_geografis", "figure") as s:
+                        # DISTRIBUSI GEOGRAFIS
+                        col1, col2 = st.columns(2)
+                        
+                        with col1:
+                            # Pie chart distribusi lokasi
+                            fig_pie = px.pie(
+                                charts["location_share"],
+                                values='total_qty',
+                                names='loccd',
+                                title='🥧 Distribusi Penjualan per Lokasi',
+                                hole=0.4
+                            )
+                            fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+                            fig_pie.update_layout(height=500)
+                            show_chart(fig_pie, s)
+                        
+                        with col2:
+                            # Treemap untuk visualisasi hierarkis
+                            fig_treemap = px.treemap(
+                                charts["product_location"],
+                                path=['loccd', 'namaProduk'],
+                                values='total_qty',
+                                title='🌳 Struktur Penjualan (Lokasi → Produk)',
+                                color='total_qty',
+                                color_continuous_scale='RdYlGn'
+                            )
+                            fig_treemap.update_layout(height=500)
+                            show_chart(fig_treemap, s)
             
             with tab4:
-                # PERFORMANCE PRODUK
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Scatter plot - produk performance
-                    product_performance = df.groupby('namaProduk').agg({
-                        'total_qty': 'sum',
-                        'loccd': 'nunique'
-                    }).reset_index()
-                    product_performance.columns = ['namaProduk', 'total_qty', 'jumlah_lokasi']
-                    
-                    fig_scatter = px.scatter(
-                        product_performance,
-                        x='jumlah_lokasi',
-                        y='total_qty',
-                        size='total_qty',
-                        color='total_qty',
-                        hover_name='namaProduk',
-                        title='🎯 Performance Produk vs Jangkauan Lokasi',
-                        size_max=50,
-                        color_continuous_scale='rainbow'
-                    )
-                    fig_scatter.update_layout(height=500)
-                    st.plotly_chart(fig_scatter, use_container_width=True)
-                
-                with col2:
-                    # Donut chart market share produk
-                    market_share = df.groupby('namaProduk')['total_qty'].sum().reset_index()
-                    fig_donut = px.pie(
-                        market_share,
-                        values='total_qty',
-                        names='namaProduk',
-                        title='🎯 Market Share Produk',
-                        hole=0.6
-                    )
-                    fig_donut.update_traces(textinfo='percent+label')
-                    fig_donut.update_layout(height=500, showlegend=False)
-                    st.plotly_chart(fig_donut, use_container_width=True)
+                if tab4.open:
+                    with span("tab_performance_produk", "figure") as s:
+                        # PERFORMANCE PRODUK
+                        col1, col2 = st.columns(2)
+                        
+                        with col1:
+                            # Scatter plot - produk performance
+                            fig_scatter = px.scatter(
+                                cube["product"],
+                                x='jumlah_lokasi',
+                                y='total_qty',
+                                size='total_qty',
+                                color='total_qty',
+                                hover_name='namaProduk',
+                                title='🎯 Performance Produk vs Jangkauan Lokasi',
+                                size_max=50,
+                                color_continuous_scale='rainbow'
+                            )
+                            fig_scatter.update_layout(height=500)
+                            show_chart(fig_scatter, s)
+                        
+                        with col2:
+                            # Donut chart market share produk
+                            fig_donut = px.pie(
+                                charts["product_share"],
+                                values='total_qty',
+                                names='namaProduk',
+                                title='🎯 Market Share Produk',
+                                hole=0.6
+                            )
+                            fig_donut.update_traces(textinfo='percent+label')
+                            fig_donut.update_layout(height=500, showlegend=False)
+                            show_chart(fig_donut, s)
             
             with tab5:
-                # ANALISIS KOMPARATIF
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Bar chart perbandingan produk di lokasi
-                    comparison_data = df.groupby(['namaProduk', 'loccd'])['total_qty'].sum().reset_index()
-                    fig_comparison = px.bar(
-                        comparison_data,
-                        x='loccd',
-                        y='total_qty',
-                        color='namaProduk',
-                        title='📊 Perbandingan Penjualan Produk per Lokasi',
-                        barmode='group'
-                    )
-                    fig_comparison.update_layout(height=500, xaxis_tickangle=-45)
-                    st.plotly_chart(fig_comparison, use_container_width=True)
-                
-                with col2:
-                    # Area chart tren kumulatif berdasarkan date_type
-                    if date_type == 'createdt':
-                        df_sorted = df.sort_values('createdt')
-                        cumulative_data = df_sorted.groupby(['createdt', 'namaProduk'])['total_qty'].sum().reset_index()
-                        x_col_cumulative = 'createdt'
-                    elif date_type == 'batchdt':
-                        df_sorted = df.sort_values('bnsperiod')
-                        cumulative_data = df_sorted.groupby(['bnsperiod', 'namaProduk'])['total_qty'].sum().reset_index()
-                        x_col_cumulative = 'bnsperiod'
-                    else:
-                        df_sorted = df.sort_values('bnsperiod')
-                        cumulative_data = df_sorted.groupby(['bnsperiod', 'namaProduk'])['total_qty'].sum().reset_index()
-                        x_col_cumulative = 'bnsperiod'
-                    
-                    cumulative_data['cumulative'] = cumulative_data.groupby('namaProduk')['total_qty'].cumsum()
-                    
-                    fig_area = px.area(
-                        cumulative_data,
-                        x=x_col_cumulative,
-                        y='cumulative',
-                        color='namaProduk',
-                        title=f'📈 Tren Kumulatif Penjualan per Produk ({date_type})',
-                        height=500
-                    )
-                    st.plotly_chart(fig_area, use_container_width=True)
+                if tab5.open:
+                    with span("tab_analisis_komparatif", "figure") as s:
+                        # ANALISIS KOMPARATIF
+                        col1, col2 = st.columns(2)
+                        
+                        with col1:
+                            # Bar chart perbandingan produk di lokasi
+                            fig_comparison = px.bar(
+                                charts["product_location"],
+                                x='loccd',
+                                y='total_qty',
+                                color='namaProduk',
+                                title='📊 Perbandingan Penjualan Produk per Lokasi',
+                                barmode='group'
+                            )
+                            fig_comparison.update_layout(height=500, xaxis_tickangle=-45)
+                            show_chart(fig_comparison, s)
+                        
+                        with col2:
+                            # Area chart tren kumulatif berdasarkan date_type
+                            fig_area = px.area(
+                                charts["cumulative"],
+                                x=cube["x_col"],
+                                y='cumulative',
+                                color='namaProduk',
+                                title=f'📈 Tren Kumulatif Penjualan per Produk ({date_type})',
+                                height=500
+                            )
+                            show_chart(fig_area, s)
                     
         else:
             st.warning("⚠️ Tidak ada data ditemukan untuk filter tersebut.")
@@ -386,6 +396,39 @@ if submitted:
     except Exception as e:
         st.error(f"❌ Error saat menjalankan query: {e}")
 
+# 📊 Status rollup harian
+with st.expander("📊 Status Rollup Harian & Dimensi"):
+    state = cached_rollup_state()
+    if state:
+        st.write(
+            f"Rollup '{ROLLUP_TABLE}' dari '{state['source_table']}': "
+            f"{state['rollup_rows']:,} baris agregat, terakhir diperbarui {state['refreshed_at']:%Y-%m-%d %H:%M:%S}."
+        )
+    else:
+        st.write(f"Rollup '{ROLLUP_TABLE}' belum dibuat, laporan membaca tabel raw.")
+
+    def load_dimension_counts():
+        with get_connection() as conn:
+            return dimension_counts(conn)
+
+    dim_counts = cached_call("dimension_counts", load_dimension_counts, tables=[PRODUCT_TABLE, LOCATION_TABLE])
+    if dim_counts:
+        st.write(", ".join(f"'{t}': {n:,} baris" for t, n in dim_counts.items()))
+    else:
+        st.write("Tabel dimensi belum dibuat, dropdown filter membaca SELECT DISTINCT dari tabel raw.")
+
+    st.caption("Rollup & dimensi diperbarui otomatis setelah import. Rebuild hanya perlu bila sales_data diubah di luar halaman import.")
+    if st.button("🔄 Rebuild Rollup & Dimensi"):
+        with st.spinner("Membangun ulang rollup & dimensi ..."):
+            with get_connection() as conn:
+                rows = rebuild_rollup(conn)
+                dim_rows = rebuild_dimensions(conn)
+            bump_table_version(ROLLUP_TABLE, STATE_TABLE, PRODUCT_TABLE, LOCATION_TABLE)
+        st.success(
+            f"✅ Rollup dibangun ulang: {rows:,} baris agregat; "
+            + ", ".join(f"'{t}': {n:,} baris" for t, n in dim_rows.items()) + "."
+        )
+
 # ℹ️ Informasi penggunaan
 with st.expander("ℹ️ Cara Penggunaan"):
     st.markdown("""
@@ -413,3 +456,5 @@ with st.expander("ℹ️ Cara Penggunaan"):
     - **Kolom createdt** ditampilkan dalam hasil query
     - **Tren dinamis** berdasarkan jenis tanggal yang dipilih
     """)
+
+page_done()
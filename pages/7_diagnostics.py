@@ -0,0 +1,94 @@
+import streamlit as st
+
+from instrumentation import (
+    METRICS_TABLE, RING_SIZE, cache_hit_rate, flush_metrics, get_metrics_store, load_metrics, page_latencies,
+    slowest, span_latencies, startup_records, volumes
+)
+
+# Halaman ini sendiri tidak di-track agar tidak mengotori angka halaman lain
+st.title("🩺 Diagnostik Performa")
+st.write("Latensi per halaman & per query, run terlambat, dan volume data dari instrumentasi semua halaman.")
+
+store = get_metrics_store()
+
+col1, col2 = st.columns([2, 3])
+with col1:
+    source = st.radio("Sumber metrics:", ["Buffer memori", f"Tabel {METRICS_TABLE}"], horizontal=True)
+with col2:
+    persist = st.toggle(
+        f"💾 Simpan metrics ke tabel '{METRICS_TABLE}' (semua sesi)",
+        value=store.persist,
+        help="Default bisa diatur di secrets: [metrics] persist = true",
+    )
+    if persist != store.persist:
+        store.persist = persist
+        st.rerun()
+
+since_hours = 24
+if source != "Buffer memori":
+    since_hours = st.slider("Rentang (jam terakhir):", 1, 24 * 14, 24)
+
+col1, col2, _ = st.columns([1, 1, 3])
+with col1:
+    if st.button("📤 Flush ke tabel", disabled=not store.persist):
+        try:
+            st.toast(f"✅ {flush_metrics():,} record ditulis ke '{METRICS_TABLE}'.")
+        except Exception as e:
+            st.error(f"⚠️ Gagal menulis metrics: {e}")
+with col2:
+    if st.button("🧹 Kosongkan buffer"):
+        store.clear()
+        st.rerun()
+
+try:
+    df = load_metrics("buffer" if source == "Buffer memori" else "table", since_hours=since_hours)
+except Exception as e:
+    st.error(f"⚠️ Tidak dapat memuat metrics: {e}")
+    st.stop()
+
+if df.empty:
+    st.info("Belum ada metrics. Buka halaman lain dulu, lalu kembali ke sini.")
+    st.stop()
+
+pages_df = page_latencies(df)
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("Record", f"{len(df):,}" + (f" / {RING_SIZE:,}" if source == "Buffer memori" else ""))
+with col2:
+    st.metric("Run Halaman", f"{int(pages_df['runs'].sum()):,}")
+with col3:
+    st.metric("Cache Hit Rate", f"{cache_hit_rate(df):.0%}")
+with col4:
+    errors = int(df["error"].notna().sum())
+    st.metric("Span Error", f"{errors:,}")
+
+st.subheader("📄 Latensi per Halaman")
+st.caption("Durasi satu run script: dari awal halaman sampai page_done() atau span terakhir (mis. setelah st.stop()).")
+st.dataframe(pages_df, hide_index=True, use_container_width=True)
+
+st.subheader("🚀 Cold Start")
+st.caption(
+    "Per proses server: waktu import modul aplikasi halaman pertama (imports) dan sampai halaman pertama "
+    "selesai dirender (first_render), dihitung dari import modul instrumentation. Streamlit & pandas sudah "
+    "ter-import sebelumnya sehingga tidak ikut terhitung; lihat benchmarks/bench_suite.py untuk total import."
+)
+startup_df = startup_records(df)
+if startup_df.empty:
+    st.info("Belum ada data cold start di sumber ini.")
+else:
+    st.dataframe(startup_df, hide_index=True, use_container_width=True)
+
+st.subheader("🗄️ Latensi per Query")
+st.caption("Cache miss (query yang benar-benar sampai ke database) dan query dari SQL Executor.")
+st.dataframe(span_latencies(df, ["query"]), hide_index=True, use_container_width=True)
+
+st.subheader("⚙️ Transformasi, Chart & I/O")
+st.dataframe(
+    span_latencies(df, ["db", "transform", "figure", "render", "io"]), hide_index=True, use_container_width=True
+)
+
+st.subheader("🐢 Span Terlambat")
+st.dataframe(slowest(df), hide_index=True, use_container_width=True)
+
+st.subheader("📦 Volume Data per Halaman")
+st.dataframe(volumes(df), hide_index=True, use_container_width=True)
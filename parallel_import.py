@@ -0,0 +1,347 @@
+"""
+Parallel multi-file CSV import.
+
+Backfills arrive as one extract per location or per day, often zipped. Each
+file is parsed and type-coerced in a process pool (pandas parsing is
+CPU-bound and holds the GIL). The result is written as a COPY-ready CSV
+next to the input, and as soon as a file is ready it is streamed into the
+table with COPY over its own pooled connection. Parsing of the next files
+and COPY of earlier ones therefore overlap, and several COPY streams run
+at once.
+
+Every file is loaded in its own transaction: a broken file is reported
+and skipped without rolling back the others.
+"""
+import fnmatch
+import glob
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+
+import pandas as pd
+import streamlit as st
+
+from csv_import import CHUNK_ROWS, SAMPLE_BYTES, read_csv_chunks, sniff_csv
+from db import get_connection, get_pool, quote_ident
+from instrumentation import copy_context, span
+from query_runner import context_executor
+from sales_partitions import ensure_partitions, months_of
+from schema_infer import coerce_chunk, write_rejects
+
+COPY_BUFFER = 1024 * 1024
+FILE_PATTERNS = ["*.csv", "*.zip"]
+REJECT_COLUMNS = ["source_row", "error_column", "error", "row_data"]
+
+
+def _source_entry(name, size, **location):
+    return {"name": name, "size": size, **location}
+
+
+def _zip_entries(zip_name, opener):
+    entries = []
+    with opener() as f, zipfile.ZipFile(f) as zf:
+        for info in zf.infolist():
+            base = os.path.basename(info.filename)
+            if info.is_dir() or base.startswith(".") or "__MACOSX" in info.filename:
+                continue
+            if fnmatch.fnmatch(base.lower(), "*.csv"):
+                entries.append(_source_entry(
+                    f"{zip_name}/{info.filename}", info.file_size, opener=opener, member=info.filename
+                ))
+    return entries
+
+
+def import_dir():
+    """Server folder that imports may read from ([imports] dir in secrets), or None if not configured."""
+    try:
+        configured = st.secrets.get("imports", {}).get("dir")
+    except Exception:
+        configured = None
+    return os.path.realpath(configured) if configured else None
+
+
+def resolve_server_path(path, base_dir):
+    """
+    Real path of a server file or pattern; relative paths start at base_dir.
+
+    Raises ValueError when server imports are not configured (base_dir is
+    None) or the path resolves outside base_dir, also through symlinks or "..".
+    """
+    if not base_dir:
+        raise ValueError("Import dari path server tidak aktif: atur [imports] dir di secrets.")
+    resolved = os.path.realpath(os.path.join(base_dir, path))
+    if os.path.commonpath([base_dir, resolved]) != base_dir:
+        raise ValueError(f"Path di luar folder import ({base_dir}) tidak diizinkan: {path}")
+    return resolved
+
+
+def list_sources(uploads=(), server_pattern=None, base_dir=None):
+    """
+    CSV sources from Streamlit uploads and/or a server folder or glob pattern.
+
+    Server paths are restricted to base_dir (see resolve_server_path). .zip
+    files are expanded to their .csv members. Returns a list of dicts with
+    name, size and what is needed to read the file later.
+    """
+    entries = []
+    for upload in uploads:
+        if upload.name.lower().endswith(".zip"):
+            entries += _zip_entries(upload.name, lambda upload=upload: _reopen(upload))
+        else:
+            entries.append(_source_entry(upload.name, upload.size, upload=upload))
+
+    if server_pattern:
+        server_pattern = resolve_server_path(server_pattern, base_dir)
+        if os.path.isdir(server_pattern):
+            paths = sorted(p for pattern in FILE_PATTERNS for p in glob.glob(os.path.join(server_pattern, pattern)))
+        else:
+            paths = sorted(glob.glob(server_pattern))
+        for path in paths:
+            path = resolve_server_path(path, base_dir)
+            if path.lower().endswith(".zip"):
+                entries += _zip_entries(os.path.basename(path), lambda path=path: open(path, "rb"))
+            elif path.lower().endswith(".csv"):
+                entries.append(_source_entry(os.path.basename(path), os.path.getsize(path), path=path))
+    return entries
+
+
+def _reopen(upload):
+    # ZipFile tidak menutup file object milik pemanggil; upload tetap bisa dibaca ulang
+    upload.seek(0)
+    return nullcontext(upload)
+
+
+def read_sample(entry, sample_bytes=SAMPLE_BYTES):
+    """The first sample_bytes of a source as a BytesIO (for sniff_csv / preview)."""
+    if "path" in entry:
+        with open(entry["path"], "rb") as f:
+            return io.BytesIO(f.read(sample_bytes))
+    if "upload" in entry:
+        entry["upload"].seek(0)
+        return io.BytesIO(entry["upload"].read(sample_bytes))
+    with entry["opener"]() as f, zipfile.ZipFile(f) as zf, zf.open(entry["member"]) as member:
+        return io.BytesIO(member.read(sample_bytes))
+
+
+def materialize(entry, work_dir):
+    """Path of the source on local disk: server files as-is, uploads and zip members copied to work_dir."""
+    if "path" in entry:
+        return entry["path"]
+    target = os.path.join(work_dir, f"{len(os.listdir(work_dir)):05d}_{os.path.basename(entry['name'])}")
+    with open(target, "wb") as out:
+        if "upload" in entry:
+            entry["upload"].seek(0)
+            shutil.copyfileobj(entry["upload"], out, COPY_BUFFER)
+        else:
+            with entry["opener"]() as f, zipfile.ZipFile(f) as zf, zf.open(entry["member"]) as member:
+                shutil.copyfileobj(member, out, COPY_BUFFER)
+    return target
+
+
+def prepare_file(path, out_path, columns, schema=None, chunksize=CHUNK_ROWS, summarize=False, label=None,
+                 partition_column=None, file_column=None, file_index=0):
+    """
+    Parse one CSV into a COPY-ready CSV at out_path (runs in a worker process).
+
+    Returns rows, rejected, the rejects frame (or None, errors prefixed with
+    label so they can be traced back to the file), with summarize also the
+    createdt values and dimension summaries of the loaded rows, and with
+    partition_column the months found in that column. With file_column,
+    file_index is written as an extra last column of every row.
+    Raises ValueError when the header does not match columns.
+    """
+    if summarize:
+        from sales_dimensions import summarize_chunk
+
+    start = time.perf_counter()
+    result = {"rows": 0, "rejected": 0, "rejects": None, "dates": set(), "summaries": [], "months": set()}
+    rejects = []
+    with open(path, "rb") as raw:
+        info = sniff_csv(raw)
+        if info["columns"] != list(columns):
+            raise ValueError(f"Header berbeda dari file pertama: {info['columns']}")
+        with open(out_path, "w", encoding="utf-8", newline="") as out:
+            for chunk in read_csv_chunks(raw, info["encoding"], info["delimiter"], chunksize):
+                chunk.columns = columns
+                if schema:
+                    chunk, chunk_rejects = coerce_chunk(chunk, schema)
+                    if chunk_rejects is not None:
+                        if label:
+                            chunk_rejects["error"] = f"{label}: " + chunk_rejects["error"]
+                        rejects.append(chunk_rejects)
+                        result["rejected"] += len(chunk_rejects)
+                if file_column:
+                    chunk[file_column] = file_index
+                chunk.to_csv(out, header=False, index=False)
+                result["rows"] += len(chunk)
+                if partition_column:
+                    result["months"] |= months_of(chunk[partition_column].unique())
+                if summarize:
+                    if "createdt" in chunk.columns:
+                        result["dates"].update(chunk["createdt"].unique().tolist())
+                    result["summaries"].append(summarize_chunk(chunk))
+    if rejects:
+        result["rejects"] = pd.concat(rejects, ignore_index=True)
+    result["parse_seconds"] = time.perf_counter() - start
+    return result
+
+
+def copy_prepared(prepared_path, table_name, columns, rejects=None, rejects_for=None):
+    """COPY a prepared file into table_name on a pooled connection, in one transaction."""
+    start = time.perf_counter()
+    column_list = ", ".join(quote_ident(c) for c in columns)
+    with span("copy_file", "io", detail=table_name) as s, get_connection() as conn:
+        with conn.cursor() as cur:
+            if rejects is not None:
+                write_rejects(cur, rejects_for or table_name, rejects)
+            with open(prepared_path, encoding="utf-8") as f:
+                cur.copy_expert(
+                    f"COPY {quote_ident(table_name)} ({column_list}) FROM STDIN WITH (FORMAT csv)",
+                    f,
+                    size=COPY_BUFFER,
+                )
+            s["rows"] = cur.rowcount
+        conn.commit()
+        s["bytes"] = os.path.getsize(prepared_path)
+    return time.perf_counter() - start
+
+
+def _ensure_partitions(table_name, months):
+    # Hanya bulan yang belum punya partisi memicu DDL (yang menunggu COPY lain selesai)
+    with get_connection() as conn:
+        ensure_partitions(conn, table_name, months)
+        conn.commit()
+
+
+def default_workers(n_files):
+    """(parse processes, COPY connections) for n_files files."""
+    processes = max(1, min(n_files, os.cpu_count() or 1))
+    # Sisakan koneksi pool untuk halaman lain
+    connections = max(1, min(n_files, get_pool().maxconn - 2))
+    return processes, connections
+
+
+def import_files(entries, table_name, columns, schema=None, chunksize=CHUNK_ROWS, processes=None,
+                 connections=None, summarize=False, rejects_for=None, progress=None, partition_column=None,
+                 file_column=None):
+    """
+    Import many CSV sources (see list_sources) into table_name in parallel.
+
+    With partition_column (table_name is partitioned on it, see
+    sales_partitions) the monthly partitions a file needs are created and
+    committed before its COPY starts. With file_column (e.g. the staging
+    table of an incremental load) every row also gets the position of its
+    source in entries, so the load order stays known despite parallel COPY.
+
+    progress(files, totals) is called from the calling thread whenever a file
+    changes state; files is a DataFrame with one row per source. Returns
+    (files, totals) where totals has files, failed, rows, rejected, bytes,
+    seconds, rows_per_sec, mb_per_sec, dates and summaries.
+    """
+    default_processes, default_connections = default_workers(len(entries))
+    processes = processes or default_processes
+    connections = connections or default_connections
+
+    files = pd.DataFrame({
+        "file": [e["name"] for e in entries],
+        "status": "⏳ antri",
+        "rows": 0,
+        "rejected": 0,
+        "mb": [e["size"] / 1024 / 1024 for e in entries],
+        "parse_s": None,
+        "copy_s": None,
+        "error": None,
+    })
+    totals = {"files": len(entries), "failed": 0, "rows": 0, "rejected": 0,
+              "bytes": sum(e["size"] for e in entries), "dates": set(), "summaries": []}
+
+    def report():
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        totals["seconds"] = elapsed
+        totals["rows_per_sec"] = totals["rows"] / elapsed
+        done_bytes = sum(e["size"] for e, status in zip(entries, files["status"]) if status == "✅ selesai")
+        totals["mb_per_sec"] = done_bytes / elapsed / 1024 / 1024
+        if progress:
+            progress(files, totals)
+
+    def fail(i, error):
+        files.loc[i, ["status", "error"]] = ["❌ gagal", str(error)]
+        totals["failed"] += 1
+
+    if schema:
+        # Tabel rejects dibuat sekali di depan: CREATE TABLE IF NOT EXISTS dari
+        # beberapa koneksi sekaligus bisa saling bentrok
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                write_rejects(cur, rejects_for or table_name, pd.DataFrame(columns=REJECT_COLUMNS))
+            conn.commit()
+
+    copy_columns = list(columns) + ([file_column] if file_column else [])
+    start = time.perf_counter()
+    work_dir = tempfile.mkdtemp(prefix="parallel_import_")
+    # spawn: fork dari server Streamlit yang multi-thread tidak aman
+    parse_pool = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn"))
+    copy_pool = context_executor(connections)
+    try:
+        pending = {}
+        for i, entry in enumerate(entries):
+            try:
+                path = materialize(entry, work_dir)
+            except (OSError, zipfile.BadZipFile) as e:
+                fail(i, e)
+                continue
+            out_path = os.path.join(work_dir, f"{i:05d}.copy.csv")
+            future = parse_pool.submit(
+                prepare_file, path, out_path, columns, schema, chunksize, summarize, entry["name"],
+                partition_column, file_column, i,
+            )
+            pending[future] = ("parse", i, out_path)
+            files.loc[i, "status"] = "⚙️ parsing"
+        report()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, i, payload = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    fail(i, e)
+                    continue
+
+                if stage == "parse":
+                    if result["months"]:
+                        try:
+                            _ensure_partitions(table_name, result["months"])
+                        except Exception as e:
+                            fail(i, e)
+                            continue
+                    files.loc[i, ["status", "parse_s", "rejected"]] = [
+                        "🚚 COPY", result["parse_seconds"], result["rejected"]
+                    ]
+                    copy_future = copy_pool.submit(
+                        copy_context().run, copy_prepared, payload, table_name, copy_columns,
+                        result["rejects"], rejects_for,
+                    )
+                    pending[copy_future] = ("copy", i, (payload, result))
+                else:
+                    prepared_path, parsed = payload
+                    os.remove(prepared_path)
+                    files.loc[i, ["status", "rows", "copy_s"]] = ["✅ selesai", parsed["rows"], result]
+                    totals["rows"] += parsed["rows"]
+                    totals["rejected"] += parsed["rejected"]
+                    totals["dates"] |= parsed["dates"]
+                    totals["summaries"] += parsed["summaries"]
+            report()
+    finally:
+        parse_pool.shutdown(wait=True, cancel_futures=True)
+        copy_pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    report()
+    return files, totals
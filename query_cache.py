@@ -0,0 +1,202 @@
+"""
+Shared query result cache.
+
+Results are keyed on the normalized SQL, its parameters and the current
+version of every table the query reads. Writers (e.g. the import page) call
+bump_table_version() after a successful load, which makes every cached
+result of that table unreachable immediately. A TTL additionally bounds how
+long a result may live, which covers changes made outside this app.
+
+Versions are kept in process memory, shared by all sessions of this
+Streamlit server. The cache is bounded by entry count and by the total
+in-memory size of the cached DataFrames (least recently used first out);
+per-query statistics are bounded the same way.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+from db import get_connection
+from frame_fetch import fetch_frame
+from instrumentation import count, frame_bytes, span
+
+DEFAULT_TTL = 600          # detik
+MAX_ENTRIES = 256
+MAX_CACHE_MB = 256         # total memory_usage(deep=True) semua DataFrame di cache
+MAX_STATS = 1000           # jumlah query berbeda yang statistiknya disimpan
+
+_TABLE_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+((?:"[^"]+"|\w+)(?:\.(?:"[^"]+"|\w+))?)', re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and drop a trailing semicolon."""
+    return " ".join(sql.split()).rstrip(";").strip()
+
+
+def tables_in_sql(sql):
+    """Best-effort list of tables referenced after FROM/JOIN."""
+    tables = set()
+    for match in _TABLE_PATTERN.findall(sql):
+        name = match.split(".")[-1].strip('"')
+        if name.lower() not in ("select", "unnest", "lateral"):
+            tables.add(name)
+    return sorted(tables)
+
+
+class QueryCache:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_CACHE_MB * 1024 * 1024, max_stats=MAX_STATS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_stats = max_stats
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._entries = OrderedDict()     # key -> (result, expires, bytes)
+        self._bytes = 0
+        self._stats = OrderedDict()
+
+    def version(self, table_name):
+        with self._lock:
+            return self._versions.get(table_name, 0)
+
+    def bump(self, table_name):
+        """Invalidate every cached result that reads table_name."""
+        with self._lock:
+            self._versions[table_name] = self._versions.get(table_name, 0) + 1
+            stale = [key for key in self._entries if table_name in dict(key[2])]
+            for key in stale:
+                self._drop(key)
+            return self._versions[table_name]
+
+    def _drop(self, key):
+        _, _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def _record(self, sql, hit, seconds=None, rows=None, memory=None):
+        entry = self._stats.setdefault(
+            sql, {"hits": 0, "misses": 0, "last_ms": None, "rows": None, "mb": None, "raw_mb": None}
+        )
+        self._stats.move_to_end(sql)
+        while len(self._stats) > self.max_stats:
+            self._stats.popitem(last=False)
+        if hit:
+            entry["hits"] += 1
+        else:
+            entry["misses"] += 1
+            entry["last_ms"] = seconds * 1000
+            entry["rows"] = rows
+            if memory:
+                entry["mb"] = memory["bytes"] / 1024 / 1024
+                entry["raw_mb"] = memory["raw_bytes"] / 1024 / 1024
+
+    def get_or_load(self, sql, params, tables, ttl, loader):
+        normalized = normalize_sql(sql)
+        with self._lock:
+            versions = tuple((t, self._versions.get(t, 0)) for t in tables)
+        key = (normalized, repr(params), versions)
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[1] > now:
+                self._entries.move_to_end(key)
+                self._record(normalized, hit=True)
+                count("cache_hit", detail=normalized)
+                return cached[0]
+            if cached:
+                self._drop(key)
+
+        start = time.perf_counter()
+        with span("query", "query", detail=normalized) as s:
+            df = loader()
+            if isinstance(df, pd.DataFrame):
+                s["rows"], s["bytes"] = len(df), frame_bytes(df)
+        elapsed = time.perf_counter() - start
+
+        nbytes = s.get("bytes") or 0
+        with self._lock:
+            rows = len(df) if isinstance(df, pd.DataFrame) else None
+            memory = df.attrs.get("memory") if isinstance(df, pd.DataFrame) else None
+            self._record(normalized, hit=False, seconds=elapsed, rows=rows, memory=memory)
+            # Hasil yang sendirian sudah melebihi budget tidak di-cache
+            if nbytes <= self.max_bytes:
+                if key in self._entries:
+                    self._drop(key)
+                self._entries[key] = (df, now + ttl, nbytes)
+                self._bytes += nbytes
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    self._drop(next(iter(self._entries)))
+        return df
+
+    def stats(self):
+        """Per-query hit/miss statistics as a DataFrame."""
+        with self._lock:
+            rows = [{"query": sql, **s} for sql, s in self._stats.items()]
+            entries = len(self._entries)
+            cached_bytes = self._bytes
+        df = pd.DataFrame(rows, columns=["query", "hits", "misses", "last_ms", "rows", "mb", "raw_mb"])
+        if not df.empty:
+            df["hit_rate"] = df["hits"] / (df["hits"] + df["misses"])
+            df = df.sort_values("hits", ascending=False, ignore_index=True)
+        df.attrs["entries"] = entries
+        df.attrs["bytes"] = cached_bytes
+        return df
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+@st.cache_resource(show_spinner=False)
+def get_query_cache():
+    return QueryCache()
+
+
+def cached_query(sql, params=None, tables=None, ttl=DEFAULT_TTL, timeout_s=None, compact=True):
+    """
+    Cached query result as a compact DataFrame (see frame_fetch). `tables`
+    defaults to the tables found in the SQL. timeout_s sets a
+    statement_timeout for the query when it hits the database.
+    compact=False keeps the values as psycopg2 returned them.
+    The returned DataFrame is shared between sessions: treat it as read-only.
+    """
+    tables = sorted(tables) if tables is not None else tables_in_sql(sql)
+
+    def load():
+        with get_connection() as conn:
+            if timeout_s:
+                with conn.cursor() as cur:
+                    cur.execute("SET LOCAL statement_timeout = %s;", (int(timeout_s * 1000),))
+            return fetch_frame(conn, sql, params=params, compact=compact)
+
+    # Hasil mentah & ringkas dari SQL yang sama disimpan terpisah
+    key_params = params if compact else ("raw", params)
+    return get_query_cache().get_or_load(sql, key_params, tables, ttl, load)
+
+
+def cached_call(name, loader, tables, ttl=DEFAULT_TTL):
+    """Cache any small result (dict, list, ...) of loader() under `name`."""
+    return get_query_cache().get_or_load(name, None, sorted(tables), ttl, loader)
+
+
+def bump_table_version(*table_names):
+    cache = get_query_cache()
+    for table_name in table_names:
+        cache.bump(table_name)
+
+
+def cache_stats():
+    return get_query_cache().stats()
+
+
+def get_column_types(table_name):
+    """{column: data_type} of a public table, e.g. {"createdt": "date"}."""
+    df = cached_query("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s
+    """, params=(table_name,), tables=[table_name])
+    return dict(zip(df["column_name"], df["data_type"]))
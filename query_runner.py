@@ -0,0 +1,133 @@
+"""
+Run independent queries of a page concurrently.
+
+Each query borrows its own connection from the shared pool, so a page that
+needs the product master, the location master and a few metrics pays
+max(query) instead of sum(query) round trips. A failing or slow query does
+not take the others down: its error is returned next to the other results.
+
+Usage:
+    results = run_queries({
+        "produk": {"sql": "SELECT ...", "tables": ["dim_product"]},
+        "lokasi": "SELECT DISTINCT loccd FROM dim_location",
+    })
+    df = results["produk"]["df"]        # None if the query failed
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import streamlit as st
+
+from db import get_connection, get_pool
+from instrumentation import copy_context, span
+from query_cache import DEFAULT_TTL, cached_query
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:     # Streamlit lama
+    add_script_run_ctx = get_script_run_ctx = None
+
+DEFAULT_TIMEOUT_S = 30
+CONNECTIVITY_TTL = 60      # detik; hasil cek koneksi dipakai bersama semua sesi
+
+
+def _attach_context(ctx):
+    # Worker thread ikut konteks script agar st.cache_resource tidak memberi warning
+    if ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+
+def context_executor(max_workers):
+    """ThreadPoolExecutor whose threads share the calling script's run context."""
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+    return ThreadPoolExecutor(max_workers=max_workers, initializer=_attach_context, initargs=(ctx,))
+
+
+def run_parallel(tasks, timeout_s=DEFAULT_TIMEOUT_S, max_workers=None):
+    """
+    Call every function in tasks ({name: callable}) on a thread pool.
+
+    Returns {name: {"value", "error", "seconds"}}. A task still running after
+    timeout_s gets error "timeout"; exceptions are caught per task.
+    """
+    if not tasks:
+        return {}
+    if max_workers is None:
+        max_workers = min(len(tasks), get_pool().maxconn)
+
+    def timed(func):
+        start = time.perf_counter()
+        value = func()
+        return value, time.perf_counter() - start
+
+    results = {}
+    executor = context_executor(max_workers)
+    try:
+        # Salinan context per task: span di worker thread tetap tercatat atas nama halaman ini
+        futures = {name: executor.submit(copy_context().run, timed, func) for name, func in tasks.items()}
+        done, _ = wait(futures.values(), timeout=timeout_s)
+        for name, future in futures.items():
+            if future not in done:
+                future.cancel()
+                results[name] = {"value": None, "error": f"timeout setelah {timeout_s} detik", "seconds": None}
+                continue
+            try:
+                value, seconds = future.result()
+                results[name] = {"value": value, "error": None, "seconds": seconds}
+            except Exception as e:
+                results[name] = {"value": None, "error": str(e), "seconds": None}
+    finally:
+        # Task yang timeout tetap dibatalkan di server oleh statement_timeout
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def run_queries(queries, timeout_s=DEFAULT_TIMEOUT_S, max_workers=None):
+    """
+    Run independent queries concurrently through the query cache.
+
+    queries maps a name to an SQL string or to a dict with sql and optional
+    params, tables and ttl. Returns {name: {"df", "error", "seconds"}}.
+    """
+    def task(spec):
+        if isinstance(spec, str):
+            spec = {"sql": spec}
+        return lambda: cached_query(
+            spec["sql"],
+            params=spec.get("params"),
+            tables=spec.get("tables"),
+            ttl=spec.get("ttl", DEFAULT_TTL),
+            timeout_s=timeout_s,
+        )
+
+    results = run_parallel({name: task(spec) for name, spec in queries.items()}, timeout_s, max_workers)
+    return {
+        name: {"df": r["value"], "error": r["error"], "seconds": r["seconds"]}
+        for name, r in results.items()
+    }
+
+
+@st.cache_resource(show_spinner=False, ttl=CONNECTIVITY_TTL)
+def connectivity_check():
+    """
+    SELECT now() on a pooled connection, started in a background thread.
+
+    Returns a Future shared by every session for CONNECTIVITY_TTL seconds.
+    Its result is {"server_time", "seconds"}, or it raises the connection
+    error. The first check also opens the pool, so the landing page can
+    render while the first connection to Neon is still being set up.
+    """
+    def check():
+        start = time.perf_counter()
+        with span("connectivity_check", "db"), get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT now();")
+                server_time = cur.fetchone()[0]
+            conn.rollback()
+        return {"server_time": server_time, "seconds": time.perf_counter() - start}
+
+    executor = context_executor(1)
+    future = executor.submit(copy_context().run, check)
+    executor.shutdown(wait=False)
+    return future
@@ -0,0 +1,92 @@
+"""
+Aggregation cube for the Sales by Location charts.
+
+The report result is grouped only twice — by product × location and by
+date × product. Every other cut the charts need (per product, per
+location, per date, cumulative) is derived from those two small cuboids
+instead of re-scanning the result frame.
+
+chart_frames() then bounds what is actually plotted (top N categories plus
+"Lainnya", LTTB-downsampled trends), so the figure JSON stays small however
+wide the filter is.
+"""
+from chart_reduce import MAX_POINTS, TOP_N, bucket_others, downsample
+
+
+def trend_column(date_type):
+    """Column used on the x-axis of the trend charts for the chosen date type."""
+    # Hasil query tidak memuat batchdt, jadi batchdt memakai bnsperiod
+    return "createdt" if date_type == "createdt" else "bnsperiod"
+
+
+def build_cube(df, date_type):
+    """
+    Precompute the cuboids used by the chart tabs.
+
+    Returns a dict with the frames product, location, date,
+    product_location, date_product and cumulative, plus x_col.
+    """
+    x_col = trend_column(date_type)
+
+    # Dua pass atas data hasil query; NaN key dipertahankan agar turunan tetap lengkap
+    product_location = (
+        df.groupby(["namaProduk", "loccd"], dropna=False, observed=True)["total_qty"]
+        .sum().reset_index()
+    )
+    date_product = (
+        df.groupby([x_col, "namaProduk"], dropna=False, observed=True)["total_qty"]
+        .sum().reset_index()
+    )
+
+    # Cuboid turunan dari cuboid yang lebih kecil
+    product = (
+        product_location.groupby("namaProduk", observed=True)
+        .agg(total_qty=("total_qty", "sum"), jumlah_lokasi=("loccd", "nunique"))
+        .reset_index()
+    )
+    location = product_location.groupby("loccd", observed=True)["total_qty"].sum().reset_index()
+    date = date_product.groupby(x_col, observed=True)["total_qty"].sum().reset_index()
+
+    product_location = product_location.dropna(subset=["namaProduk", "loccd"]).reset_index(drop=True)
+    date_product = date_product.dropna(subset=[x_col, "namaProduk"]).reset_index(drop=True)
+
+    cumulative = date_product.sort_values([x_col, "namaProduk"]).reset_index(drop=True)
+    cumulative["cumulative"] = cumulative.groupby("namaProduk", observed=True)["total_qty"].cumsum()
+
+    return {
+        "x_col": x_col,
+        "product": product,
+        "location": location,
+        "date": date,
+        "product_location": product_location,
+        "date_product": date_product,
+        "cumulative": cumulative,
+    }
+
+
+def chart_frames(cube, top_n=TOP_N, max_points=MAX_POINTS):
+    """
+    Reduced frames for the charts: at most top_n products/locations (the
+    rest summed as "Lainnya") and at most max_points points per trend line.
+
+    Returns a dict with trend, trend_product, location_share, product_share,
+    product_location and cumulative.
+    """
+    x_col = cube["x_col"]
+    date_product = bucket_others(cube["date_product"], "namaProduk", "total_qty", top_n, keys=[x_col])
+
+    product_location = bucket_others(cube["product_location"], "namaProduk", "total_qty", top_n, keys=["loccd"])
+    product_location = bucket_others(product_location, "loccd", "total_qty", top_n, keys=["namaProduk"])
+
+    # Kumulatif dihitung ulang setelah bucketing agar "Lainnya" tetap benar
+    cumulative = date_product.sort_values([x_col, "namaProduk"]).reset_index(drop=True)
+    cumulative["cumulative"] = cumulative.groupby("namaProduk", observed=True)["total_qty"].cumsum()
+
+    return {
+        "trend": downsample(cube["date"], x_col, "total_qty", max_points),
+        "trend_product": downsample(date_product, x_col, "total_qty", max_points, group="namaProduk"),
+        "location_share": bucket_others(cube["location"], "loccd", "total_qty", top_n),
+        "product_share": bucket_others(cube["product"], "namaProduk", "total_qty", top_n),
+        "product_location": product_location,
+        "cumulative": downsample(cumulative, x_col, "cumulative", max_points, group="namaProduk"),
+    }
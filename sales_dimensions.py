@@ -0,0 +1,245 @@
+"""
+Product and location dimension tables for the Sales by Location filters.
+
+dim_product (kodeProduk, namaProduk) and dim_location (loccd) hold one row
+per member with first/last seen createdt and the number of fact rows. They
+are upserted from the chunks streamed during import, so the filter form
+reads a few hundred rows instead of running SELECT DISTINCT over sales_data.
+"""
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from db import get_connection, quote_ident
+from query_cache import cached_call, cached_query
+
+SOURCE_TABLE = "sales_data"
+PRODUCT_TABLE = "dim_product"
+LOCATION_TABLE = "dim_location"
+
+DIMENSION_KEYS = {
+    PRODUCT_TABLE: ["kodeProduk", "namaProduk"],
+    LOCATION_TABLE: ["loccd"],
+}
+DATE_COLUMN = "createdt"
+# Kolom yang dibaca summarize_chunk
+SUMMARY_COLUMNS = [k for keys in DIMENSION_KEYS.values() for k in keys] + [DATE_COLUMN]
+
+
+def _create_sql(table_name):
+    keys = DIMENSION_KEYS[table_name]
+    key_defs = ", ".join(f"{quote_ident(k)} TEXT NOT NULL" for k in keys)
+    return f"""
+        CREATE TABLE IF NOT EXISTS {quote_ident(table_name)} (
+            {key_defs},
+            first_seen DATE,
+            last_seen DATE,
+            row_count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY ({", ".join(quote_ident(k) for k in keys)})
+        );
+    """
+
+
+def _source_columns(cur, source_table):
+    cur.execute("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s
+    """, (source_table,))
+    return dict(cur.fetchall())
+
+
+def supported_dimensions(columns):
+    """Dimension tables whose key columns are all present in `columns`."""
+    return [t for t, keys in DIMENSION_KEYS.items() if all(k in columns for k in keys)]
+
+
+def rebuild_dimensions(conn, source_table=SOURCE_TABLE):
+    """Recreate the dimension tables from a full scan of source_table. Returns {table: rows}."""
+    result = {}
+    with conn.cursor() as cur:
+        columns = _source_columns(cur, source_table)
+        if DATE_COLUMN in columns:
+            date = quote_ident(DATE_COLUMN)
+            date_expr = date if columns[DATE_COLUMN] == "date" else f"{date}::date"
+        else:
+            date_expr = "NULL::date"
+
+        for table_name in supported_dimensions(columns):
+            keys = ", ".join(quote_ident(k) for k in DIMENSION_KEYS[table_name])
+            not_null = " AND ".join(f"{quote_ident(k)} IS NOT NULL" for k in DIMENSION_KEYS[table_name])
+            cur.execute(f"DROP TABLE IF EXISTS {quote_ident(table_name)};")
+            cur.execute(_create_sql(table_name))
+            cur.execute(f"""
+                INSERT INTO {quote_ident(table_name)} ({keys}, first_seen, last_seen, row_count)
+                SELECT {keys}, MIN({date_expr}), MAX({date_expr}), COUNT(*)
+                FROM {quote_ident(source_table)}
+                WHERE {not_null}
+                GROUP BY {keys};
+            """)
+            result[table_name] = cur.rowcount
+    conn.commit()
+    return result
+
+
+def summarize_chunk(chunk):
+    """
+    Per-dimension aggregates of one imported chunk: {table: DataFrame}.
+
+    Each frame has the key columns, the raw date, its parsed value (seen)
+    and row_count. Dates are parsed once per distinct value, not per row.
+    A chunk that is already aggregated (with a row_count column, e.g.
+    merge_staging's inserted_counts) is summed instead of counted.
+    """
+    summaries = {}
+    has_date = DATE_COLUMN in chunk.columns
+    for table_name in supported_dimensions(chunk.columns):
+        keys = DIMENSION_KEYS[table_name]
+        group_cols = keys + [DATE_COLUMN] if has_date else keys
+        counted = "row_count" in chunk.columns
+        grouped = chunk[group_cols + ["row_count"] * counted].dropna(subset=keys).groupby(group_cols, dropna=False)
+        if counted:
+            grouped = grouped["row_count"].sum().reset_index()
+        else:
+            grouped = grouped.size().rename("row_count").reset_index()
+        if has_date:
+            dates = grouped[DATE_COLUMN].dropna().unique()
+            parsed = pd.to_datetime(pd.Series(dates, dtype=object), format="mixed", errors="coerce")
+            grouped["seen"] = pd.to_datetime(grouped[DATE_COLUMN].map(dict(zip(dates, parsed))))
+        else:
+            grouped["seen"] = pd.NaT
+        summaries[table_name] = grouped
+    return summaries
+
+
+def merge_summaries(merge):
+    """
+    summarize_chunk() results of a merge_staging() run, for upsert_dimensions.
+
+    Inserted and updated rows count for the members they hold now; the
+    members updated rows held before the update lose those rows, so a
+    renamed product or moved location shows up under its new value.
+    """
+    summaries = []
+    for name, sign in [("inserted_counts", 1), ("updated_counts", 1), ("replaced_counts", -1)]:
+        counts = merge.get(name)
+        if counts is None or counts.empty:
+            continue
+        summary = summarize_chunk(counts.assign(row_count=counts["row_count"] * sign))
+        if sign < 0:
+            # Tanggal lama tidak memperlebar rentang first/last_seen
+            for grouped in summary.values():
+                grouped["seen"] = pd.NaT
+        summaries.append(summary)
+    return summaries
+
+
+def _date_or_none(value):
+    return None if pd.isna(value) else value.date()
+
+
+def upsert_dimensions(conn, summaries):
+    """
+    Merge a list of summarize_chunk() results into the dimension tables.
+
+    New members are inserted; existing members get their seen range widened
+    and row_count adjusted. Members left without rows (e.g. the old name of
+    an updated product) are removed. Returns {table: members touched}.
+    """
+    result = {}
+    with conn.cursor() as cur:
+        for table_name, keys in DIMENSION_KEYS.items():
+            frames = [s[table_name] for s in summaries if table_name in s]
+            if not frames:
+                continue
+            merged = (
+                pd.concat(frames, ignore_index=True)
+                .groupby(keys)
+                .agg(first_seen=("seen", "min"), last_seen=("seen", "max"), row_count=("row_count", "sum"))
+                .reset_index()
+            )
+            rows = [
+                (*key, _date_or_none(first), _date_or_none(last), int(count))
+                for *key, first, last, count in merged.itertuples(index=False, name=None)
+            ]
+
+            table = quote_ident(table_name)
+            key_list = ", ".join(quote_ident(k) for k in keys)
+            cur.execute(_create_sql(table_name))
+            execute_values(cur, f"""
+                INSERT INTO {table} ({key_list}, first_seen, last_seen, row_count)
+                VALUES %s
+                ON CONFLICT ({key_list}) DO UPDATE
+                SET first_seen = LEAST({table}.first_seen, EXCLUDED.first_seen),
+                    last_seen = GREATEST({table}.last_seen, EXCLUDED.last_seen),
+                    row_count = {table}.row_count + EXCLUDED.row_count;
+            """, rows, page_size=1000)
+            cur.execute(f"DELETE FROM {table} WHERE row_count <= 0;")
+            result[table_name] = len(rows)
+    conn.commit()
+    return result
+
+
+def dimensions_exist(conn):
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT to_regclass(%s) IS NOT NULL AND to_regclass(%s) IS NOT NULL;",
+            (quote_ident(PRODUCT_TABLE), quote_ident(LOCATION_TABLE)),
+        )
+        return cur.fetchone()[0]
+
+
+def cached_dimensions_exist():
+    def load():
+        with get_connection() as conn:
+            return dimensions_exist(conn)
+    return cached_call("dimensions_exist", load, tables=[PRODUCT_TABLE, LOCATION_TABLE])
+
+
+def product_options_query():
+    """Query spec (sql, tables) of the product filter: kodeProduk, namaProduk, produk_display."""
+    source = PRODUCT_TABLE if cached_dimensions_exist() else SOURCE_TABLE
+    return {
+        "sql": f"""
+            SELECT DISTINCT "kodeProduk", "namaProduk",
+                   CONCAT("kodeProduk", ' - ', "namaProduk") AS produk_display
+            FROM {quote_ident(source)}
+            WHERE "kodeProduk" IS NOT NULL AND "namaProduk" IS NOT NULL
+            ORDER BY "kodeProduk"
+        """,
+        "tables": [source],
+    }
+
+
+def location_options_query():
+    """Query spec (sql, tables) of the location filter: loccd."""
+    source = LOCATION_TABLE if cached_dimensions_exist() else SOURCE_TABLE
+    return {
+        "sql": f"""
+            SELECT DISTINCT loccd
+            FROM {quote_ident(source)}
+            WHERE loccd IS NOT NULL
+            ORDER BY loccd
+        """,
+        "tables": [source],
+    }
+
+
+def product_options():
+    spec = product_options_query()
+    return cached_query(spec["sql"], tables=spec["tables"])
+
+
+def location_options():
+    spec = location_options_query()
+    return cached_query(spec["sql"], tables=spec["tables"])
+
+
+def dimension_counts(conn):
+    """{table: members} of the existing dimension tables."""
+    counts = {}
+    with conn.cursor() as cur:
+        for table_name in DIMENSION_KEYS:
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (quote_ident(table_name),))
+            if cur.fetchone()[0]:
+                cur.execute(f"SELECT COUNT(*) FROM {quote_ident(table_name)};")
+                counts[table_name] = cur.fetchone()[0]
+    return counts
@@ -0,0 +1,313 @@
+"""
+Monthly range partitioning of sales_data.
+
+The table is partitioned on a period/date column (bnsperiod by default) with
+one partition per month, named <table>_pYYYYMM, plus a DEFAULT partition for
+rows without a usable period. Partitions for new months are created before
+their rows are loaded (see ensure_partitions), so imports never have to
+split the default partition.
+
+Reports that filter on the partition column only scan the matching
+partitions (partition pruning), and old months can be detached, moved to the
+archive schema or dropped as a whole instead of being DELETEd row by row.
+
+DATE, TIMESTAMP and ISO-formatted TEXT columns are supported; TEXT bounds
+are ISO strings, which sort like dates. Values in any other format
+('2024-03' sorts before '2024-03-01') would be routed to the wrong month,
+so TEXT partition columns get a CHECK constraint that only admits ISO dates.
+"""
+import datetime
+
+import pandas as pd
+
+from db import quote_ident
+
+PARTITION_COLUMNS = ["bnsperiod", "createdt"]
+DEFAULT_PARTITION_COLUMN = "bnsperiod"
+ARCHIVE_SCHEMA = "archive"
+MIGRATION_SUFFIX = "__partitioned"
+DEFAULT_SUFFIX = "_pdefault"
+# Hanya teks ISO (YYYY-MM-DD...) yang terurut sesuai batas partisi bulanan
+ISO_DATE_PATTERN = r"^[0-9]{4}-[0-9]{2}-[0-9]{2}"
+
+def partition_key(conn, table_name):
+    """(column, type) the table is range-partitioned on, or None if it is not partitioned."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+            FROM pg_partitioned_table p
+            JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+            WHERE p.partrelid = to_regclass(%s) AND p.partstrat = 'r';
+        """, (quote_ident(table_name),))
+        row = cur.fetchone()
+    return tuple(row) if row else None
+
+
+def list_partitions(conn, table_name):
+    """Partitions of table_name with their bounds, estimated rows and size."""
+    return pd.read_sql("""
+        SELECT c.relname AS partition,
+               pg_get_expr(c.relpartbound, c.oid) AS bounds,
+               GREATEST(c.reltuples, 0)::bigint AS rows_estimate,
+               pg_size_pretty(pg_total_relation_size(c.oid)) AS size,
+               pg_total_relation_size(c.oid) AS size_bytes
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname;
+    """, conn, params=(quote_ident(table_name),))
+
+
+def months_of(values):
+    """First days of the months of values (dates or date text); unparseable values are ignored."""
+    parsed = pd.to_datetime(pd.Series(list(values), dtype=object), errors="coerce").dropna()
+    return {datetime.date(p.year, p.month, 1) for p in parsed.dt.to_period("M").unique()}
+
+
+def month_bounds(month):
+    """[first day of month, first day of the next month)."""
+    following = datetime.date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return month, following
+
+
+def partition_name(table_name, month):
+    return f"{table_name}_p{month:%Y%m}"
+
+
+def is_text_key(column_type):
+    """True when a partition column of column_type needs ISO text values (see ISO_DATE_PATTERN)."""
+    return not column_type.lower().startswith(("date", "timestamp"))
+
+
+def _bound_params(months, column_type):
+    if not is_text_key(column_type):
+        return list(months)
+    return [m.isoformat() for m in months]
+
+
+def _default_partition(conn, table_name):
+    partitions = list_partitions(conn, table_name)
+    default = partitions.loc[partitions["bounds"] == "DEFAULT", "partition"]
+    return default.iloc[0] if not default.empty else None
+
+
+def _create_partition(cur, table_name, name, column, bounds, default):
+    """
+    CREATE ... PARTITION OF for one month. Rows of that month already in the
+    DEFAULT partition would make the CREATE fail, so they are moved out first:
+    the default is detached, the partition created, the rows re-inserted
+    through the parent and the default attached again.
+    """
+    col = quote_ident(column)
+    create_sql = (
+        f"CREATE TABLE IF NOT EXISTS {quote_ident(name)} PARTITION OF {quote_ident(table_name)} "
+        f"FOR VALUES FROM (%s) TO (%s);"
+    )
+    if default:
+        cur.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {quote_ident(default)} WHERE {col} >= %s AND {col} < %s);",
+            bounds,
+        )
+        if cur.fetchone()[0]:
+            cur.execute(f"ALTER TABLE {quote_ident(table_name)} DETACH PARTITION {quote_ident(default)};")
+            cur.execute(create_sql, bounds)
+            cur.execute(f"""
+                WITH moved AS (
+                    DELETE FROM {quote_ident(default)} WHERE {col} >= %s AND {col} < %s RETURNING *
+                )
+                INSERT INTO {quote_ident(table_name)} SELECT * FROM moved;
+            """, bounds)
+            cur.execute(
+                f"ALTER TABLE {quote_ident(table_name)} ATTACH PARTITION {quote_ident(default)} DEFAULT;"
+            )
+            return
+    cur.execute(create_sql, bounds)
+
+
+def partitioned_table_sql(table_name, column_defs, column):
+    """CREATE TABLE ... PARTITION BY RANGE for column_defs ({column: sql type})."""
+    defs = ", ".join(f"{quote_ident(c)} {sql_type}" for c, sql_type in column_defs.items())
+    if is_text_key(column_defs[column]):
+        defs += f", CHECK ({quote_ident(column)} ~ '{ISO_DATE_PATTERN}')"
+    return (
+        f"CREATE TABLE IF NOT EXISTS {quote_ident(table_name)} ({defs}) "
+        f"PARTITION BY RANGE ({quote_ident(column)});"
+    )
+
+
+def create_partitioned_table(conn, table_name, column_defs, column=DEFAULT_PARTITION_COLUMN):
+    """Create a partitioned table with its DEFAULT partition (no commit)."""
+    if column not in column_defs:
+        raise ValueError(f"Kolom partisi '{column}' tidak ada di tabel.")
+    with conn.cursor() as cur:
+        cur.execute(partitioned_table_sql(table_name, column_defs, column))
+        cur.execute(
+            f"CREATE TABLE IF NOT EXISTS {quote_ident(table_name + DEFAULT_SUFFIX)} "
+            f"PARTITION OF {quote_ident(table_name)} DEFAULT;"
+        )
+
+
+def ensure_partitions(conn, table_name, values):
+    """
+    Create the monthly partitions needed for values (no commit).
+
+    values are raw partition column values (dates or date text); NULL and
+    unparseable values go to the DEFAULT partition. Rows of a new month that
+    are already in the DEFAULT partition are moved into it. Returns the
+    names of the partitions that were created. Does nothing for
+    unpartitioned tables.
+    """
+    key = partition_key(conn, table_name)
+    if not key:
+        return []
+    column, column_type = key
+    months = months_of(values)
+    existing = set(list_partitions(conn, table_name)["partition"])
+    default = None
+
+    created = []
+    with conn.cursor() as cur:
+        for month in sorted(months):
+            name = partition_name(table_name, month)
+            if name in existing:
+                continue
+            if default is None:
+                default = _default_partition(conn, table_name) or ""
+            bounds = _bound_params(month_bounds(month), column_type)
+            _create_partition(cur, table_name, name, column, bounds, default)
+            created.append(name)
+    return created
+
+
+def ensure_partitions_from_table(conn, table_name, source_table):
+    """ensure_partitions() for the partition column values found in source_table (e.g. a staging table)."""
+    key = partition_key(conn, table_name)
+    if not key:
+        return []
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT DISTINCT {quote_ident(key[0])} FROM {quote_ident(source_table)};")
+        values = [row[0] for row in cur.fetchall()]
+    return ensure_partitions(conn, table_name, values)
+
+
+def _column_defs(cur, table_name):
+    cur.execute("""
+        SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+        FROM pg_attribute a
+        WHERE a.attrelid = to_regclass(%s) AND a.attnum > 0 AND NOT a.attisdropped
+        ORDER BY a.attnum;
+    """, (quote_ident(table_name),))
+    return dict(cur.fetchall())
+
+
+def migrate_to_partitioned(conn, table_name, column=DEFAULT_PARTITION_COLUMN, progress=None):
+    """
+    Rebuild an unpartitioned table as a partitioned one, in one transaction.
+
+    The rows are copied into a new partitioned table, the old table is
+    dropped and the new one takes its name; its indexes are recreated on the
+    partitioned table. The source is locked against writes for the whole
+    transaction so rows written during the copy are not lost; readers keep
+    seeing the old table until it is dropped. Returns {"rows", "partitions",
+    "indexes", "skipped_indexes"}.
+    """
+    def step(message):
+        if progress:
+            progress(message)
+
+    if partition_key(conn, table_name):
+        raise ValueError(f"Tabel '{table_name}' sudah terpartisi.")
+    staging = table_name + MIGRATION_SUFFIX
+    with conn.cursor() as cur:
+        columns = _column_defs(cur, table_name)
+        if not columns:
+            raise ValueError(f"Tabel '{table_name}' tidak ditemukan.")
+        # Tahan INSERT/UPDATE/DELETE sampai commit; SELECT tetap jalan
+        step("Mengunci tabel sumber ...")
+        cur.execute(f"LOCK TABLE {quote_ident(table_name)} IN SHARE ROW EXCLUSIVE MODE;")
+        if column in columns and is_text_key(columns[column]):
+            cur.execute(
+                f"SELECT COUNT(*) FROM {quote_ident(table_name)} WHERE NOT ({quote_ident(column)} ~ %s);",
+                (ISO_DATE_PATTERN,),
+            )
+            invalid = cur.fetchone()[0]
+            if invalid:
+                raise ValueError(
+                    f"{invalid:,} nilai '{column}' bukan tanggal ISO (YYYY-MM-DD); "
+                    "perbaiki dulu sebelum dipartisi."
+                )
+        cur.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = 'public' AND tablename = %s;",
+            (table_name,),
+        )
+        indexes = cur.fetchall()
+
+        step("Membuat tabel terpartisi ...")
+        cur.execute(f"DROP TABLE IF EXISTS {quote_ident(staging)};")
+        create_partitioned_table(conn, staging, columns, column)
+        cur.execute(f"SELECT DISTINCT {quote_ident(column)} FROM {quote_ident(table_name)};")
+        partitions = ensure_partitions(conn, staging, [row[0] for row in cur.fetchall()])
+
+        step(f"Menyalin data ke {len(partitions)} partisi ...")
+        column_list = ", ".join(quote_ident(c) for c in columns)
+        cur.execute(
+            f"INSERT INTO {quote_ident(staging)} ({column_list}) "
+            f"SELECT {column_list} FROM {quote_ident(table_name)};"
+        )
+        rows = cur.rowcount
+
+        step("Mengganti tabel lama ...")
+        cur.execute(f"DROP TABLE {quote_ident(table_name)};")
+        cur.execute(f"ALTER TABLE {quote_ident(staging)} RENAME TO {quote_ident(table_name)};")
+        # Nama partisi mengikuti nama tabel akhir
+        for name in partitions + [staging + DEFAULT_SUFFIX]:
+            final = table_name + name[len(staging):]
+            cur.execute(f"ALTER TABLE {quote_ident(name)} RENAME TO {quote_ident(final)};")
+
+        step("Membuat ulang index ...")
+        created, skipped = [], []
+        for name, definition in indexes:
+            # Definisi lama merujuk ke public.<table_name>, yang kini tabel terpartisi.
+            # Index UNIQUE tanpa kolom partisi tidak didukung → dilewati.
+            cur.execute("SAVEPOINT recreate_index;")
+            try:
+                cur.execute(definition + ";")
+                cur.execute("RELEASE SAVEPOINT recreate_index;")
+                created.append(name)
+            except Exception:
+                cur.execute("ROLLBACK TO SAVEPOINT recreate_index;")
+                skipped.append(name)
+        cur.execute(f"ANALYZE {quote_ident(table_name)};")
+    conn.commit()
+    return {
+        "rows": rows,
+        "partitions": [table_name + name[len(staging):] for name in partitions],
+        "indexes": created,
+        "skipped_indexes": skipped,
+    }
+
+
+def partition_dates(conn, partition, column="createdt"):
+    """Distinct values of column in one partition (e.g. to refresh the rollup after removing it)."""
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT DISTINCT {quote_ident(column)} FROM {quote_ident(partition)};")
+        return [row[0] for row in cur.fetchall()]
+
+
+def detach_partition(conn, table_name, partition, action="detach"):
+    """
+    Remove one partition from table_name without deleting rows.
+
+    action: 'detach' keeps it as a standalone table, 'archive' also moves it
+    to the archive schema, 'drop' deletes it.
+    """
+    if action not in ("detach", "archive", "drop"):
+        raise ValueError(f"Aksi tidak dikenal: {action}")
+    with conn.cursor() as cur:
+        cur.execute(f"ALTER TABLE {quote_ident(table_name)} DETACH PARTITION {quote_ident(partition)};")
+        if action == "archive":
+            cur.execute(f"CREATE SCHEMA IF NOT EXISTS {quote_ident(ARCHIVE_SCHEMA)};")
+            cur.execute(f"ALTER TABLE {quote_ident(partition)} SET SCHEMA {quote_ident(ARCHIVE_SCHEMA)};")
+        elif action == "drop":
+            cur.execute(f"DROP TABLE {quote_ident(partition)};")
+    conn.commit()
@@ -0,0 +1,131 @@
+"""
+SQL builders for the sales reports (dashboard and sales by location).
+
+Kept out of the pages so the benchmark suite runs exactly the queries the
+pages send. Every builder returns plain SQL plus parameters; executing
+(and caching) them is up to the caller.
+"""
+from db import quote_ident
+from sales_rollup import ROLLUP_TABLE, SOURCE_TABLE, can_use_rollup
+from sql_filters import any_clause, date_range_clause, pairs_clause, where_clause
+
+NUMERIC_TOTAL_COLUMNS = ["tdp", "totalQty_contrib"]
+NUMERIC_TYPES = ("integer", "bigint", "numeric")
+
+
+def date_expr(column, column_types):
+    # Untuk SELECT/GROUP BY; filter memakai date_range_clause (tanpa cast untuk kolom DATE)
+    if column_types.get(column) == "date":
+        return quote_ident(column)
+    return f"({quote_ident(column)}::date)"
+
+
+def dashboard_source(rollup_state):
+    """(count_table, count_expr, use_rollup) for the dashboard transaction counts."""
+    use_rollup = can_use_rollup(rollup_state, ["createdt", "namaProduk"])
+    if use_rollup:
+        return ROLLUP_TABLE, "SUM(row_count)", True
+    return SOURCE_TABLE, "COUNT(*)", False
+
+
+def dashboard_bounds_query(column_types, count_table):
+    date_col = date_expr("createdt", column_types)
+    return f"SELECT MIN({date_col}) AS min_dt, MAX({date_col}) AS max_dt FROM {count_table};"
+
+
+def dashboard_queries(column_types, count_table, count_expr, start_date=None, end_date=None, top_n=10):
+    """
+    Independent dashboard queries as a run_queries() spec: totals, plus daily
+    transactions when createdt exists and top products when namaProduk exists.
+    """
+    has_createdt = "createdt" in column_types
+    where = ""
+    params = []
+    if has_createdt:
+        where, params = where_clause([date_range_clause("createdt", start_date, end_date, column_types)])
+
+    total_exprs = ["COUNT(*) AS total_rows"]
+    for col in NUMERIC_TOTAL_COLUMNS:
+        if col in column_types:
+            total_exprs.append(f"SUM({quote_ident(col)}::numeric) AS {quote_ident(col)}")
+    queries = {"totals": {"sql": f"SELECT {', '.join(total_exprs)} FROM {SOURCE_TABLE} {where};", "params": params}}
+    if has_createdt:
+        queries["daily"] = {"sql": f"""
+            SELECT {date_expr('createdt', column_types)} AS createdt_parsed, {count_expr} AS transactions
+            FROM {count_table}
+            {where} AND createdt IS NOT NULL
+            GROUP BY 1
+            ORDER BY 1;
+        """, "params": params}
+    if "namaProduk" in column_types:
+        queries["top"] = {"sql": f"""
+            SELECT "namaProduk", {count_expr} AS jumlah
+            FROM {count_table}
+            {where or "WHERE TRUE"} AND "namaProduk" IS NOT NULL
+            GROUP BY 1
+            ORDER BY jumlah DESC
+            LIMIT %s;
+        """, "params": params + [top_n]}
+    return queries
+
+
+def split_product_display(produk):
+    """'P001 - Produk A' -> ('P001', 'Produk A')."""
+    kode, nama = produk.split(" - ", 1)
+    return kode, nama
+
+
+def sales_by_location_query(column_types, date_type, start_date, end_date,
+                            products=(), locations=(), rollup_state=None):
+    """
+    Sales per period/date/location/product for the report page.
+
+    products is a list of (kodeProduk, namaProduk) pairs, locations a list of
+    loccd. date_type must be one of sql_filters.DATE_FILTER_COLUMNS. The
+    daily rollup is used when it can answer every filter. Returns a dict
+    with query, params, source_table, use_rollup and date_type.
+    """
+    # Cast hanya untuk kolom TEXT (tabel lama); kolom DATE/NUMERIC dipakai langsung
+    qty_expr = quote_ident("totalQty_contrib")
+    if column_types.get("totalQty_contrib") not in NUMERIC_TYPES:
+        qty_expr += "::numeric"
+
+    # ⚡ Pakai rollup harian bila semua filter bisa dijawab dari sana
+    filter_columns = [date_type]
+    if products:
+        filter_columns += ["kodeProduk", "namaProduk"]
+    if locations:
+        filter_columns.append("loccd")
+
+    use_rollup = can_use_rollup(rollup_state, filter_columns)
+    source_table = ROLLUP_TABLE if use_rollup else SOURCE_TABLE
+    measure_expr = "total_qty" if use_rollup else qty_expr
+
+    # 🎯 Filter sargable: rentang half-open (tanpa cast untuk DATE/TIMESTAMP), multi-select sebagai satu array bertipe
+    clauses = [date_range_clause(date_type, start_date, end_date, column_types)]
+    if products:
+        clauses.append(pairs_clause(["kodeProduk", "namaProduk"], products, column_types))
+    if locations:
+        clauses.append(any_clause("loccd", locations, column_types))
+    where, params = where_clause(clauses)
+
+    query = f"""
+        SELECT
+            bnsperiod,
+            createdt,
+            loccd,
+            "kodeProduk",
+            "namaProduk",
+            SUM({measure_expr}) AS total_qty
+        FROM {source_table}
+        {where}
+        GROUP BY bnsperiod, createdt, loccd, "kodeProduk", "namaProduk"
+        ORDER BY bnsperiod DESC, createdt DESC, loccd, total_qty DESC
+    """
+    return {
+        "query": query,
+        "params": params,
+        "source_table": source_table,
+        "use_rollup": use_rollup,
+        "date_type": date_type,
+    }
@@ -0,0 +1,158 @@
+"""
+Pre-aggregated daily rollup of sales_data for the Sales by Location report.
+
+Grain: bnsperiod × createdt × batchdt × loccd × kodeProduk × namaProduk, with
+SUM(totalQty_contrib) and the number of raw rows. The rollup columns keep the
+exact types of sales_data, so every filter the report applies to the raw
+table can be applied to the rollup unchanged.
+
+After an import only the affected createdt values are recomputed
+(DELETE + INSERT ... SELECT for those days); a replace import rebuilds it.
+"""
+from db import get_connection, quote_ident
+from query_cache import cached_call
+
+SOURCE_TABLE = "sales_data"
+ROLLUP_TABLE = "sales_daily_rollup"
+STATE_TABLE = "rollup_state"
+
+DATE_COLUMNS = ["createdt", "batchdt", "bnsperiod"]
+DIMENSIONS = ["bnsperiod", "createdt", "batchdt", "loccd", "kodeProduk", "namaProduk"]
+MEASURE = "totalQty_contrib"
+
+# Kolom yang bisa difilter dari rollup; filter lain harus ke tabel raw
+FILTERABLE_COLUMNS = set(DIMENSIONS)
+
+
+def _column_types(cur, table_name):
+    cur.execute("""
+        SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+        FROM pg_attribute a
+        WHERE a.attrelid = to_regclass(%s) AND a.attnum > 0 AND NOT a.attisdropped
+    """, (quote_ident(table_name),))
+    return dict(cur.fetchall())
+
+
+def source_supports_rollup(conn, source_table=SOURCE_TABLE):
+    with conn.cursor() as cur:
+        columns = _column_types(cur, source_table)
+    return all(c in columns for c in DIMENSIONS + [MEASURE])
+
+
+def _select_sql(source_table, where=""):
+    dims = ", ".join(quote_ident(c) for c in DIMENSIONS)
+    return f"""
+        SELECT {dims},
+               SUM({quote_ident(MEASURE)}::numeric) AS total_qty,
+               COUNT(*) AS row_count
+        FROM {quote_ident(source_table)}
+        {where}
+        GROUP BY {dims}
+    """
+
+
+def _record_state(cur, source_table):
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            rollup_table TEXT PRIMARY KEY,
+            source_table TEXT NOT NULL,
+            refreshed_at TIMESTAMPTZ NOT NULL,
+            rollup_rows BIGINT
+        );
+    """)
+    cur.execute(f"SELECT COUNT(*) FROM {quote_ident(ROLLUP_TABLE)};")
+    rows = cur.fetchone()[0]
+    cur.execute(f"""
+        INSERT INTO {STATE_TABLE} (rollup_table, source_table, refreshed_at, rollup_rows)
+        VALUES (%s, %s, now(), %s)
+        ON CONFLICT (rollup_table) DO UPDATE
+        SET source_table = EXCLUDED.source_table,
+            refreshed_at = EXCLUDED.refreshed_at,
+            rollup_rows = EXCLUDED.rollup_rows;
+    """, (ROLLUP_TABLE, source_table, rows))
+    return rows
+
+
+def rebuild_rollup(conn, source_table=SOURCE_TABLE):
+    """Drop and rebuild the rollup from the full source table."""
+    rollup = quote_ident(ROLLUP_TABLE)
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {rollup};")
+        cur.execute(f"CREATE TABLE {rollup} AS {_select_sql(source_table)};")
+        for col in DATE_COLUMNS:
+            cur.execute(
+                f"CREATE INDEX ON {rollup} ({quote_ident(col)}, {quote_ident('loccd')});"
+            )
+        cur.execute(f"ANALYZE {rollup};")
+        rows = _record_state(cur, source_table)
+    conn.commit()
+    return rows
+
+
+def refresh_rollup(conn, createdt_values, source_table=SOURCE_TABLE):
+    """
+    Recompute the rollup rows of the given createdt values only.
+
+    createdt_values are the raw values seen during import (str or date);
+    None/NaN stands for rows without createdt. Builds the rollup first if it
+    does not exist yet.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (quote_ident(ROLLUP_TABLE),))
+        if not cur.fetchone()[0]:
+            conn.commit()
+            return rebuild_rollup(conn, source_table)
+
+        createdt_type = _column_types(cur, source_table)["createdt"]
+        values = sorted({str(v) for v in createdt_values if v is not None and v == v})
+        has_null = any(v is None or v != v for v in createdt_values)
+
+        createdt = quote_ident("createdt")
+        condition = f"{createdt} = ANY(%s::{createdt_type}[])"
+        if has_null:
+            condition = f"({condition} OR {createdt} IS NULL)"
+
+        cur.execute(f"DELETE FROM {quote_ident(ROLLUP_TABLE)} WHERE {condition};", (values,))
+        cur.execute(
+            f"INSERT INTO {quote_ident(ROLLUP_TABLE)} {_select_sql(source_table, 'WHERE ' + condition)};",
+            (values,),
+        )
+        rows = _record_state(cur, source_table)
+    conn.commit()
+    return rows
+
+
+def rollup_state(conn):
+    """State row of the rollup as a dict, or None if it has never been built."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT to_regclass(%s) IS NOT NULL AND to_regclass(%s) IS NOT NULL;",
+            (STATE_TABLE, quote_ident(ROLLUP_TABLE)),
+        )
+        if not cur.fetchone()[0]:
+            return None
+        cur.execute(
+            f"SELECT source_table, refreshed_at, rollup_rows FROM {STATE_TABLE} WHERE rollup_table = %s;",
+            (ROLLUP_TABLE,),
+        )
+        row = cur.fetchone()
+    if not row:
+        return None
+    return {"source_table": row[0], "refreshed_at": row[1], "rollup_rows": row[2]}
+
+
+def cached_rollup_state():
+    """rollup_state() through the query cache; invalidated when the rollup is refreshed."""
+    def load():
+        with get_connection() as conn:
+            return rollup_state(conn)
+    return cached_call("rollup_state", load, tables=[ROLLUP_TABLE, STATE_TABLE])
+
+
+def can_use_rollup(state, filter_columns, source_table=SOURCE_TABLE):
+    """True if a query on source_table filtered on filter_columns can read the rollup."""
+    return (
+        state is not None
+        and state["source_table"] == source_table
+        and set(filter_columns) <= FILTERABLE_COLUMNS
+    )
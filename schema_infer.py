@@ -0,0 +1,222 @@
+"""
+Column type inference and coercion for CSV imports.
+
+infer_schema() looks at a sample (all values as str) and proposes a native
+PostgreSQL type per column. coerce_chunk() validates/normalizes every chunk
+against that schema during the streaming load and splits off the rows that
+do not fit, so they can be written to a rejects table instead of failing the
+whole COPY.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from db import quote_ident
+
+TYPE_OPTIONS = ["TEXT", "VARCHAR", "INTEGER", "BIGINT", "NUMERIC", "DATE", "TIMESTAMP"]
+
+# Tanpa "%Y-%m": periode bulanan ("2024-01") tetap teks, bukan tanggal 1 bulan itu
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d", "%d-%m-%Y", "%m/%d/%Y"]
+TIMESTAMP_FORMATS = [
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M",
+]
+
+INT32_MAX = 2**31 - 1
+INT64_MAX = 2**63 - 1
+
+# Kolom dianggap "low-cardinality" bila nilai uniknya sedikit → VARCHAR(n)
+LOW_CARDINALITY_RATIO = 0.05
+LOW_CARDINALITY_MAX = 1000
+VARCHAR_MAX = 255
+
+_INT_PATTERN = r"^[+-]?\d+$"
+_NUMERIC_PATTERN = r"^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$"
+_LEADING_ZERO_PATTERN = r"^[+-]?0\d"
+
+
+def _matching_format(values, formats):
+    for fmt in formats:
+        parsed = pd.to_datetime(values, format=fmt, errors="coerce")
+        if parsed.notna().all():
+            return fmt
+    return None
+
+
+def infer_column(series):
+    """Return {"type": ..., "format": ..., "length": ...} for one str column."""
+    values = series.dropna().astype(str).str.strip()
+    values = values[values != ""]
+    if values.empty:
+        return {"type": "TEXT", "format": None, "length": None}
+
+    is_numeric = values.str.match(_NUMERIC_PATTERN).all()
+    # Kode dengan leading zero (mis. "007") tetap teks, bukan angka
+    has_leading_zero = is_numeric and values.str.match(_LEADING_ZERO_PATTERN).any()
+
+    if is_numeric and not has_leading_zero:
+        if values.str.match(_INT_PATTERN).all():
+            max_abs = pd.to_numeric(values).abs().max()
+            if max_abs <= INT32_MAX:
+                return {"type": "INTEGER", "format": None, "length": None}
+            if max_abs <= INT64_MAX:
+                return {"type": "BIGINT", "format": None, "length": None}
+        return {"type": "NUMERIC", "format": None, "length": None}
+
+    if not has_leading_zero:
+        fmt = _matching_format(values, DATE_FORMATS)
+        if fmt:
+            return {"type": "DATE", "format": fmt, "length": None}
+        fmt = _matching_format(values, TIMESTAMP_FORMATS)
+        if fmt:
+            return {"type": "TIMESTAMP", "format": fmt, "length": None}
+
+    max_len = int(values.str.len().max())
+    n_unique = values.nunique()
+    is_low_cardinality = n_unique <= LOW_CARDINALITY_MAX and n_unique <= max(len(values) * LOW_CARDINALITY_RATIO, 1)
+    if is_low_cardinality and max_len <= VARCHAR_MAX:
+        # Beri ruang untuk nilai yang lebih panjang dari sampel
+        length = min(max(32, 2 ** int(np.ceil(np.log2(max_len * 2)))), VARCHAR_MAX)
+        return {"type": "VARCHAR", "format": None, "length": length}
+
+    return {"type": "TEXT", "format": None, "length": None}
+
+
+def infer_schema(sample):
+    """Infer a schema dict {column: spec} from a sample DataFrame of str."""
+    return {col: infer_column(sample[col]) for col in sample.columns}
+
+
+def sql_type(spec):
+    if spec["type"] == "VARCHAR":
+        return f"VARCHAR({spec.get('length') or VARCHAR_MAX})"
+    return spec["type"]
+
+
+def create_table_sql(table_name, schema):
+    column_defs = ", ".join(f"{quote_ident(col)} {sql_type(spec)}" for col, spec in schema.items())
+    return f"CREATE TABLE IF NOT EXISTS {quote_ident(table_name)} ({column_defs});"
+
+
+def schema_from_table(conn, table_name):
+    """Read the schema of an existing table, or None if it does not exist."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT column_name, data_type, character_maximum_length
+            FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = %s
+            ORDER BY ordinal_position;
+        """, (table_name,))
+        rows = cur.fetchall()
+    if not rows:
+        return None
+
+    type_map = {
+        "integer": "INTEGER", "smallint": "INTEGER", "bigint": "BIGINT",
+        "numeric": "NUMERIC", "double precision": "NUMERIC", "real": "NUMERIC",
+        "date": "DATE", "timestamp without time zone": "TIMESTAMP",
+        "timestamp with time zone": "TIMESTAMP", "character varying": "VARCHAR",
+    }
+    return {
+        name: {"type": type_map.get(data_type, "TEXT"), "format": None, "length": max_len}
+        for name, data_type, max_len in rows
+    }
+
+
+def _coerce_column(values, spec):
+    """Return (normalized values, mask of values that failed coercion)."""
+    kind = spec["type"]
+    present = values.notna()
+
+    if kind in ("INTEGER", "BIGINT", "NUMERIC"):
+        stripped = values.str.strip()
+        numbers = pd.to_numeric(stripped, errors="coerce")
+        ok = numbers.notna()
+        if kind != "NUMERIC":
+            limit = INT32_MAX if kind == "INTEGER" else INT64_MAX
+            ok &= stripped.str.match(_INT_PATTERN, na=False) & (numbers.abs() <= limit)
+        # Teks asli dikirim ke COPY agar presisi NUMERIC tidak hilang lewat float
+        return stripped.where(ok), present & ~ok
+
+    if kind in ("DATE", "TIMESTAMP"):
+        fmt = spec.get("format") or "mixed"
+        parsed = pd.to_datetime(values.str.strip(), format=fmt, errors="coerce")
+        out_fmt = "%Y-%m-%d" if kind == "DATE" else "%Y-%m-%d %H:%M:%S.%f"
+        ok = parsed.notna()
+        return parsed.dt.strftime(out_fmt).where(ok), present & ~ok
+
+    if spec.get("pattern"):
+        # Teks yang wajib berformat tertentu (mis. kolom partisi TEXT: tanggal ISO)
+        ok = values.str.strip().str.match(spec["pattern"], na=False)
+        if kind == "VARCHAR" and spec.get("length"):
+            ok &= values.str.len() <= spec["length"]
+        return values.where(ok), present & ~ok
+
+    if kind == "VARCHAR" and spec.get("length"):
+        ok = values.str.len() <= spec["length"]
+        return values.where(ok), present & ~ok
+
+    return values, pd.Series(False, index=values.index)
+
+
+def coerce_chunk(chunk, schema):
+    """
+    Coerce a chunk of str values to the schema.
+
+    Returns (good_rows, rejects) where rejects is a DataFrame with the row
+    number, the first failing column, and the original row as JSON.
+    """
+    coerced = {}
+    failed = pd.DataFrame(index=chunk.index)
+    for col in chunk.columns:
+        spec = schema.get(col, {"type": "TEXT"})
+        coerced[col], failed[col] = _coerce_column(chunk[col], spec)
+
+    bad_rows = failed.any(axis=1)
+    good = pd.DataFrame(coerced, index=chunk.index)[~bad_rows]
+
+    if not bad_rows.any():
+        return good, None
+
+    bad = chunk[bad_rows]
+    bad_records = bad.astype(object).where(bad.notna(), None).to_dict("records")
+    rejects = pd.DataFrame({
+        "source_row": bad.index + 1,
+        "error_column": failed[bad_rows].idxmax(axis=1),
+        "row_data": [json.dumps(r, ensure_ascii=False, default=str) for r in bad_records],
+    })
+    rejects["error"] = [
+        f"nilai {bad.at[idx, col]!r} tidak valid untuk {sql_type(schema[col])}"
+        for idx, col in zip(bad.index, rejects["error_column"])
+    ]
+    return good, rejects
+
+
+def rejects_table_name(table_name):
+    return f"{table_name}_rejects"
+
+
+def write_rejects(cur, table_name, rejects):
+    """Append rejected rows to <table>_rejects, creating it if needed."""
+    rejects_table = quote_ident(rejects_table_name(table_name))
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {rejects_table} (
+            id BIGSERIAL PRIMARY KEY,
+            rejected_at TIMESTAMPTZ DEFAULT now(),
+            source_row BIGINT,
+            error_column TEXT,
+            error TEXT,
+            row_data JSONB
+        );
+    """)
+    rows = [
+        (int(r.source_row), r.error_column, r.error, r.row_data)
+        for r in rejects.itertuples(index=False)
+    ]
+    execute_values(
+        cur,
+        f"INSERT INTO {rejects_table} (source_row, error_column, error, row_data) VALUES %s",
+        rows,
+    )
@@ -0,0 +1,63 @@
+"""
+Split CV engine used by the Split CV page (split_cv_page.py) and the benchmarks.
+
+The per-country split percentages live in COUNTRY_RULES. Adding a country is
+a one-line change there; the calculation itself is column-wide NumPy and
+never loops over rows.
+"""
+import numpy as np
+import pandas as pd
+
+# 🌏 Rules per country: porsi CV PLAN A dan CV RO yang masuk ke hasil split
+COUNTRY_RULES = {
+    "ID": {"plan_a": 0.6, "ro": 0.4},
+    "MY": {"plan_a": 0.5, "ro": 0.5},
+}
+
+# Country yang tidak ada di COUNTRY_RULES memakai rules ini
+DEFAULT_COUNTRY = "ID"
+
+EXPECTED_COLUMNS = [
+    "MEMBER ID", "MEMBER NAME", "COUNTRY", "CV PLAN A", "CV RO",
+    "TOTAL CV C/F", "BALANCE C/F", "GRAND TOTAL"
+]
+
+
+def describe_rules(rules=None):
+    """Human readable summary, e.g. 'ID 60/40, MY 50/50'."""
+    rules = rules or COUNTRY_RULES
+    return ", ".join(
+        f"{country} {rule['plan_a'] * 100:g}/{rule['ro'] * 100:g}"
+        for country, rule in rules.items()
+    )
+
+
+def _rates_for(countries, rules, default_country):
+    """Map a Series of country codes to (plan_a_rate, ro_rate) arrays."""
+    default = rules[default_country]
+    normalized = countries.astype(str).str.upper().str.strip()
+
+    # Lookup dilakukan sekali per country unik, lalu disebar lewat codes
+    codes, uniques = pd.factorize(normalized, use_na_sentinel=False)
+    plan_a = np.array([rules.get(c, default)["plan_a"] for c in uniques], dtype="float64")
+    ro = np.array([rules.get(c, default)["ro"] for c in uniques], dtype="float64")
+    return plan_a[codes], ro[codes]
+
+
+def calculate_split_cv(df, rules=None, default_country=DEFAULT_COUNTRY):
+    """
+    Calculate Split CV based on country rules
+    ID: SPLIT PLAN A = 60%, SPLIT RO = 40%
+    MY: SPLIT PLAN A = 50%, SPLIT RO = 50%
+    Other countries fall back to the rules of default_country.
+    """
+    rules = rules or COUNTRY_RULES
+    df = df.copy()
+
+    plan_a_rate, ro_rate = _rates_for(df["COUNTRY"], rules, default_country)
+
+    df["SPLIT PLAN A"] = df["CV PLAN A"].astype("float64").to_numpy() * plan_a_rate
+    df["SPLIT RO"] = df["CV RO"].astype("float64").to_numpy() * ro_rate
+    df["BALANCE B/F"] = df["BALANCE C/F"].astype("float64").to_numpy()
+
+    return df
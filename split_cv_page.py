@@ -0,0 +1,193 @@
+"""
+Split CV page shared by split_CV.py (standalone app) and
+pages/split_cv_calculator.py; the two only differ in title and page name.
+"""
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from db import get_connection
+from exporter import FORMATS, available_formats, deferred_file, describe_export, export_dataframe
+from instrumentation import frame_bytes, page_done, span, track_page
+from query_cache import bump_table_version, cached_call, cached_query
+from split_cv_engine import EXPECTED_COLUMNS, calculate_split_cv, describe_rules
+from split_cv_reader import SUPPORTED_EXTENSIONS, read_split_cv_input
+from split_cv_sql import PREVIEW_ROWS, candidate_tables, preview_sql, result_table_name, run_split_cv, summary_sql
+
+
+def render_split_cv_page(title, page_title, page_name):
+    """Render the whole Split CV page: upload mode and in-database mode."""
+    st.set_page_config(page_title=page_title, layout="wide")
+
+    track_page(page_name)
+    st.title(title)
+    st.write(
+        "Upload file Excel (atau CSV/Parquet), sistem akan hitung Split Plan A, RO, dan Balance "
+        f"sesuai rules Country ({describe_rules()})."
+    )
+
+    mode = st.radio("Sumber data:", ["📂 Upload file", "🗄️ Tabel di database"], horizontal=True)
+
+    # 🗄️ Mode database: rules country dijalankan sebagai satu statement SQL di server,
+    # hanya total & preview yang diambil ke Streamlit
+    if mode == "🗄️ Tabel di database":
+        def load_candidate_tables():
+            with get_connection() as conn:
+                return candidate_tables(conn)
+
+        try:
+            tables = cached_call(
+                "split_cv_candidate_tables", load_candidate_tables, tables=["information_schema.tables"], ttl=60
+            )
+        except Exception as e:
+            st.error(f"⚠️ Tidak dapat terhubung ke database: {e}")
+            st.stop()
+
+        if not tables:
+            st.warning(
+                f"Belum ada tabel dengan kolom {EXPECTED_COLUMNS}. Import data member lewat halaman Import Data."
+            )
+            st.stop()
+
+        col1, col2 = st.columns(2)
+        with col1:
+            source_table = st.selectbox("Tabel member:", tables)
+        with col2:
+            result_table = st.text_input("Tabel hasil:", result_table_name(source_table))
+
+        if st.button("🚀 Hitung di Database"):
+            try:
+                with st.spinner("🔄 Menghitung Split CV di database..."):
+                    with span("split_cv_sql", "transform", detail=source_table) as s, get_connection() as conn:
+                        run = run_split_cv(conn, source_table, result_table)
+                        s["rows"] = run["rows"]
+                bump_table_version(run["result_table"])
+                st.session_state["split_cv_db"] = run
+            except Exception as e:
+                st.error(f"❌ Terjadi kesalahan: {e}")
+
+        run = st.session_state.get("split_cv_db")
+        if run:
+            st.success(
+                f"✅ {run['rows']:,} baris dihitung ke tabel '{run['result_table']}' dalam {run['seconds']:.1f} detik."
+            )
+            summary = cached_query(summary_sql(run["result_table"]), tables=[run["result_table"]])
+
+            st.subheader("📘 Hasil Perhitungan Split CV")
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Total Records", f"{int(summary['total_records'].iloc[0]):,}")
+            with col2:
+                st.metric("Total SPLIT PLAN A", f"{float(summary['SPLIT PLAN A'].iloc[0] or 0):,.0f}")
+            with col3:
+                st.metric("Total SPLIT RO", f"{float(summary['SPLIT RO'].iloc[0] or 0):,.0f}")
+            with col4:
+                st.metric("Total BALANCE B/F", f"{float(summary['BALANCE B/F'].iloc[0] or 0):,.0f}")
+
+            st.caption(f"Preview {PREVIEW_ROWS} baris pertama; data lengkap ada di tabel '{run['result_table']}'.")
+            st.dataframe(cached_query(preview_sql(run["result_table"]), tables=[run["result_table"]]))
+        page_done()
+        return
+
+    # Upload file: Excel, atau CSV/Parquet yang jauh lebih cepat dibaca
+    uploaded_file = st.file_uploader("📂 Upload file Excel / CSV / Parquet", type=SUPPORTED_EXTENSIONS)
+    trace_memory = st.checkbox("🧠 Ukur memori tiap fase parsing (parsing jadi lebih lambat)")
+
+    if uploaded_file:
+        try:
+            # File yang sama tidak di-parse ulang saat halaman rerun (mis. klik download)
+            parse_key = (uploaded_file.file_id, trace_memory)
+            parsed = st.session_state.get("split_cv_input")
+            if parsed is None or parsed[0] != parse_key:
+                with st.spinner("📖 Membaca file..."), span("read_input", "io", detail=uploaded_file.name) as s:
+                    df, parse_profile = read_split_cv_input(uploaded_file, trace_memory=trace_memory)
+                    s["rows"], s["bytes"] = len(df), uploaded_file.size
+                parsed = (parse_key, df, parse_profile)
+                st.session_state["split_cv_input"] = parsed
+            _, df, parse_profile = parsed
+            st.success(
+                f"✅ File berhasil diupload! ({len(df):,} baris dibaca dalam "
+                f"{parse_profile['seconds'].sum():.2f} detik)"
+            )
+
+            # Show preview
+            st.subheader("📋 Preview Data Uploaded")
+            st.dataframe(df.head(10))
+
+            # Calculate
+            with st.spinner("🔄 Menghitung Split CV..."), span("calculate_split_cv", "transform") as s:
+                calc_start = time.perf_counter()
+                df_result = calculate_split_cv(df)
+                calc_seconds = time.perf_counter() - calc_start
+                s["rows"], s["bytes"] = len(df_result), frame_bytes(df_result)
+
+            with st.expander("⏱️ Profil Parsing & Perhitungan"):
+                profile = pd.concat(
+                    [
+                        parse_profile,
+                        pd.DataFrame([{"phase": "hitung split CV", "seconds": calc_seconds, "peak_mb": None}]),
+                    ],
+                    ignore_index=True,
+                )
+                st.dataframe(profile, hide_index=True)
+                st.caption(f"Memori DataFrame input: {df.memory_usage(deep=True).sum() / 1024 / 1024:,.1f} MB")
+
+            # Display results
+            st.subheader("📘 Hasil Perhitungan Split CV")
+
+            # Summary statistics
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Total Records", len(df_result))
+            with col2:
+                st.metric("Total SPLIT PLAN A", f"{df_result['SPLIT PLAN A'].sum():,.0f}")
+            with col3:
+                st.metric("Total SPLIT RO", f"{df_result['SPLIT RO'].sum():,.0f}")
+            with col4:
+                st.metric("Total BALANCE B/F", f"{df_result['BALANCE B/F'].sum():,.0f}")
+
+            st.dataframe(df_result)
+
+            # Download Section
+            st.subheader("💾 Download Options")
+
+            # Download to user's device: file ditulis per chunk ke disk, bukan ke BytesIO
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                export_format = st.selectbox(
+                    "Format file:", available_formats(include_xlsx=True), format_func=lambda f: FORMATS[f]["label"]
+                )
+            with col2:
+                st.write("")
+                if st.button("📦 Siapkan File"):
+                    with st.spinner("Menulis file hasil ..."), span("export", "io", detail=export_format) as s:
+                        export = export_dataframe(df_result, fmt=export_format, sheet_name="Hasil Split CV")
+                        s["rows"], s["bytes"] = export["rows"], export["bytes"]
+                    st.session_state["split_cv_export"] = (uploaded_file.file_id, export)
+
+            saved_export = st.session_state.get("split_cv_export")
+            if (
+                saved_export
+                and saved_export[0] == uploaded_file.file_id
+                and saved_export[1]["format"] == export_format
+                and os.path.exists(saved_export[1]["path"])
+            ):
+                export = saved_export[1]
+                st.caption(f"📦 {describe_export(export)}")
+                st.download_button(
+                    label=f"⬇️ Download {FORMATS[export_format]['label']}",
+                    data=deferred_file(export["path"]),
+                    file_name=f"hasil_split_cv_{datetime.now().strftime('%Y%m%d_%H%M%S')}{export['ext']}",
+                    mime=export["mime"],
+                )
+
+        except Exception as e:
+            st.error(f"❌ Terjadi kesalahan: {e}")
+            st.error("Pastikan file formatnya benar dan tidak corrupt.")
+    else:
+        st.info("📤 Silakan upload file Excel, CSV, atau Parquet untuk memulai perhitungan.")
+
+    page_done()
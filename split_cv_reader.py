@@ -0,0 +1,196 @@
+"""
+Fast input readers for the Split CV calculator.
+
+Only the EXPECTED_COLUMNS are read, with explicit dtypes. .xlsx files are
+parsed with python-calamine when it is installed (Rust, ~10x faster than
+openpyxl), otherwise with openpyxl in read-only (streaming) mode over just
+the column span that holds those columns. CSV and Parquet inputs skip Excel
+parsing altogether. Every parse phase is timed, and optionally its peak memory is
+traced, so large monthly files show where the time goes.
+"""
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import python_calamine  # noqa: F401  (dipakai lewat pd.read_excel engine="calamine")
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+from split_cv_engine import EXPECTED_COLUMNS
+
+TEXT_COLUMNS = ["MEMBER ID", "MEMBER NAME"]
+CATEGORY_COLUMNS = ["COUNTRY"]
+NUMERIC_COLUMNS = [c for c in EXPECTED_COLUMNS if c not in TEXT_COLUMNS + CATEGORY_COLUMNS]
+
+CSV_DTYPES = {
+    **{c: "str" for c in TEXT_COLUMNS},
+    **{c: "category" for c in CATEGORY_COLUMNS},
+    **{c: "float64" for c in NUMERIC_COLUMNS},
+}
+
+SUPPORTED_EXTENSIONS = ["xlsx", "csv", "parquet"]
+
+
+class PhaseProfiler:
+    """Records seconds (and peak traced memory when enabled) per named phase."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {"phase": name, "seconds": time.perf_counter() - start, "peak_mb": None}
+            if self.trace_memory:
+                entry["peak_mb"] = (tracemalloc.get_traced_memory()[1] - base) / 1024 / 1024
+                if started_tracing:
+                    tracemalloc.stop()
+            self.phases.append(entry)
+
+    def to_frame(self):
+        return pd.DataFrame(self.phases, columns=["phase", "seconds", "peak_mb"])
+
+
+def _check_columns(columns):
+    missing = [c for c in EXPECTED_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"File harus memiliki kolom berikut: {EXPECTED_COLUMNS} (tidak ada: {missing})")
+
+
+def _apply_dtypes(data):
+    """Build the input frame from {column: list|Series} with the Split CV dtypes."""
+    df = pd.DataFrame({c: data[c] for c in EXPECTED_COLUMNS})
+    for col in TEXT_COLUMNS:
+        df[col] = df[col].astype("str").where(df[col].notna())
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype("category")
+    for col in NUMERIC_COLUMNS:
+        try:
+            df[col] = pd.to_numeric(df[col]).astype("float64")
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Kolom '{col}' berisi nilai non-numerik: {e}") from None
+    return df
+
+
+def _read_xlsx_calamine(file, profiler):
+    with profiler.phase("parse xlsx (calamine, usecols)"):
+        df = pd.read_excel(file, engine="calamine", usecols=lambda c: str(c).strip() in EXPECTED_COLUMNS)
+        df = df.rename(columns=lambda c: str(c).strip())
+        _check_columns(df.columns)
+
+    with profiler.phase("konversi tipe"):
+        return _apply_dtypes(df)
+
+
+def _read_xlsx(file, profiler):
+    if HAS_CALAMINE:
+        return _read_xlsx_calamine(file, profiler)
+
+    from openpyxl import load_workbook
+
+    with profiler.phase("buka workbook"):
+        wb = load_workbook(file, read_only=True, data_only=True)
+        ws = wb.worksheets[0]
+    try:
+        with profiler.phase("baca header"):
+            header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+            positions = {str(v).strip(): i for i, v in enumerate(header) if v is not None}
+            _check_columns(positions)
+            wanted = [positions[c] for c in EXPECTED_COLUMNS]
+            first, last = min(wanted), max(wanted)
+
+        with profiler.phase("stream baris (read-only)"):
+            # Hanya rentang kolom yang dibutuhkan yang di-parse openpyxl
+            columns = {c: [] for c in EXPECTED_COLUMNS}
+            offsets = [(columns[c], positions[c] - first) for c in EXPECTED_COLUMNS]
+            for row in ws.iter_rows(min_row=2, min_col=first + 1, max_col=last + 1, values_only=True):
+                if not any(v is not None for v in row):
+                    continue
+                for values, offset in offsets:
+                    values.append(row[offset] if offset < len(row) else None)
+    finally:
+        wb.close()
+
+    with profiler.phase("konversi tipe"):
+        return _apply_dtypes(columns)
+
+
+def _sniff_sep(file):
+    first_line = file.readline()
+    file.seek(0)
+    if isinstance(first_line, bytes):
+        first_line = first_line.decode("utf-8-sig", errors="replace")
+    return max([",", ";", "\t", "|"], key=first_line.count)
+
+
+def _read_csv(file, profiler):
+    with profiler.phase("baca header"):
+        sep = _sniff_sep(file)
+        header = pd.read_csv(file, sep=sep, nrows=0, encoding="utf-8-sig").columns
+        file.seek(0)
+        names = {c.strip(): c for c in header}
+        _check_columns(names)
+        usecols = [names[c] for c in EXPECTED_COLUMNS]
+
+    with profiler.phase("parse CSV (usecols + dtype)"):
+        df = pd.read_csv(
+            file,
+            sep=sep,
+            encoding="utf-8-sig",
+            usecols=usecols,
+            dtype={names[c]: CSV_DTYPES[c] for c in EXPECTED_COLUMNS},
+        )
+    return df.rename(columns=lambda c: c.strip())[EXPECTED_COLUMNS]
+
+
+def _read_parquet(file, profiler):
+    with profiler.phase("baca skema"):
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(file)
+        _check_columns(parquet.schema_arrow.names)
+
+    with profiler.phase("baca kolom Parquet"):
+        table = parquet.read(columns=EXPECTED_COLUMNS)
+
+    with profiler.phase("konversi tipe"):
+        return _apply_dtypes(table.to_pandas())
+
+
+def read_split_cv_input(file, name=None, trace_memory=False):
+    """
+    Read a Split CV input file (.xlsx, .csv or .parquet).
+
+    file is a path or a binary file object (e.g. a Streamlit upload); the
+    format comes from name or the path. Returns (df, profile) where profile
+    is a DataFrame of phase, seconds and peak_mb (None unless trace_memory).
+    Raises ValueError for missing columns or non-numeric CV values.
+    """
+    name = name or getattr(file, "name", None) or str(file)
+    ext = os.path.splitext(name)[1].lower().lstrip(".")
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Format file tidak didukung: .{ext} (gunakan {', '.join(SUPPORTED_EXTENSIONS)})")
+
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            return read_split_cv_input(f, name, trace_memory)
+
+    profiler = PhaseProfiler(trace_memory)
+    reader = {"xlsx": _read_xlsx, "csv": _read_csv, "parquet": _read_parquet}[ext]
+    df = reader(file, profiler)
+    return df, profiler.to_frame()
@@ -0,0 +1,122 @@
+"""
+In-database Split CV for member tables that already live in PostgreSQL.
+
+The country rules of split_cv_engine.COUNTRY_RULES become a VALUES list
+joined to the member table, and the whole calculation is one
+CREATE TABLE ... AS SELECT. Only the totals and a small preview travel back
+to Streamlit. Arithmetic is done in double precision, like the float64
+pandas engine, so both modes give identical results.
+"""
+import time
+
+from db import quote_ident
+from split_cv_engine import COUNTRY_RULES, DEFAULT_COUNTRY, EXPECTED_COLUMNS
+
+RESULT_SUFFIX = "_split_cv"
+PREVIEW_ROWS = 100
+RESULT_COLUMNS = ["SPLIT PLAN A", "SPLIT RO", "BALANCE B/F"]
+
+
+def result_table_name(source_table):
+    return f"{source_table}{RESULT_SUFFIX}"
+
+
+def candidate_tables(conn):
+    """Public tables that have every EXPECTED_COLUMNS column, excluding result tables."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT table_name FROM information_schema.columns
+            WHERE table_schema = 'public' AND column_name = ANY(%s)
+            GROUP BY table_name
+            HAVING COUNT(DISTINCT column_name) = %s
+            ORDER BY table_name
+        """, (EXPECTED_COLUMNS, len(EXPECTED_COLUMNS)))
+        return [r[0] for r in cur.fetchall() if RESULT_SUFFIX not in r[0]]
+
+
+def check_result_table(cur, source_table, result_table):
+    """
+    Raise ValueError unless result_table may be (re)created by run_split_cv.
+
+    The target must not be the source, and an existing table is only
+    replaced when it is a result table: named with RESULT_SUFFIX or holding
+    every RESULT_COLUMNS column.
+    """
+    if result_table == source_table:
+        raise ValueError("Tabel hasil tidak boleh sama dengan tabel member.")
+    if result_table.endswith(RESULT_SUFFIX):
+        return
+    cur.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s
+    """, (result_table,))
+    columns = {r[0] for r in cur.fetchall()}
+    if columns and not set(RESULT_COLUMNS) <= columns:
+        raise ValueError(
+            f"Tabel '{result_table}' sudah ada dan bukan tabel hasil Split CV; "
+            f"pakai nama berakhiran '{RESULT_SUFFIX}' atau tabel yang belum ada."
+        )
+
+
+def split_cv_select_sql(source_table, rules=None, default_country=DEFAULT_COUNTRY):
+    """
+    SELECT statement producing the source rows plus the three result columns.
+
+    Countries are normalized like the pandas engine (upper + trim); unknown or
+    NULL countries get the rules of default_country. Returns (sql, params).
+    """
+    rules = rules or COUNTRY_RULES
+    default = rules[default_country]
+    values = ", ".join(["(%s, %s::float8, %s::float8)"] * len(rules))
+    # Urutan parameter mengikuti teks SQL: rate default (COALESCE) dulu, lalu VALUES
+    params = [default["plan_a"], default["ro"]]
+    params += [v for country, rule in rules.items() for v in (country, rule["plan_a"], rule["ro"])]
+
+    def num(col):
+        return f'src.{quote_ident(col)}::float8'
+
+    sql = f"""
+        SELECT src.*,
+               {num("CV PLAN A")} * COALESCE(r.plan_a, %s::float8) AS "SPLIT PLAN A",
+               {num("CV RO")} * COALESCE(r.ro, %s::float8) AS "SPLIT RO",
+               {num("BALANCE C/F")} AS "BALANCE B/F"
+        FROM {quote_ident(source_table)} AS src
+        LEFT JOIN (VALUES {values}) AS r(country, plan_a, ro)
+               ON r.country = UPPER(BTRIM(src."COUNTRY"::text, E' \\t\\r\\n'))
+    """
+    return sql, params
+
+
+def run_split_cv(conn, source_table, result_table=None, rules=None, default_country=DEFAULT_COUNTRY):
+    """
+    Compute Split CV of source_table into result_table inside the database.
+
+    The result is built under a temporary name and swapped in within one
+    transaction, so readers never see a half-written table. result_table is
+    checked with check_result_table() first. Returns a dict with
+    result_table, rows and seconds.
+    """
+    result_table = result_table or result_table_name(source_table)
+    building = f"{result_table}__building"
+    select_sql, params = split_cv_select_sql(source_table, rules, default_country)
+
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        check_result_table(cur, source_table, result_table)
+        cur.execute(f"DROP TABLE IF EXISTS {quote_ident(building)};")
+        cur.execute(f"CREATE TABLE {quote_ident(building)} AS {select_sql};", params)
+        rows = cur.rowcount
+        cur.execute(f"DROP TABLE IF EXISTS {quote_ident(result_table)};")
+        cur.execute(f"ALTER TABLE {quote_ident(building)} RENAME TO {quote_ident(result_table)};")
+    conn.commit()
+    return {"result_table": result_table, "rows": rows, "seconds": time.perf_counter() - start}
+
+
+def summary_sql(result_table):
+    """Totals of the result table: total_records plus one SUM per result column."""
+    sums = ", ".join(f"SUM({quote_ident(c)}) AS {quote_ident(c)}" for c in RESULT_COLUMNS)
+    return f"SELECT COUNT(*) AS total_records, {sums} FROM {quote_ident(result_table)};"
+
+
+def preview_sql(result_table, limit=PREVIEW_ROWS):
+    return f"SELECT * FROM {quote_ident(result_table)} LIMIT {int(limit)};"
@@ -0,0 +1,215 @@
+"""
+Guarded execution of ad-hoc SQL for the SQL Query Executor page.
+
+Only a single SELECT/WITH/VALUES/TABLE/EXPLAIN/SHOW statement is accepted, and
+it runs in a READ ONLY transaction with a statement_timeout.
+SELECT-like statements go through a named (server-side) cursor, so only the
+requested page of rows ever travels to the Streamlit process; the total row
+count is obtained with MOVE, which counts rows without transferring them.
+"""
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pandas as pd
+
+DEFAULT_TIMEOUT_S = 30
+DEFAULT_MAX_ROWS = 100_000
+DEFAULT_MAX_MB = 50
+DEFAULT_PAGE_SIZE = 500
+DOWNLOAD_BATCH_ROWS = 5_000
+
+# Statement yang bisa dijalankan lewat DECLARE CURSOR (server-side)
+_SERVER_CURSOR_PATTERN = re.compile(r"^\s*(select|with|values|table)\b", re.IGNORECASE)
+# Statement yang boleh dijalankan dari halaman SQL Query
+_READ_ONLY_PATTERN = re.compile(r"^\s*(select|with|values|table|explain|show)\b", re.IGNORECASE)
+# String, identifier ber-kutip, dollar-quote dan komentar dilewati saat mencari ';'
+_SQL_TOKEN_PATTERN = re.compile(
+    r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|(\$\w*\$).*?\1|--[^\n]*|/\*.*?\*/|;",
+    re.DOTALL,
+)
+
+
+def clean_sql(sql):
+    """Strip whitespace and trailing semicolons (DECLARE CURSOR rejects them)."""
+    return sql.strip().rstrip(";").strip()
+
+
+def uses_server_cursor(sql):
+    return bool(_SERVER_CURSOR_PATTERN.match(sql))
+
+
+def _strip_comments(sql):
+    return _SQL_TOKEN_PATTERN.sub(
+        lambda m: " " if m.group(0).startswith(("--", "/*")) else m.group(0), sql
+    ).strip()
+
+
+def check_read_only(sql):
+    """
+    Reject anything but one read-only statement.
+
+    The READ ONLY transaction alone is not enough: a second statement such as
+    "COMMIT; DROP TABLE ..." would run after the guarded transaction ended.
+    Raises ValueError; returns sql (cleaned) otherwise.
+    """
+    sql = clean_sql(sql)
+    if any(m.group(0) == ";" for m in _SQL_TOKEN_PATTERN.finditer(sql)):
+        raise ValueError("Hanya satu statement per eksekusi yang diizinkan.")
+    if not _READ_ONLY_PATTERN.match(_strip_comments(sql)):
+        raise ValueError("Hanya statement SELECT, WITH, VALUES, TABLE, EXPLAIN atau SHOW yang diizinkan.")
+    return sql
+
+
+def _begin_guarded(conn, timeout_s):
+    with conn.cursor() as cur:
+        cur.execute("SET TRANSACTION READ ONLY;")
+        cur.execute("SET LOCAL statement_timeout = %s;", (int(timeout_s * 1000),))
+
+
+def _trim_to_bytes(df, max_bytes):
+    """Drop trailing rows until the frame fits in max_bytes. Returns (df, trimmed)."""
+    if df.empty:
+        return df, False
+    row_bytes = df.memory_usage(deep=True, index=False).sum() / len(df)
+    if row_bytes * len(df) <= max_bytes:
+        return df, False
+    keep = max(int(max_bytes // max(row_bytes, 1)), 0)
+    return df.iloc[:keep], True
+
+
+def fetch_page(conn, sql, page=0, page_size=DEFAULT_PAGE_SIZE, timeout_s=DEFAULT_TIMEOUT_S,
+               max_rows=DEFAULT_MAX_ROWS, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, total_rows=None):
+    """
+    Run sql and return one page of its result.
+
+    Returns a dict with df, total_rows (counted up to max_rows), capped
+    (True when the result has at least max_rows rows), truncated (page cut
+    by the byte budget) and seconds. Pass the total_rows of an earlier page
+    of the same execution to skip counting the rest of the result again.
+    """
+    sql = check_read_only(sql)
+    start = time.perf_counter()
+    offset = page * page_size
+    limit = max(min(page_size, max_rows - offset), 0)
+    _begin_guarded(conn, timeout_s)
+
+    if uses_server_cursor(_strip_comments(sql)):
+        cursor_name = f"sqlexec_{uuid.uuid4().hex}"
+        with conn.cursor(name=cursor_name) as cur:
+            cur.itersize = page_size
+            cur.execute(sql)
+            with conn.cursor() as mover:
+                if offset:
+                    mover.execute(f"MOVE FORWARD {int(offset)} IN {cursor_name};")
+                    skipped = mover.rowcount
+                else:
+                    skipped = 0
+                rows = cur.fetchmany(limit) if limit else []
+                columns = [d[0] for d in cur.description] if cur.description else []
+                if total_rows is None:
+                    # Hitung sisa baris (maks. sampai budget) tanpa mengirim datanya
+                    remaining = max(max_rows - offset - len(rows), 0)
+                    mover.execute(f"MOVE FORWARD {int(remaining)} IN {cursor_name};")
+                    total_rows = skipped + len(rows) + mover.rowcount
+    else:
+        # SHOW / EXPLAIN dsb. tidak bisa di-DECLARE; hasilnya kecil
+        with conn.cursor() as cur:
+            cur.execute(sql)
+            all_rows = cur.fetchmany(max_rows) if cur.description else []
+            columns = [d[0] for d in cur.description] if cur.description else []
+        total_rows = len(all_rows)
+        rows = all_rows[offset:offset + limit]
+
+    df, truncated = _trim_to_bytes(pd.DataFrame(rows, columns=columns), max_bytes)
+    conn.rollback()
+    return {
+        "df": df,
+        "total_rows": total_rows,
+        "capped": total_rows >= max_rows,
+        "truncated": truncated,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def render_sql(conn, sql, params=None):
+    """sql with params filled in, for display."""
+    with conn.cursor() as cur:
+        return cur.mogrify(sql, params).decode()
+
+
+def explain(conn, sql, params=None, analyze=False, timeout_s=DEFAULT_TIMEOUT_S):
+    """
+    Plan of sql as text. With analyze the statement is executed
+    (EXPLAIN ANALYZE, BUFFERS) inside the same READ ONLY transaction.
+    """
+    _begin_guarded(conn, timeout_s)
+    options = "ANALYZE, BUFFERS" if analyze else "COSTS"
+    with conn.cursor() as cur:
+        cur.execute(f"EXPLAIN ({options}) {clean_sql(sql)}", params)
+        plan = "\n".join(row[0] for row in cur.fetchall())
+    conn.rollback()
+    return plan
+
+
+def stream_to_csv(conn, sql, path, timeout_s=DEFAULT_TIMEOUT_S, max_rows=DEFAULT_MAX_ROWS,
+                  max_bytes=DEFAULT_MAX_MB * 1024 * 1024, batch_rows=DOWNLOAD_BATCH_ROWS,
+                  progress=None):
+    """
+    Stream the result of sql into a CSV file batch by batch.
+
+    Stops at max_rows rows or max_bytes bytes written. Returns a dict with
+    rows, bytes, capped and seconds.
+    """
+    sql = check_read_only(sql)
+    start = time.perf_counter()
+    _begin_guarded(conn, timeout_s)
+    stats = {"rows": 0, "bytes": 0, "capped": False}
+
+    cursor_name = f"sqlexport_{uuid.uuid4().hex}"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        with conn.cursor(name=cursor_name) as cur:
+            cur.itersize = batch_rows
+            cur.execute(sql)
+            header = True
+            while True:
+                rows = cur.fetchmany(min(batch_rows, max_rows - stats["rows"]))
+                if not rows:
+                    break
+                columns = [d[0] for d in cur.description]
+                pd.DataFrame(rows, columns=columns).to_csv(f, header=header, index=False)
+                header = False
+                stats["rows"] += len(rows)
+                stats["bytes"] = f.tell()
+                if progress:
+                    progress(stats)
+                if stats["rows"] >= max_rows or stats["bytes"] >= max_bytes:
+                    stats["capped"] = True
+                    break
+    conn.rollback()
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def run_cancellable(conn, func, on_wait, poll_s=0.25):
+    """
+    Run func() in a worker thread while the caller keeps polling on_wait(elapsed).
+
+    on_wait is expected to touch Streamlit elements, which lets Streamlit stop
+    this script when the user clicks another button (e.g. Cancel). In that case
+    the running statement is cancelled on the server before the connection is
+    handed back.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(func)
+        try:
+            while not future.done():
+                on_wait(time.perf_counter() - start)
+                wait([future], timeout=poll_s)
+            return future.result()
+        finally:
+            if not future.done():
+                conn.cancel()
+                wait([future])
@@ -0,0 +1,116 @@
+"""
+Sargable WHERE clauses for the report queries.
+
+Every builder returns a (sql, params) pair; where_clause() joins them with
+AND. The generated predicates leave the indexed column untouched so the
+planner can use its B-tree/BRIN index:
+
+- date ranges are half-open on the raw column (col >= start AND col < end + 1 day)
+  instead of casting the column (col::date BETWEEN ...); TEXT date columns
+  go through TEXT_DATE_FUNCTION, which db_indexes can index;
+- multi-selects are passed as one array parameter cast to the column type
+  (col = ANY(%s::integer[])), so the statement has the same shape for 1 or
+  500 selected values;
+- composite keys (kodeProduk + namaProduk) get one array per column plus
+  an exact check of the pairs as typed row values.
+
+Date filters only accept the columns in DATE_FILTER_COLUMNS.
+"""
+import datetime
+
+from db import quote_ident
+from sales_rollup import DATE_COLUMNS
+
+DATE_FILTER_COLUMNS = tuple(DATE_COLUMNS)
+NATIVE_DATE_TYPES = ("date", "timestamp without time zone", "timestamp with time zone")
+
+# text::date bergantung pada DateStyle sehingga tidak IMMUTABLE dan tidak bisa di-index;
+# fungsi ini mengunci DateStyle agar hasilnya tetap dan boleh dipakai di expression index
+TEXT_DATE_FUNCTION = "text_to_date"
+TEXT_DATE_FUNCTION_SQL = f"""
+    CREATE OR REPLACE FUNCTION {TEXT_DATE_FUNCTION}(value text) RETURNS date
+    LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+    SET datestyle = 'ISO, MDY'
+    AS $$ SELECT value::date $$;
+"""
+
+
+def _as_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def text_date_expr(column):
+    """TEXT_DATE_FUNCTION(column): the date of a TEXT column, as indexed by db_indexes."""
+    return f"{TEXT_DATE_FUNCTION}({quote_ident(column)})"
+
+
+def text_date_columns(column_types, columns=DATE_FILTER_COLUMNS):
+    """Date filter columns present in column_types that are not stored as DATE/TIMESTAMP."""
+    return [c for c in columns if c in column_types and column_types[c] not in NATIVE_DATE_TYPES]
+
+
+def date_range_clause(column, start_date, end_date, column_types, allowed=DATE_FILTER_COLUMNS):
+    """
+    start_date <= column <= end_date (whole days) as a half-open range.
+
+    DATE/TIMESTAMP columns are compared with date parameters. TEXT columns
+    (older tables) are converted with text_date_expr(): their format is not
+    guaranteed to be ISO, and only ISO strings would sort like dates; the
+    function must exist (see db_indexes.ensure_text_date_function). Raises
+    ValueError for a column outside allowed.
+    """
+    if column not in allowed:
+        raise ValueError(f"Kolom tanggal '{column}' tidak diizinkan (pilihan: {', '.join(allowed)}).")
+    start = _as_date(start_date)
+    end = _as_date(end_date) + datetime.timedelta(days=1)
+    col = quote_ident(column)
+    if column_types.get(column) not in NATIVE_DATE_TYPES:
+        col = text_date_expr(column)
+    return f"{col} >= %s AND {col} < %s", [start, end]
+
+
+def array_type(column, column_types=None):
+    """Array type matching column in column_types ({column: data_type}); text[] when unknown."""
+    data_type = (column_types or {}).get(column)
+    if not data_type or data_type in ("ARRAY", "USER-DEFINED"):
+        return "text[]"
+    return f"{data_type}[]"
+
+
+def any_clause(column, values, column_types=None):
+    """column = ANY(array); values are passed as one array parameter of the column's type."""
+    return f"{quote_ident(column)} = ANY(%s::{array_type(column, column_types)})", [list(values)]
+
+
+def pairs_clause(columns, pairs, column_types=None):
+    """
+    (col1, col2, ...) matches one of pairs, e.g. [("P001", "Produk A"), ...].
+
+    Each column gets its own = ANY(array), which the planner can estimate
+    and answer from an index; the exact pairs are then checked as row values
+    against the arrays unnested side by side, so every column is compared
+    in its own type.
+    """
+    pairs = [tuple(pair) for pair in pairs]
+    per_column = list(zip(*pairs))
+    clauses = [
+        any_clause(column, dict.fromkeys(values), column_types)
+        for column, values in zip(columns, per_column)
+    ]
+    row = ", ".join(quote_ident(c) for c in columns)
+    arrays = ", ".join(f"%s::{array_type(c, column_types)}" for c in columns)
+    clauses.append((f"({row}) IN (SELECT * FROM unnest({arrays}))", [list(values) for values in per_column]))
+    return " AND ".join(sql for sql, _ in clauses), [p for _, params in clauses for p in params]
+
+
+def where_clause(clauses):
+    """('WHERE a AND b', params) for a list of (sql, params); ('', []) when empty."""
+    clauses = [c for c in clauses if c]
+    if not clauses:
+        return "", []
+    params = [p for _, clause_params in clauses for p in clause_params]
+    return "WHERE " + " AND ".join(sql for sql, _ in clauses), params
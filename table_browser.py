@@ -0,0 +1,152 @@
+"""
+Keyset (seek) pagination for the View Data page.
+
+Pages are read with WHERE key > last_key ORDER BY key LIMIT n instead of
+OFFSET, so page 1000 costs the same as page 1. The key is the primary key
+when the table has one, a user-chosen column (with ctid as tie-breaker),
+or the physical row id ctid, which PostgreSQL can range-scan directly.
+ctid is only unique within one partition, so partitioned tables are paged
+by (tableoid, ctid).
+"""
+from db import quote_ident
+from query_cache import cached_query
+
+CTID_KEY = "__ctid"
+TABLEOID_KEY = "__tableoid"
+TABLE_LIST_TTL = 60     # detik; tabel baru muncul paling lambat 1 menit
+
+
+def list_tables():
+    df = cached_query("""
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = 'public'
+        ORDER BY table_name
+    """, tables=["information_schema.tables"], ttl=TABLE_LIST_TTL)
+    return df["table_name"].tolist()
+
+
+def table_columns(table_name):
+    """Column names of a public table in ordinal order."""
+    df = cached_query("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s
+        ORDER BY ordinal_position
+    """, params=(table_name,), tables=[table_name])
+    return df["column_name"].tolist()
+
+
+def primary_key_columns(table_name):
+    df = cached_query("""
+        SELECT a.attname
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = %s::regclass AND i.indisprimary
+        ORDER BY array_position(i.indkey::int2[], a.attnum)
+    """, params=(quote_ident(table_name),), tables=[table_name])
+    return df["attname"].tolist()
+
+
+def is_partitioned(table_name):
+    df = cached_query(
+        "SELECT relkind = 'p' AS partitioned FROM pg_class WHERE oid = %s::regclass",
+        params=(quote_ident(table_name),), tables=[table_name],
+    )
+    return bool(not df.empty and df["partitioned"].iloc[0])
+
+
+def approx_row_count(table_name):
+    """
+    Planner estimate from pg_class.reltuples (summed over partitions).
+
+    Returns None when the table has never been analyzed.
+    """
+    df = cached_query("""
+        SELECT SUM(c.reltuples) FILTER (WHERE c.reltuples >= 0) AS estimate
+        FROM pg_class c
+        -- Induk terpartisi juga punya reltuples (jumlah semua partisi) → tidak ikut dijumlah
+        WHERE (c.oid = %s::regclass AND c.relkind <> 'p')
+           OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)
+    """, params=(quote_ident(table_name),) * 2, tables=[table_name])
+    estimate = df["estimate"].iloc[0] if not df.empty else None
+    return None if estimate is None or estimate != estimate else int(estimate)
+
+
+def key_columns(table_name, order_column=None):
+    """
+    Columns the pages are ordered and sought by.
+
+    order_column=None uses the primary key, falling back to ctid.
+    A chosen column gets ctid appended so the key is unique
+    (tableoid + ctid for partitioned tables).
+    """
+    row_id = [TABLEOID_KEY, CTID_KEY] if is_partitioned(table_name) else [CTID_KEY]
+    if order_column:
+        return [order_column, *row_id]
+    return primary_key_columns(table_name) or row_id
+
+
+_SYSTEM_KEYS = {
+    CTID_KEY: ("ctid", "ctid::text", "%s::tid"),
+    TABLEOID_KEY: ("tableoid", "tableoid::bigint", "%s::oid"),
+}
+
+
+def _key_expr(column):
+    return _SYSTEM_KEYS[column][0] if column in _SYSTEM_KEYS else quote_ident(column)
+
+
+def _key_param(column):
+    return _SYSTEM_KEYS[column][2] if column in _SYSTEM_KEYS else "%s"
+
+
+def page_query(table_name, columns, keys, after=None, page_size=100):
+    """
+    Build (sql, params) for the page following the key values in `after`.
+
+    after=None gives the first page. Key columns are always selected so the
+    caller can take the last row's key for the next page.
+    """
+    select = [quote_ident(c) for c in columns if c not in keys]
+    select += [f"{_SYSTEM_KEYS[k][1]} AS {quote_ident(k)}" if k in _SYSTEM_KEYS else quote_ident(k) for k in keys]
+    key_exprs = [_key_expr(k) for k in keys]
+
+    # Baris dengan NULL di kolom urut tidak bisa di-seek
+    where = [f"{_key_expr(k)} IS NOT NULL" for k in keys if k not in _SYSTEM_KEYS]
+    params = []
+    if after is not None:
+        # Predikat kolom pertama saja yang bisa memakai index satu kolom
+        where.append(f"{key_exprs[0]} >= {_key_param(keys[0])}")
+        params.append(after[0])
+        if len(keys) > 1:
+            where.append(
+                f"({', '.join(key_exprs)}) > ({', '.join(_key_param(k) for k in keys)})"
+            )
+            params.extend(after)
+        else:
+            where[-1] = f"{key_exprs[0]} > {_key_param(keys[0])}"
+
+    sql = f"SELECT {', '.join(select)} FROM {quote_ident(table_name)}"
+    if where:
+        sql += f" WHERE {' AND '.join(where)}"
+    sql += f" ORDER BY {', '.join(key_exprs)} LIMIT {int(page_size)}"
+    return sql, params
+
+
+def fetch_page(table_name, columns, keys, after=None, page_size=100):
+    """
+    One page as a DataFrame (cached until the table changes).
+
+    Values are kept as the database returned them (no dtype compaction), so
+    last_key() hands the same types back as seek parameters: a TEXT date
+    stays text and a NUMERIC key stays Decimal.
+    """
+    sql, params = page_query(table_name, columns, keys, after, page_size)
+    return cached_query(sql, params=params, tables=[table_name], compact=False)
+
+
+def last_key(df, keys):
+    """Key values of the last row, used as `after` for the next page."""
+    if df.empty:
+        return None
+    row = df.iloc[-1]
+    return [row[k].item() if hasattr(row[k], "item") else row[k] for k in keys]
@@ -0,0 +1,27 @@
+"""
+Shared test setup.
+
+The modules live flat in the repository root, so it is put on sys.path.
+Tests that need PostgreSQL use the pg_conn fixture, which connects to
+TEST_DATABASE_DSN (e.g. "host=localhost dbname=streamlit_test user=postgres")
+and is skipped when it is not set.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def pg_conn():
+    dsn = os.environ.get("TEST_DATABASE_DSN")
+    if not dsn:
+        pytest.skip("TEST_DATABASE_DSN tidak diatur")
+    import psycopg2
+
+    conn = psycopg2.connect(dsn)
+    yield conn
+    conn.rollback()
+    conn.close()
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from chart_reduce import OTHERS_LABEL, bucket_others, downsample, lttb_indices, top_categories
+
+
+def test_lttb_keeps_everything_below_threshold():
+    x = np.arange(10, dtype="float64")
+    assert lttb_indices(x, x, 10).tolist() == list(range(10))
+    assert lttb_indices(x, x, 2).tolist() == list(range(10))
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(1000, dtype="float64")
+    y = np.zeros(1000)
+    y[400], y[700] = 50.0, -80.0
+    kept = lttb_indices(x, y, 20)
+    assert len(kept) == 20
+    assert kept[0] == 0 and kept[-1] == 999
+    assert (np.diff(kept) > 0).all()
+    assert {400, 700} <= set(kept.tolist())
+
+
+def test_downsample_sorts_and_bounds_each_series():
+    days = pd.date_range("2024-01-01", periods=500, freq="D")
+    df = pd.DataFrame({
+        "day": np.concatenate([days[::-1], days]),
+        "value": np.arange(1000, dtype="float64"),
+        "loc": ["A"] * 500 + ["B"] * 500,
+    })
+    result = downsample(df, "day", "value", max_points=50, group="loc")
+    assert result.groupby("loc").size().tolist() == [50, 50]
+    for _, part in result.groupby("loc"):
+        assert part["day"].is_monotonic_increasing
+        assert part["day"].iloc[0] == days[0] and part["day"].iloc[-1] == days[-1]
+
+
+def test_downsample_drops_empty_points_and_keeps_small_frames():
+    df = pd.DataFrame({"x": [3, 1, None, 2], "y": [30.0, 10.0, 5.0, None]})
+    result = downsample(df, "x", "y", max_points=10)
+    assert result["x"].tolist() == [1, 3]
+
+
+def test_downsample_empty_frame():
+    df = pd.DataFrame({"x": [], "y": [], "g": []})
+    assert downsample(df, "x", "y", group="g").empty
+
+
+def test_bucket_others_returns_small_frames_unchanged():
+    df = pd.DataFrame({"produk": ["A", "B"], "qty": [1, 2]})
+    assert bucket_others(df, "produk", "qty", n=2) is df
+
+
+def test_bucket_others_sums_the_rest_last():
+    df = pd.DataFrame({"produk": list("ABCDE"), "qty": [5, 50, 1, 20, 2]})
+    assert top_categories(df, "produk", "qty", n=2) == ["B", "D"]
+    result = bucket_others(df, "produk", "qty", n=2)
+    assert result["produk"].tolist() == ["B", "D", OTHERS_LABEL]
+    assert result["qty"].tolist() == [50, 20, 8]
+
+
+def test_bucket_others_per_key():
+    df = pd.DataFrame({
+        "loc": ["L1", "L1", "L1", "L2", "L2"],
+        "produk": pd.Categorical(["A", "B", "C", "A", "C"]),
+        "qty": [10, 1, 2, 5, 3],
+    })
+    result = bucket_others(df, "produk", "qty", n=1, keys=("loc",))
+    assert result.values.tolist() == [
+        ["L1", "A", 10], ["L1", OTHERS_LABEL, 3],
+        ["L2", "A", 5], ["L2", OTHERS_LABEL, 3],
+    ]
+    assert result["qty"].sum() == df["qty"].sum()
@@ -0,0 +1,95 @@
+import datetime
+from decimal import Decimal
+
+import pandas as pd
+
+from frame_fetch import (
+    CATEGORY_MIN_ROWS, _convert_batch_column, compact_column, compact_frame, fetch_frame
+)
+
+
+def test_exact_decimals_become_float():
+    result = compact_column(pd.Series([Decimal("1.5"), Decimal("2.25"), None], dtype=object))
+    assert result.dtype == "float64"
+    assert result.iloc[:2].tolist() == [1.5, 2.25]
+
+
+def test_whole_decimals_become_int32():
+    result = compact_column(pd.Series([Decimal("10"), Decimal("20")], dtype=object))
+    assert result.dtype == "int32"
+    assert result.tolist() == [10, 20]
+
+
+def test_inexact_decimals_are_kept():
+    values = pd.Series([Decimal("1.5"), Decimal("0.12345678901234567890123")], dtype=object)
+    result = compact_column(values)
+    assert result.dtype == object
+    assert result.tolist() == values.tolist()
+
+
+def test_decimals_from_separate_batches_stay_summable():
+    # Batch pertama saja bisa jadi float, batch kedua tidak: keputusan harus per kolom
+    batches = [pd.Series([Decimal("1.5")], dtype=object), pd.Series([Decimal("0.12345678901234567890123")], dtype=object)]
+    values = pd.concat([_convert_batch_column(b) for b in batches], ignore_index=True)
+    result = compact_column(values)
+    assert result.sum() == Decimal("1.62345678901234567890123")
+
+
+def test_large_integers_stay_int64():
+    assert compact_column(pd.Series([1, 2**40])).dtype == "int64"
+    assert compact_column(pd.Series([1, 2])).dtype == "int32"
+
+
+def test_iso_date_text_becomes_datetime():
+    result = compact_column(pd.Series(["2024-01-31", None, "2024-02-01"], dtype="string"))
+    assert pd.api.types.is_datetime64_any_dtype(result)
+    assert result.iloc[0] == pd.Timestamp("2024-01-31")
+    assert pd.isna(result.iloc[1])
+
+
+def test_non_iso_text_is_kept():
+    values = pd.Series(["31/01/2024", "01/02/2024"], dtype="string")
+    assert compact_column(values).dtype == values.dtype
+
+
+def test_low_cardinality_text_becomes_category():
+    values = pd.Series(["LOC1", "LOC2"] * CATEGORY_MIN_ROWS, dtype="string")
+    assert isinstance(compact_column(values).dtype, pd.CategoricalDtype)
+
+
+def test_small_or_unique_text_is_not_category():
+    assert not isinstance(compact_column(pd.Series(["a", "a"], dtype="string")).dtype, pd.CategoricalDtype)
+    unique = pd.Series([f"M{i}" for i in range(CATEGORY_MIN_ROWS)], dtype="string")
+    assert not isinstance(compact_column(unique).dtype, pd.CategoricalDtype)
+
+
+def test_batch_dates_become_datetime():
+    values = pd.Series([datetime.date(2024, 1, 1), None], dtype=object)
+    assert pd.api.types.is_datetime64_any_dtype(_convert_batch_column(values))
+
+
+def test_compact_frame_keeps_index():
+    df = pd.DataFrame({"qty": [1, 2]}, index=[5, 7])
+    assert compact_frame(df).index.tolist() == [5, 7]
+
+
+def test_fetch_frame_in_batches(pg_conn):
+    df = fetch_frame(pg_conn, """
+        SELECT g AS id, (g || '.5')::numeric AS amount, DATE '2024-01-01' + g AS day
+        FROM generate_series(1, 5) AS g
+        UNION ALL SELECT 6, 0.12345678901234567890123, DATE '2024-01-07'
+        ORDER BY id
+    """, batch_rows=2)
+    pg_conn.rollback()
+    assert len(df) == 6
+    assert df["id"].dtype == "int32"
+    assert df["amount"].sum() == Decimal("17.62345678901234567890123")
+    assert pd.api.types.is_datetime64_any_dtype(df["day"])
+    assert df.attrs["memory"]["bytes"] > 0
+
+
+def test_fetch_frame_without_compaction(pg_conn):
+    df = fetch_frame(pg_conn, "SELECT 1.5::numeric AS amount", compact=False)
+    pg_conn.rollback()
+    assert df["amount"].tolist() == [Decimal("1.5")]
+    assert "memory" not in df.attrs
@@ -0,0 +1,93 @@
+import uuid
+
+import pytest
+
+from db import quote_ident
+from incremental_import import (
+    FILE_SEQ_COLUMN, create_staging_table, drop_staging_table, key_index_spec, merge_staging,
+    suggest_key_columns
+)
+
+COLUMNS = ["trcd", "kodeProduk", "namaProduk", "createdt", "qty"]
+KEYS = ["trcd", "kodeProduk"]
+
+
+def test_suggest_key_columns():
+    assert suggest_key_columns(COLUMNS) == ["trcd", "kodeProduk"]
+    assert suggest_key_columns(["trcd", "qty"]) == ["trcd"]
+    assert suggest_key_columns(["qty"]) == []
+
+
+def test_key_index_name_fits_identifier_limit():
+    spec = key_index_spec("sales_data_" + "x" * 60, ["trcd", "kodeProduk"])
+    assert len(spec["name"]) <= 63
+    assert spec["columns"] == ["trcd", "kodeProduk"]
+
+
+@pytest.fixture
+def target(pg_conn):
+    name = f"test_sales_{uuid.uuid4().hex[:8]}"
+    with pg_conn.cursor() as cur:
+        cur.execute(
+            f'CREATE TABLE {quote_ident(name)} (trcd text, "kodeProduk" text, "namaProduk" text, '
+            f"createdt date, qty integer);"
+        )
+        cur.execute(f"""
+            INSERT INTO {quote_ident(name)} VALUES
+                ('T1', 'P1', 'Produk 1', '2024-01-01', 1),
+                ('T2', 'P1', 'Produk 1', '2024-01-01', 2);
+        """)
+    pg_conn.commit()
+    staging = create_staging_table(pg_conn, name)
+    yield name, staging
+    drop_staging_table(pg_conn, staging)
+    with pg_conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {quote_ident(name)};")
+    pg_conn.commit()
+
+
+def stage(conn, staging, rows, file_no=0):
+    """Insert rows into staging in order, as one file would be COPYed."""
+    columns = ", ".join(quote_ident(c) for c in COLUMNS + [FILE_SEQ_COLUMN])
+    with conn.cursor() as cur:
+        for row in rows:
+            cur.execute(f"INSERT INTO {quote_ident(staging)} ({columns}) VALUES (%s, %s, %s, %s, %s, %s);", (*row, file_no))
+    conn.commit()
+
+
+def test_merge_staging(pg_conn, target):
+    name, staging = target
+    # File kedua di-stage lebih dulu: urutan file tetap menang atas urutan fisik
+    stage(pg_conn, staging, [("T3", "P2", "Produk 2 (file 2)", "2024-01-03", 30)], file_no=2)
+    stage(pg_conn, staging, [
+        ("T1", "P1", "Produk 1", "2024-01-01", 1),              # identik → skip
+        ("T2", "P1", "Produk 1 lama", "2024-01-02", 5),
+        ("T2", "P1", "Produk 1 baru", "2024-01-02", 6),         # baris terakhir per key menang
+        ("T3", "P2", "Produk 2 (file 1)", "2024-01-03", 3),
+        (None, "P9", "Tanpa key", "2024-01-03", 9),
+    ], file_no=1)
+
+    stats = merge_staging(
+        pg_conn, staging, name, COLUMNS, KEYS,
+        returning=["kodeProduk", "namaProduk", "createdt"], track_previous="createdt",
+    )
+
+    assert stats["staged"] == 6
+    assert stats["null_keys"] == 1
+    assert stats["duplicates"] == 2
+    assert (stats["inserted"], stats["updated"], stats["skipped"]) == (1, 1, 1)
+    assert [str(d) for d in stats["previous_values"]] == ["2024-01-01"]
+    assert stats["replaced_counts"][["namaProduk", "row_count"]].values.tolist() == [["Produk 1", 1]]
+    assert stats["updated_counts"][["namaProduk", "row_count"]].values.tolist() == [["Produk 1 baru", 1]]
+    assert stats["inserted_counts"][["namaProduk", "row_count"]].values.tolist() == [["Produk 2 (file 2)", 1]]
+
+    with pg_conn.cursor() as cur:
+        cur.execute(f'SELECT trcd, "namaProduk", qty FROM {quote_ident(name)} ORDER BY trcd;')
+        assert cur.fetchall() == [("T1", "Produk 1", 1), ("T2", "Produk 1 baru", 6), ("T3", "Produk 2 (file 2)", 30)]
+    pg_conn.rollback()
+
+
+def test_merge_staging_requires_key_in_file(pg_conn, target):
+    name, staging = target
+    with pytest.raises(ValueError, match="Kolom key"):
+        merge_staging(pg_conn, staging, name, ["trcd", "qty"], KEYS)
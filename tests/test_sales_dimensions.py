@@ -0,0 +1,38 @@
+import pandas as pd
+
+from sales_dimensions import LOCATION_TABLE, PRODUCT_TABLE, merge_summaries, summarize_chunk
+
+
+def test_summarize_chunk_counts_rows_per_member():
+    chunk = pd.DataFrame({
+        "kodeProduk": ["P1", "P1", "P2", None],
+        "namaProduk": ["A", "A", "B", "C"],
+        "loccd": ["L1", "L2", "L1", "L1"],
+        "createdt": ["2024-01-01", "2024-01-01", "2024-01-02", "2024-01-02"],
+    })
+    summaries = summarize_chunk(chunk)
+    products = summaries[PRODUCT_TABLE]
+    assert products[["kodeProduk", "row_count"]].values.tolist() == [["P1", 2], ["P2", 1]]
+    assert products["seen"].tolist() == [pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-02")]
+    assert summaries[LOCATION_TABLE]["row_count"].sum() == 4
+
+
+def test_merge_summaries_moves_updated_rows_to_new_values():
+    counts = pd.DataFrame({"kodeProduk": ["P1"], "namaProduk": ["Baru"], "createdt": ["2024-02-01"], "row_count": [3]})
+    replaced = pd.DataFrame({"kodeProduk": ["P1"], "namaProduk": ["Lama"], "createdt": ["2024-01-01"], "row_count": [3]})
+    summaries = merge_summaries({
+        "inserted_counts": None,
+        "updated_counts": counts,
+        "replaced_counts": replaced,
+    })
+    assert len(summaries) == 2
+    updated, removed = (s[PRODUCT_TABLE] for s in summaries)
+    assert updated[["namaProduk", "row_count"]].values.tolist() == [["Baru", 3]]
+    assert removed[["namaProduk", "row_count"]].values.tolist() == [["Lama", -3]]
+    # Nilai lama tidak memperlebar first/last_seen
+    assert removed["seen"].isna().all()
+
+
+def test_merge_summaries_without_changes():
+    empty = pd.DataFrame(columns=["kodeProduk", "namaProduk", "createdt", "row_count"])
+    assert merge_summaries({"inserted_counts": empty}) == []
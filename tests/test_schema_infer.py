@@ -0,0 +1,60 @@
+import pandas as pd
+
+from schema_infer import coerce_chunk, infer_column
+
+
+def column(*values):
+    return pd.Series(values, dtype=object)
+
+
+def test_integers_and_numerics():
+    assert infer_column(column("1", "-20", None))["type"] == "INTEGER"
+    assert infer_column(column("1", str(2**40)))["type"] == "BIGINT"
+    assert infer_column(column("1.5", "2"))["type"] == "NUMERIC"
+
+
+def test_leading_zero_codes_stay_text():
+    assert infer_column(column("007", "123", "0"))["type"] in ("TEXT", "VARCHAR")
+    assert infer_column(column("0", "10"))["type"] == "INTEGER"
+
+
+def test_dates_and_timestamps():
+    assert infer_column(column("2024-01-31", "2024-02-01")) == {"type": "DATE", "format": "%Y-%m-%d", "length": None}
+    assert infer_column(column("31/01/2024", "01/02/2024"))["format"] == "%d/%m/%Y"
+    assert infer_column(column("2024-01-31 10:00:00"))["type"] == "TIMESTAMP"
+
+
+def test_year_month_is_not_a_date():
+    assert infer_column(column("2024-01", "2024-02"))["type"] != "DATE"
+
+
+def test_empty_column_is_text():
+    assert infer_column(column(None, " ")) == {"type": "TEXT", "format": None, "length": None}
+
+
+def test_low_cardinality_text_is_varchar():
+    spec = infer_column(column(*(["LOC1", "LOC2"] * 50)))
+    assert spec["type"] == "VARCHAR" and spec["length"] >= 4
+
+
+def test_coerce_chunk_routes_bad_rows_to_rejects():
+    schema = {
+        "qty": {"type": "INTEGER"},
+        "createdt": {"type": "DATE", "format": "%d/%m/%Y"},
+        "nama": {"type": "TEXT"},
+    }
+    chunk = pd.DataFrame({
+        "qty": [" 5", "x", "7"],
+        "createdt": ["31/01/2024", "01/02/2024", "99/99/2024"],
+        "nama": ["a", "b", "c"],
+    })
+    good, rejects = coerce_chunk(chunk, schema)
+    assert good.values.tolist() == [["5", "2024-01-31", "a"]]
+    assert rejects["source_row"].tolist() == [2, 3]
+    assert rejects["error_column"].tolist() == ["qty", "createdt"]
+
+
+def test_coerce_chunk_without_rejects():
+    good, rejects = coerce_chunk(pd.DataFrame({"qty": ["1"]}), {"qty": {"type": "INTEGER"}})
+    assert rejects is None
+    assert good["qty"].tolist() == ["1"]
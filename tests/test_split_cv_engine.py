@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from split_cv_engine import EXPECTED_COLUMNS, calculate_split_cv, describe_rules
+
+
+def member_frame(countries):
+    n = len(countries)
+    return pd.DataFrame({
+        "MEMBER ID": [f"M{i}" for i in range(n)],
+        "MEMBER NAME": [f"Member {i}" for i in range(n)],
+        "COUNTRY": countries,
+        "CV PLAN A": [100] * n,
+        "CV RO": [50.0] * n,
+        "TOTAL CV C/F": [150] * n,
+        "BALANCE C/F": [7] * n,
+        "GRAND TOTAL": [157] * n,
+    })[EXPECTED_COLUMNS]
+
+
+def test_split_per_country():
+    result = calculate_split_cv(member_frame(["ID", "MY"]))
+    assert result["SPLIT PLAN A"].tolist() == [60.0, 50.0]
+    assert result["SPLIT RO"].tolist() == [20.0, 25.0]
+    assert result["BALANCE B/F"].tolist() == [7.0, 7.0]
+
+
+def test_countries_are_normalized_and_unknown_falls_back_to_default():
+    result = calculate_split_cv(member_frame([" my\t", "my", "SG", None]))
+    assert result["SPLIT PLAN A"].tolist() == [50.0, 50.0, 60.0, 60.0]
+
+
+def test_custom_rules_and_default():
+    rules = {"ID": {"plan_a": 0.6, "ro": 0.4}, "SG": {"plan_a": 0.7, "ro": 0.3}}
+    result = calculate_split_cv(member_frame(["SG", "MY"]), rules=rules, default_country="SG")
+    assert result["SPLIT PLAN A"].tolist() == pytest.approx([70.0, 70.0])
+    assert result["SPLIT RO"].tolist() == pytest.approx([15.0, 15.0])
+
+
+def test_input_is_not_modified():
+    df = member_frame(["ID"])
+    calculate_split_cv(df)
+    assert list(df.columns) == EXPECTED_COLUMNS
+
+
+def test_describe_rules():
+    assert describe_rules() == "ID 60/40, MY 50/50"
@@ -0,0 +1,68 @@
+import uuid
+
+import pandas as pd
+import pytest
+
+from db import quote_ident
+from split_cv_engine import EXPECTED_COLUMNS, calculate_split_cv
+from split_cv_sql import RESULT_COLUMNS, check_result_table, run_split_cv
+
+MEMBERS = pd.DataFrame([
+    ["M1", "Ani", "ID", 100.10, 33.3, 133.4, 0.7, 134.1],
+    ["M2", "Budi", " my\t", 250.0, 125.55, 375.55, 10.0, 385.55],
+    ["M3", "Citra", "sg", 0.3, 0.1, 0.4, None, 0.4],
+    ["M4", "Dewi", None, 12.0, 8.0, 20.0, 1.25, 21.25],
+], columns=EXPECTED_COLUMNS)
+
+
+@pytest.fixture
+def member_table(pg_conn):
+    name = f"test_members_{uuid.uuid4().hex[:8]}"
+    columns = ", ".join(
+        f'"{c}" text' if c in ("MEMBER ID", "MEMBER NAME", "COUNTRY") else f'"{c}" numeric'
+        for c in EXPECTED_COLUMNS
+    )
+    with pg_conn.cursor() as cur:
+        cur.execute(f'CREATE TABLE "{name}" ({columns});')
+        cur.executemany(
+            f'INSERT INTO "{name}" VALUES ({", ".join(["%s"] * len(EXPECTED_COLUMNS))});',
+            [[None if pd.isna(v) else v for v in row] for row in MEMBERS.itertuples(index=False)],
+        )
+    pg_conn.commit()
+    yield name
+    pg_conn.rollback()
+    with pg_conn.cursor() as cur:
+        cur.execute(f'DROP TABLE IF EXISTS "{name}", "{name}_split_cv", "{name}_split_cv__building";')
+    pg_conn.commit()
+
+
+def test_sql_mode_matches_pandas_engine(pg_conn, member_table):
+    result = run_split_cv(pg_conn, member_table)
+    assert result["rows"] == len(MEMBERS)
+
+    with pg_conn.cursor() as cur:
+        select = ", ".join(quote_ident(c) for c in ["MEMBER ID", *RESULT_COLUMNS])
+        cur.execute(f'SELECT {select} FROM {quote_ident(result["result_table"])} ORDER BY "MEMBER ID";')
+        from_sql = pd.DataFrame(cur.fetchall(), columns=["MEMBER ID", *RESULT_COLUMNS])
+    pg_conn.rollback()
+
+    expected = calculate_split_cv(MEMBERS)[["MEMBER ID", *RESULT_COLUMNS]]
+    # Kedua mode menghitung dalam double precision: hasil harus identik, bukan hanya mendekati
+    pd.testing.assert_frame_equal(from_sql, expected, check_exact=True)
+
+
+def test_result_table_must_not_be_the_source(pg_conn, member_table):
+    with pg_conn.cursor() as cur, pytest.raises(ValueError, match="tidak boleh sama"):
+        check_result_table(cur, member_table, member_table)
+
+
+def test_existing_non_result_table_is_refused(pg_conn, member_table):
+    other = f"{member_table}_other"
+    with pg_conn.cursor() as cur:
+        cur.execute(f'CREATE TABLE "{other}" (id int);')
+        with pytest.raises(ValueError, match="bukan tabel hasil"):
+            check_result_table(cur, member_table, other)
+        # Nama baru atau berakhiran _split_cv boleh dipakai
+        check_result_table(cur, member_table, f"{member_table}_new")
+        check_result_table(cur, member_table, "sales_data_split_cv")
+    pg_conn.rollback()
@@ -0,0 +1,54 @@
+import pytest
+
+from sql_executor import check_read_only, uses_server_cursor
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1",
+    "  select * from sales_data;",
+    "WITH t AS (SELECT 1) SELECT * FROM t",
+    "VALUES (1), (2)",
+    "TABLE sales_data",
+    "EXPLAIN SELECT 1",
+    "SHOW statement_timeout",
+    "-- komentar\nSELECT 1",
+    "/* blok */ SELECT 1",
+    "SELECT ';' AS semicolon",
+    'SELECT 1 AS "a;b"',
+    "SELECT $$;$$",
+    "SELECT $tag$ ; $tag$",
+    "SELECT 1 -- ; di komentar",
+])
+def test_check_read_only_accepts_single_read_statement(sql):
+    assert check_read_only(sql) == sql.strip().rstrip(";").strip()
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1; DROP TABLE sales_data",
+    "COMMIT; DELETE FROM sales_data",
+    "SELECT 'a'; SELECT 'b'",
+    "SELECT 1 /* x */; UPDATE t SET a = 1",
+])
+def test_check_read_only_rejects_multiple_statements(sql):
+    with pytest.raises(ValueError, match="satu statement"):
+        check_read_only(sql)
+
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM sales_data",
+    "INSERT INTO t VALUES (1)",
+    "DROP TABLE sales_data",
+    "-- SELECT\nDELETE FROM sales_data",
+    "/* SELECT */ UPDATE t SET a = 1",
+    "SET statement_timeout = 0",
+])
+def test_check_read_only_rejects_writes(sql):
+    with pytest.raises(ValueError, match="SELECT"):
+        check_read_only(sql)
+
+
+def test_uses_server_cursor_only_for_cursor_statements():
+    assert uses_server_cursor("select 1")
+    assert uses_server_cursor("WITH t AS (SELECT 1) SELECT * FROM t")
+    assert not uses_server_cursor("EXPLAIN SELECT 1")
+    assert not uses_server_cursor("SHOW work_mem")
@@ -0,0 +1,86 @@
+import datetime
+
+import pytest
+
+from sql_filters import (
+    any_clause, array_type, date_range_clause, pairs_clause, text_date_columns, where_clause
+)
+
+TYPES = {
+    "createdt": "date",
+    "batchdt": "text",
+    "kodeProduk": "character varying",
+    "qty": "integer",
+    "tags": "ARRAY",
+}
+
+
+def test_date_range_is_half_open_on_native_column():
+    sql, params = date_range_clause("createdt", "2024-01-01", datetime.date(2024, 1, 31), TYPES)
+    assert sql == '"createdt" >= %s AND "createdt" < %s'
+    assert params == [datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)]
+
+
+def test_date_range_accepts_datetimes():
+    _, params = date_range_clause("createdt", datetime.datetime(2024, 3, 5, 13, 0), "2024-03-05 08:00", TYPES)
+    assert params == [datetime.date(2024, 3, 5), datetime.date(2024, 3, 6)]
+
+
+def test_date_range_converts_text_column_with_indexable_function():
+    sql, _ = date_range_clause("batchdt", "2024-01-01", "2024-01-31", TYPES)
+    assert sql == 'text_to_date("batchdt") >= %s AND text_to_date("batchdt") < %s'
+
+
+def test_date_range_rejects_unknown_column():
+    with pytest.raises(ValueError, match="tidak diizinkan"):
+        date_range_clause("createdt; DROP TABLE x", "2024-01-01", "2024-01-31", TYPES)
+
+
+def test_text_date_columns():
+    assert text_date_columns(TYPES) == ["batchdt"]
+
+
+def test_array_type():
+    assert array_type("qty", TYPES) == "integer[]"
+    assert array_type("tags", TYPES) == "text[]"
+    assert array_type("missing", TYPES) == "text[]"
+    assert array_type("qty") == "text[]"
+
+
+def test_any_clause_passes_one_array_parameter():
+    sql, params = any_clause("qty", (1, 2, 3), TYPES)
+    assert sql == '"qty" = ANY(%s::integer[])'
+    assert params == [[1, 2, 3]]
+
+
+def test_pairs_clause():
+    pairs = [("P001", "Produk A"), ("P001", "Produk B"), ("P002", "Produk A")]
+    sql, params = pairs_clause(["kodeProduk", "namaProduk"], pairs, TYPES)
+    assert sql == (
+        '"kodeProduk" = ANY(%s::character varying[]) AND "namaProduk" = ANY(%s::text[]) AND '
+        '("kodeProduk", "namaProduk") IN (SELECT * FROM unnest(%s::character varying[], %s::text[]))'
+    )
+    # Nilai per kolom tanpa duplikat, pasangan tetap lengkap dan berurutan
+    assert params == [
+        ["P001", "P002"],
+        ["Produk A", "Produk B"],
+        ["P001", "P001", "P002"],
+        ["Produk A", "Produk B", "Produk A"],
+    ]
+
+
+def test_where_clause():
+    assert where_clause([]) == ("", [])
+    assert where_clause([None, ("a = %s", [1]), ("b = %s", [2])]) == ("WHERE a = %s AND b = %s", [1, 2])
+
+
+def test_pairs_clause_matches_exact_pairs(pg_conn):
+    sql, params = pairs_clause(["kode", "nama"], [("P001", "Produk A"), ("P002", "Produk B")], {"kode": "text", "nama": "text"})
+    with pg_conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT kode, nama FROM (VALUES
+                ('P001', 'Produk A'), ('P001', 'Produk B'), ('P002', 'Produk A'), ('P002', 'Produk B')
+            ) AS t(kode, nama)
+            WHERE {sql} ORDER BY kode
+        """, params)
+        assert cur.fetchall() == [("P001", "Produk A"), ("P002", "Produk B")]